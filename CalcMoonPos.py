@@ -1,24 +1,256 @@
+import logging
+import threading
+
 import ephem
+import numpy as np
 from datetime import timezone, datetime
 
+import clock
+
+log = logging.getLogger(__name__)
+
 # Observer position
 observer = ephem.Observer()
 observer.lat = '47.2237270'              # Latitude
 observer.lon = ' 8.8176838'              # Longitude
 observer.elev = 466.63                   # Elevation in meters
 
+# Precomputed Moon track (see MoonEphemerisTable)
+EPHEM_STEP_S = 60.0                      # initial grid spacing in seconds
+EPHEM_MIN_STEP_S = 5.0                   # never refine the grid below this
+EPHEM_SPAN_S = 6 * 3600.0                # time covered by one table
+EPHEM_MAX_ERR_DEG = 0.01                 # allowed interpolation error (az/el)
+
+UNIX_EPOCH_EPHEM = 25567.5               # ephem.Date of 1970-01-01 00:00 UTC
+
+
+def unix_to_ephem(t):
+    """Convert a Unix timestamp (s) to an ephem.Date float (days since 1899-12-31 12:00)."""
+    return t / 86400.0 + UNIX_EPOCH_EPHEM
+
+
+def _new_observer():
+    """
+    Return a private copy of the station observer.
+
+    ephem.Observer is mutable (date, horizon), so every worker that
+    computes positions gets its own instance instead of sharing the global.
+    """
+    obs = ephem.Observer()
+    obs.lat = observer.lat
+    obs.lon = observer.lon
+    obs.elev = observer.elev
+    return obs
+
+
+def _compute_track(times):
+    """
+    Exact Moon az/el/range for an array of Unix timestamps (slow path, one
+    ephem evaluation per sample).
+
+    returns: az [deg], el [deg], range [km] (topocentric) as numpy arrays.
+    """
+    obs = _new_observer()
+    moon = ephem.Moon()
+
+    az = np.empty(len(times))
+    el = np.empty(len(times))
+    rng = np.empty(len(times))
+    for i, t in enumerate(times):
+        obs.date = unix_to_ephem(t)
+        moon.compute(obs)
+        az[i] = float(moon.az)
+        el[i] = float(moon.alt)
+        # earth_distance is topocentric when computed for an Observer
+        rng[i] = float(moon.earth_distance) * ephem.meters_per_au / 1000.0
+
+    return np.degrees(az), np.degrees(el), rng
+
+
+def get_moon_limb_altitude(times):
+    """
+    Refracted altitude of the Moon's upper limb for an array of Unix
+    timestamps: the quantity ephem's next_rising()/next_setting() bring to
+    the horizon, so crossings found from it match moon_crossings.
+
+    returns: altitude [deg] as numpy array.
+    """
+    obs = _new_observer()
+    moon = ephem.Moon()
+
+    alt = np.empty(len(times))
+    for i, t in enumerate(times):
+        obs.date = unix_to_ephem(t)
+        moon.compute(obs)
+        alt[i] = float(moon.alt) + float(moon.radius)
+
+    return np.degrees(alt)
+
+
+class MoonEphemerisTable:
+    """
+    Moon track precomputed on a time grid, answered by linear interpolation.
+
+    The track is computed once for `span_s` seconds beyond the queried range
+    and rebuilt only when a query falls outside of it. On every build the
+    interpolation is checked against exact values at the grid midpoints; the
+    step is halved until the error stays below `max_err_deg` (a warning is
+    logged if `min_step_s` is reached first).
+    """
+
+    def __init__(self, step_s=EPHEM_STEP_S, span_s=EPHEM_SPAN_S,
+                 max_err_deg=EPHEM_MAX_ERR_DEG, min_step_s=EPHEM_MIN_STEP_S):
+        self.step_s = float(step_s)
+        self.span_s = float(span_s)
+        self.max_err_deg = float(max_err_deg)
+        self.min_step_s = float(min_step_s)
+        self.max_err = None               # measured error of the current table
+        self._table = None                # (t, az_unwrapped, el, range_km)
+        self._lock = threading.Lock()
+
+    def _build(self, t_start, t_end):
+        step = self.step_s
+        t_end = t_end + self.span_s
+        while True:
+            n = int(np.ceil((t_end - t_start) / step)) + 1
+            t = t_start + step * np.arange(n)
+            az, el, rng = _compute_track(t)
+            az = np.degrees(np.unwrap(np.radians(az)))
+
+            # Verify the interpolation error at the midpoints (worst case for linear interp)
+            t_mid = t[:-1] + step / 2
+            az_m, el_m, _ = _compute_track(t_mid)
+            az_i = np.interp(t_mid, t, az)
+            el_i = np.interp(t_mid, t, el)
+            err_az = np.abs(((az_i - az_m + 180) % 360) - 180)
+            err = float(max(err_az.max(), np.abs(el_i - el_m).max()))
+
+            if err <= self.max_err_deg or step / 2 < self.min_step_s:
+                if err > self.max_err_deg:
+                    log.warning(
+                        "Moon table: interpolation error %.4f deg exceeds %.4f deg "
+                        "at the minimum step of %.1f s", err, self.max_err_deg, step,
+                    )
+                self.max_err = err
+                return t, az, el, rng
+            step /= 2
+
+    def _table_for(self, t_min, t_max):
+        tab = self._table
+        if tab is not None and tab[0][0] <= t_min and t_max <= tab[0][-1]:
+            return tab
+        with self._lock:
+            tab = self._table
+            if tab is None or not (tab[0][0] <= t_min and t_max <= tab[0][-1]):
+                tab = self._build(t_min - self.step_s, t_max + self.step_s)
+                self._table = tab
+            return tab
+
+    def query(self, times):
+        """
+        Moon position for Unix timestamp(s).
+
+        times: scalar or array of Unix timestamps.
+        returns: az [deg, 0..360), el [deg], range [km], same shape as times.
+        """
+        times = np.asarray(times, dtype=float)
+        t, az, el, rng = self._table_for(float(times.min()), float(times.max()))
+        az_q = np.interp(times, t, az) % 360.0
+        el_q = np.interp(times, t, el)
+        rng_q = np.interp(times, t, rng)
+        return az_q, el_q, rng_q
+
+    def invalidate(self):
+        """Drop the current table; the next query rebuilds it."""
+        with self._lock:
+            self._table = None
+
+
+# Live table used by get_moon_position() and by track queries that include
+# the current time (tracking, telemetry). Ranges elsewhere in time (pass
+# planning, benchmarks) go to range_table, so they never evict the live one.
+moon_table = MoonEphemerisTable()
+range_table = MoonEphemerisTable()
+
+
 def get_moon_position():
     """
     Calculate Position of the Moon in the Sky with respect of the current Location.
 
     returns: az - Azimuth and el - Elevation of the Moon.
     """
-    # Make sure we update the time each call
-    observer.date = ephem.now()
-    moon = ephem.Moon(observer)
-    az = float(moon.az) * 180.0 / ephem.pi
-    el = float(moon.alt) * 180.0 / ephem.pi
-    return az, el
+    az, el, _ = moon_table.query(clock.time())
+    return float(az), float(el)
+
+
+def get_moon_track(times):
+    """
+    Moon position for one or many Unix timestamps (vectorized, interpolated).
+
+    Ranges that include the current time are served by moon_table, all
+    others by range_table.
+
+    returns: az [deg], el [deg], range [km] as numpy arrays.
+    """
+    times = np.asarray(times, dtype=float)
+    now = clock.time()
+    live = times.min() <= now + EPHEM_STEP_S and times.max() >= now - EPHEM_STEP_S
+    return (moon_table if live else range_table).query(times)
+
+
+class MoonCrossingCache:
+    """
+    Next rise/set of the Moon through an elevation threshold, computed once.
+
+    The root-finding in next_rising()/next_setting() only has to run again
+    when one of the cached crossings has passed or the threshold changes;
+    every other call is served from memory. A private observer is used, so
+    the shared `observer` (and its horizon) is never touched.
+    """
+
+    def __init__(self):
+        self._key = None                  # threshold the cache was computed for
+        self._rise = None                 # Unix timestamp of next rise
+        self._set = None                  # Unix timestamp of next set
+        self._lock = threading.Lock()
+
+    def _compute(self, min_el_deg, now):
+        obs = _new_observer()
+        obs.date = unix_to_ephem(now)
+        obs.horizon = f"{min_el_deg:.2f}"
+
+        moon = ephem.Moon()
+        moon.compute(obs)
+
+        next_rise = float(obs.next_rising(moon))
+        next_set = float(obs.next_setting(moon))
+        to_unix = lambda d: (d - UNIX_EPOCH_EPHEM) * 86400.0
+        return to_unix(next_rise), to_unix(next_set)
+
+    def get(self, min_el_deg, now=None):
+        """
+        returns: (next_rise, next_set) as Unix timestamps.
+        """
+        now = clock.time() if now is None else now
+        with self._lock:
+            if (
+                self._key != min_el_deg
+                or self._rise is None
+                or now >= self._rise
+                or now >= self._set
+            ):
+                self._rise, self._set = self._compute(min_el_deg, now)
+                self._key = min_el_deg
+            return self._rise, self._set
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
+
+
+# Shared crossing cache used by get_moon_threshold_times()
+moon_crossings = MoonCrossingCache()
+
 
 def get_moon_threshold_times(min_el_deg=15.0):
     """
@@ -27,24 +259,13 @@ def get_moon_threshold_times(min_el_deg=15.0):
       - next_above: next time Moon goes ABOVE min_el_deg (rising through it)
       - next_below: next time Moon goes BELOW min_el_deg (setting through it)
 
-    Returned as ISO strings in UTC (for JS).
+    Returned as ISO strings in UTC (for JS). Served from moon_crossings.
     """
-    obs = observer
-    obs.date = ephem.now()
-    obs.horizon = f"{min_el_deg:.2f}"
-
-    moon = ephem.Moon()
-    moon.compute(obs)
-
-    # These return ephem.Date (UTC)
-    next_rise   = obs.next_rising(moon)
-    next_set    = obs.next_setting(moon)
+    next_rise, next_set = moon_crossings.get(float(min_el_deg))
 
     # Convert to Python datetimes in UTC, then ISO
-    def to_iso(d):
-        dt = d.datetime()
-        # mark as UTC explicitly
-        return dt.replace(tzinfo=timezone.utc).isoformat()
+    def to_iso(t):
+        return datetime.fromtimestamp(t, tz=timezone.utc).isoformat()
 
     return to_iso(next_rise), to_iso(next_set)
 
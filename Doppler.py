@@ -5,7 +5,8 @@ import ephem
 import math 
 import pyTMD.astro
 import datetime
-from CalcMoonPos import get_observer, get_moon_position
+from CalcMoonPos import get_observer, UNIX_EPOCH_EPHEM
+from dopplerTry2 import get_ephemeris, unix_to_time
 
 ftx = 1.296e9
 c = 299792458 #m/s
@@ -42,50 +43,57 @@ c = 299792458 #m/s
 
 #     return np.array([x, y, z])
 
-def moon_dist(obs):
-    r = 6367127
-    moon = ephem.Moon(obs)
-    moon.compute(obs)
-    az, el = get_moon_position()
-    alpha = 90 - el
-    center_dist = float(moon.earth_distance) * ephem.meters_per_au
+def _obs_to_unix(obs):
+    """ephem.Observer date -> Unix timestamp (s)."""
+    return (float(obs.date) - UNIX_EPOCH_EPHEM) * 86400.0
 
-    d = np.sqrt(r**2 + center_dist**2 - 2*r*center_dist*np.cos(alpha))
-    return d
+def moon_range_rates(t_unix, accel_step_s=1.0):
+    """
+    Range, range rate and range acceleration station -> Moon for a batch of
+    Unix timestamps, in one vectorized Skyfield call.
 
-def moon_vel(obs, delta_s = 2.304):
-    d = moon_dist(obs)
-
-    obs2 = ephem.Observer()
-    obs2.lat = obs.lat    
-    obs2.lon = obs.lon    
-    obs2.elevation = obs.elevation   
-    obs2.date = ephem.now() + ephem.second * delta_s
+    Range rate is the projection of the relative velocity vector onto the
+    line of sight. Range acceleration is (|v|^2 - rdot^2)/R + r_hat·a, where
+    the acceleration a comes from velocity vectors at t ± accel_step_s that
+    are evaluated in the same call.
 
-    d2 = moon_dist(obs2)
-    v = (d2-d) / delta_s
+    returns: range [m], range rate [m/s], range acceleration [m/s^2]
+    """
+    ts, eph, earth, moon, station = get_ephemeris()
 
-    obs3 = ephem.Observer()
-    obs3.lat = obs.lat    
-    obs3.lon = obs.lon    
-    obs3.elevation = obs.elevation   
-    obs3.date = ephem.now() + ephem.second * 2
+    t_unix = np.atleast_1d(np.asarray(t_unix, dtype=float))
+    n = t_unix.size
+    t_all = np.concatenate([t_unix, t_unix - accel_step_s, t_unix + accel_step_s])
 
-    d3 = moon_dist(obs3)
+    astrometric = station.at(unix_to_time(t_all)).observe(moon)
+    r = astrometric.position.m
+    v = astrometric.velocity.m_per_s
 
-    obs4 = ephem.Observer()
-    obs4.lat = obs.lat    
-    obs4.lon = obs.lon    
-    obs4.elevation = obs.elevation   
-    obs4.date = ephem.now() + ephem.second * (2+delta_s)
+    r0, v0 = r[:, :n], v[:, :n]
+    a0 = (v[:, 2*n:] - v[:, n:2*n]) / (2.0 * accel_step_s)
 
-    d4 = moon_dist(obs4)
+    rng = np.sqrt(np.sum(r0 * r0, axis=0))
+    r_hat = r0 / rng
+    rdot = np.sum(r_hat * v0, axis=0)
+    rddot = (np.sum(v0 * v0, axis=0) - rdot**2) / rng + np.sum(r_hat * a0, axis=0)
+    return rng, rdot, rddot
 
-    v2 = (d4-d3) / delta_s
+def moon_dist(obs):
+    """Topocentric distance to the Moon [m] at the observer's date."""
+    moon = ephem.Moon(obs)
+    moon.compute(obs)
+    # earth_distance is already topocentric when computed for an Observer
+    return float(moon.earth_distance) * ephem.meters_per_au
 
-    vdt = (v2-v) / 2
+def moon_vel(obs, delta_s = 2.304):
+    """
+    Range rate [m/s] and range acceleration [m/s^2] at the observer's date.
 
-    return v, vdt
+    delta_s is kept for compatibility; the values come from
+    moon_range_rates() instead of finite differences.
+    """
+    _, v, vdt = moon_range_rates(_obs_to_unix(obs))
+    return float(v[0]), float(vdt[0])
 
 def doppler(f_tx, v_rel):
     c = 299792458 #m/s
@@ -107,32 +115,16 @@ if __name__ == "__main__":
     # moon_ECEF = np.array(moon_ECEF).flatten()   
 
     t = np.arange(0, 61)
-    dist_vec = []
     # dist_ECEF_vec = []
-    v_vec = []
-    vdt_vec = []
-    doppler_vec = []
-
-    for x in t:
-
-        obsn = ephem.Observer()
-        obsn.lat = obs.lat    
-        obsn.lon = obs.lon    
-        obsn.elevation = obs.elevation   
-        obsn.date = ephem.now() + ephem.second * x
-
-        # me_ECEF = llh_to_ecef(obsn.lat, obsn.lon, obsn.elevation)
-        # d2 = moon_ECEF - me_ECEF
-        # dist_ECEF_vec.append(np.linalg.norm(d2))
-
-        d = moon_dist(obsn)
-        v, vdt = moon_vel(obsn)
-        f = doppler(ftx, moon_vel(obsn, 0.1)[0])
-
-        dist_vec.append(d)
-        v_vec.append(v)
-        vdt_vec.append(vdt)
-        doppler_vec.append(f)
+
+    # me_ECEF = llh_to_ecef(obs.lat, obs.lon, obs.elevation)
+    # d2 = moon_ECEF - me_ECEF
+    # dist_ECEF_vec.append(np.linalg.norm(d2))
+
+    # All 61 timestamps in one call
+    t_now = datetime.datetime.now(datetime.timezone.utc).timestamp()
+    dist_vec, v_vec, vdt_vec = moon_range_rates(t_now + t)
+    doppler_vec = doppler(ftx, v_vec)
 
     fig, ax = plt.subplots(clear=True, constrained_layout=True)
     ax.set_ylabel('distance in m')
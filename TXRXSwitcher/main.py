@@ -1,4 +1,5 @@
 from machine import Pin
+import select
 import sys
 import time
 
@@ -32,40 +33,103 @@ switch_state = {
     "S3": "1"
 }
 
+# Named presets for PRESET TX / PRESET RX (same as the host app)
+presets = {
+    "TX": {"S1": "1", "S2": "2", "S3": "2"},
+    "RX": {"S1": "2", "S2": "1", "S3": "1"},
+}
+
+PULSE_MS = 50
+SPIN_US = 2000      # busy-wait the last 2 ms before an armed switch
+TICKS_MAX = time.ticks_add(0, -1)   # ticks_us() wraps after TICKS_MAX
+
+# Scheduled switch (ARM): preset name + target time.ticks_us(), or None
+armed = None
+# Last switch: preset/target and time.ticks_us() at which each coil fired
+last_fire = {"preset": None, "target": None, "coils": {}}
+
 # Turn all coils OFF at startup
 for c in coils.values():
     c.value(COIL_OFF)
 
-def pulse(coil_pin):
-    print("DEBUG pulsing GPIO", coil_pin)
-    coil_pin.value(COIL_ON)
-    time.sleep_ms(50)
-    coil_pin.value(COIL_OFF)
-
-def set_switch(sid, side):
-    # sid: "S1", "S2", "S3"
-    # side: "1" or "1"
-    pin_name = f"{sid}_{side}"
-    if pin_name not in coils:
-        return "ERROR"
-    print("DEBUG set_switch:", sid, side, "pin:", pin_name)
-    # Safety: make sure opposite coil is OFF
-    if side == "1":
-        coils[f"{sid}_2"].value(COIL_OFF)
-    else:
-        coils[f"{sid}_1"].value(COIL_OFF)
-
-    pulse(coils[pin_name])
-    switch_state[sid] = side
+def set_switches(targets, preset=None, target=None):
+    # targets: {"S1": "2", "S2": "1", ...}
+    # All coils are pulsed together, so a whole preset takes one pulse.
+    # The instant each coil is energised is kept for TIMING.
+    on = []
+    for sid, side in targets.items():
+        other = "2" if side == "1" else "1"
+        coils[f"{sid}_{other}"].value(COIL_OFF)   # opposite coil OFF
+        on.append((sid, coils[f"{sid}_{side}"]))
+    fired = {}
+    for sid, c in on:
+        c.value(COIL_ON)
+        fired[sid] = time.ticks_us()
+    last_fire["preset"] = preset
+    last_fire["target"] = target
+    last_fire["coils"] = fired
+    on = [c for _, c in on]
+    time.sleep_ms(PULSE_MS)
+    for c in on:
+        c.value(COIL_OFF)
+    for sid, side in targets.items():
+        switch_state[sid] = side
     return "OK"
 
+def parse_targets(tokens):
+    # ["S1_2", "S2_1", ...] -> {"S1": "2", "S2": "1"}; None if invalid
+    targets = {}
+    for tok in tokens:
+        sid, side = tok.split("_")
+        if sid not in ["S1", "S2", "S3"] or side not in ["1", "2"]:
+            return None
+        targets[sid] = side
+    return targets
+
+def make_timing_string():
+    # TIMING ARMED RX TARGET=123456
+    # TIMING FIRED RX TARGET=123456 S1=123460 S2=123468 S3=123475
+    if armed:
+        return f"TIMING ARMED {armed[0]} TARGET={armed[1]}"
+    if not last_fire["coils"]:
+        return "TIMING NONE"
+    parts = ["TIMING FIRED", last_fire["preset"] or "SET"]
+    if last_fire["target"] is not None:
+        parts.append(f"TARGET={last_fire['target']}")
+    parts += [f"{k}={v}" for k, v in sorted(last_fire["coils"].items())]
+    return " ".join(parts)
+
+def fire_armed():
+    # Wait out the last SPIN_US in a tight loop, then switch
+    global armed
+    name, target = armed
+    while time.ticks_diff(target, time.ticks_us()) > 0:
+        pass
+    armed = None
+    set_switches(presets[name], name, target)
+
+def poll_timeout_ms():
+    # Block on stdin until the armed switch is due (forever if none)
+    if not armed:
+        return -1
+    return max(0, (time.ticks_diff(armed[1], time.ticks_us()) - SPIN_US) // 1000)
+
 def make_status_string():
     # Example: STATE S1=1 S2=2 S3=1
     return "STATE " + " ".join(f"{k}={v}" for k, v in switch_state.items())
 
-print("Ready: commands SET S1_1 | SET S1_2 | SET S2_1 | ... | SET S3_2 | STATUS")
+print("Ready: commands SET S1_1 | SET S1_2 S2_1 S3_1 | PRESET TX | PRESET RX | STATUS"
+      " | SYNC | ARM RX <ticks_us> | DISARM | TIMING")
+
+poller = select.poll()
+poller.register(sys.stdin, select.POLLIN)
 
 while True:
+    if not poller.poll(poll_timeout_ms()):
+        if armed and time.ticks_diff(armed[1], time.ticks_us()) <= SPIN_US:
+            fire_armed()
+        continue
+
     line = sys.stdin.readline().strip().upper()
     if not line:
         continue
@@ -74,17 +138,52 @@ while True:
         print(make_status_string())
         continue
 
+    if line == "SYNC":
+        # Shared time base: the host maps its clock onto time.ticks_us()
+        print("SYNC", time.ticks_us())
+        continue
+
+    if line == "TIMING":
+        print(make_timing_string())
+        continue
+
+    if line == "DISARM":
+        armed = None
+        print("OK DISARMED")
+        continue
+
+    if line.startswith("ARM "):
+        # ARM RX 123456789: apply preset RX when time.ticks_us() reaches it
+        try:
+            _, name, target = line.split()
+            target = int(target) & TICKS_MAX
+            if name in presets:
+                armed = (name, target)
+                print(f"OK ARMED {name} TARGET={target} NOW={time.ticks_us()}")
+            else:
+                print("ERROR Invalid preset")
+        except Exception:
+            print("ERROR Format")
+        continue
+
     if line.startswith("SET "):
+        # One or more relays, one reply: SET S1_2 S2_1 S3_1
         try:
-            _, sw = line.split()
-            sid, side = sw.split("_")   # "S1", "1"
-            if sid in ["S1", "S2", "S3"] and side in ["1", "2"]:
-                result = set_switch(sid, side)
+            targets = parse_targets(line.split()[1:])
+            if targets:
+                result = set_switches(targets)
                 print(result, make_status_string())
             else:
                 print("ERROR Invalid switch")
         except Exception:
             print("ERROR Format")
+    elif line.startswith("PRESET "):
+        name = line.split()[-1]
+        if name in presets:
+            result = set_switches(presets[name], name)
+            print(result, make_status_string())
+        else:
+            print("ERROR Invalid preset")
     else:
         # ignore noise / unknown commands
         continue
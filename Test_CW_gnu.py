@@ -24,6 +24,8 @@ from gnuradio import uhd
 import time
 from datetime import datetime, timezone
 
+import clock
+
 
 
 
@@ -100,7 +102,7 @@ class testSpeci(gr.top_block):
         self.blocks_head_0 = blocks.head(gr.sizeof_gr_complex*1, (6*int(samp_rate)))
         self.blocks_file_source_1 = blocks.file_source(gr.sizeof_gr_complex*1, 'N:\\Empfang_data/binforMorse.bin', False, 0, 0)
         self.blocks_file_source_1.set_begin_tag(pmt.PMT_NIL)
-        self.blocks_file_sink_0 = blocks.file_sink(gr.sizeof_gr_complex*1, f'N:\\Empfang_data/rx_Versuch_{datetime.now().strftime("%H%M%S")}_CW.bin', False)
+        self.blocks_file_sink_0 = blocks.file_sink(gr.sizeof_gr_complex*1, f'N:\\Empfang_data/rx_Versuch_{clock.now().strftime("%H%M%S")}_CW.bin', False)
         self.blocks_file_sink_0.set_unbuffered(False)
 
 
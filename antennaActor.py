@@ -0,0 +1,203 @@
+"""
+Single owner of the MD-01 serial port.
+
+All traffic to a SerialAntenna goes through one worker thread that serves a
+prioritized command queue:
+
+    STOP  >  CLOSE  >  SET  >  READ
+
+Callers get a concurrent.futures.Future back (or use the blocking helpers).
+Pending reads are merged into one serial transaction, a STOP cancels every
+SET still waiting in the queue, and only the newest of several queued SETs
+is sent. Every position read is published to subscribers.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Tuple
+
+import clock
+from serialComm import SerialAntenna
+from serialMetrics import metrics
+
+# Command priorities (lower runs first)
+PRIO_STOP = 0
+PRIO_CLOSE = 1              # queued SETs / READs fail instead of timing out first
+PRIO_SET = 2
+PRIO_READ = 3
+
+READ_TIMEOUT = 3.0          # s — default wait for a blocking read_position()
+SET_TIMEOUT = 3.0           # s — default wait for a blocking set/stop
+
+
+class AntennaActor:
+    """
+    Worker thread that owns a SerialAntenna.
+
+    Subscribers are called from the worker thread as callback(t, az, el)
+    with the Unix timestamp of the read and the raw controller angles.
+    """
+
+    def __init__(self, antenna: SerialAntenna) -> None:
+        self.antenna = antenna
+        self._queue: List[tuple] = []
+        self._cv = threading.Condition()
+        self._seq = itertools.count()
+        self._subscribers: List[Callable[[float, float, float], None]] = []
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    # --------------------------------------------------------------------- #
+    # Queue
+    # --------------------------------------------------------------------- #
+
+    def _submit(self, prio: int, kind: str, *args) -> Future:
+        fut: Future = Future()
+        with self._cv:
+            if self._closed:
+                fut.set_exception(ConnectionError("Antenna actor closed"))
+                return fut
+            heapq.heappush(self._queue, (prio, next(self._seq), kind, args, fut))
+            self._cv.notify()
+        return fut
+
+    def _take(self) -> Tuple[str, tuple, List[Future]]:
+        """
+        Pop the next command plus every queued command it absorbs.
+
+        returns: (kind, args, futures to resolve with its result)
+        """
+        with self._cv:
+            while not self._queue:
+                self._cv.wait()
+            prio, _, kind, args, fut = heapq.heappop(self._queue)
+            futures = [fut]
+
+            if kind == "read":
+                # One serial read answers every pending reader
+                rest = [item for item in self._queue if item[2] != "read"]
+                futures += [item[4] for item in self._queue if item[2] == "read"]
+                self._queue = rest
+                heapq.heapify(self._queue)
+            elif kind == "set":
+                # Only the newest target matters
+                sets = [item for item in self._queue if item[2] == "set"]
+                if sets:
+                    newest = max(sets, key=lambda item: item[1])
+                    args = newest[3]
+                    futures += [item[4] for item in sets]
+                    self._queue = [item for item in self._queue if item[2] != "set"]
+                    heapq.heapify(self._queue)
+            elif kind == "stop":
+                # A stop overrides any motion that has not been sent yet
+                for item in self._queue:
+                    if item[2] == "set":
+                        item[4].cancel()
+                self._queue = [item for item in self._queue if item[2] != "set"]
+                heapq.heapify(self._queue)
+            elif kind == "close":
+                self._closed = True
+                for item in self._queue:
+                    item[4].set_exception(ConnectionError("Antenna actor closed"))
+                self._queue = []
+
+            return kind, args, futures
+
+    def _run(self) -> None:
+        while True:
+            kind, args, futures = self._take()
+            futures = [f for f in futures if f.set_running_or_notify_cancel()]
+            if not futures and kind != "close":
+                continue
+
+            try:
+                if kind == "read":
+                    az, el = self.antenna.read_md01_position()
+                    result = (az, el)
+                    self._publish(clock.time(), az, el)
+                elif kind == "set":
+                    az, el = args
+                    self.antenna.send_rot2_set(self.antenna.ser, az, el)
+                    result = None
+                elif kind == "stop":
+                    self.antenna.stopMovement()
+                    result = None
+                else:  # close
+                    self.antenna.close()
+                    result = None
+            except Exception as exc:  # noqa: BLE001
+                for f in futures:
+                    f.set_exception(exc)
+            else:
+                for f in futures:
+                    f.set_result(result)
+
+            if kind == "close":
+                return
+
+    def _publish(self, t: float, az: float, el: float) -> None:
+        for cb in list(self._subscribers):
+            try:
+                cb(t, az, el)
+            except Exception:  # noqa: BLE001
+                pass
+
+    # --------------------------------------------------------------------- #
+    # High-level API
+    # --------------------------------------------------------------------- #
+
+    def submit_read(self) -> Future:
+        """Queue a position read; the Future resolves to (az, el)."""
+        return self._submit(PRIO_READ, "read")
+
+    def submit_set(self, az_cmd: float, el_cmd: float) -> Future:
+        """Queue a SET position command (controller azimuth, elevation)."""
+        return self._submit(PRIO_SET, "set", az_cmd, el_cmd)
+
+    def submit_stop(self) -> Future:
+        """Queue a STOP; it runs before any queued SET or READ."""
+        return self._submit(PRIO_STOP, "stop")
+
+    # The blocking helpers are timed including the queue wait ("md01.actor.*"),
+    # i.e. what callers see; the serial transaction alone is "md01.read" etc.
+
+    def read_position(self, timeout: float = READ_TIMEOUT) -> Tuple[float, float]:
+        """Blocking read of (az, el) in controller coordinates."""
+        with metrics.timer("md01.actor.read"):
+            return self.submit_read().result(timeout)
+
+    def set_position(self, az_cmd: float, el_cmd: float, timeout: float = SET_TIMEOUT) -> None:
+        """Blocking SET; returns once the command has been written."""
+        with metrics.timer("md01.actor.set"):
+            self.submit_set(az_cmd, el_cmd).result(timeout)
+
+    def stop_movement(self, timeout: float = SET_TIMEOUT) -> None:
+        """Blocking STOP; returns once the command has been written."""
+        with metrics.timer("md01.actor.stop"):
+            self.submit_stop().result(timeout)
+
+    def subscribe(self, callback: Callable[[float, float, float], None]) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[float, float, float], None]) -> None:
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
+
+    def status(self) -> bool:
+        return not self._closed and self.antenna.status()
+
+    def close(self, timeout: float = SET_TIMEOUT) -> None:
+        """Close the port after the command in flight; pending commands fail."""
+        fut = self._submit(PRIO_CLOSE, "close")
+        try:
+            fut.result(timeout)
+        finally:
+            self._thread.join(timeout)
@@ -6,11 +6,13 @@ Features
 - Tracks the Moon and slews the antenna
 - Streams an RTSP camera as MJPEG
 - Controls a Raspberry Pi Pico-based coax switch
+- Runs further rotators / switch boxes from a device registry (devices.py)
 - Runs a GNU Radio measurement flowgraph and streams logs via SSE
 """
 
 from __future__ import annotations
 
+import math
 import os
 import threading
 import time
@@ -19,11 +21,9 @@ from collections import deque
 from datetime import datetime, timezone
 from functools import wraps
 from queue import Empty, Queue
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import logging
-import serial  # pyserial
-import serial.tools.list_ports
 from dotenv import load_dotenv
 from flask import (
     Flask,
@@ -37,9 +37,23 @@ from flask import (
 )
 
 import CalcMoonPos
+import clock
 from camera import CameraStream, mjpeg_generator
-from serialComm import SerialAntenna
-from serialSwitch import SerialSwitch
+from passPlanner import planner as pass_planner
+from portDiscovery import PortDiscovery
+from portRegistry import ROLE_MD01, ROLE_PICO, PortRegistry
+from positionHistory import BINARY_MIMETYPE, history as position_history, to_binary, to_json
+from devices import (
+    ELEVATION_MIN,
+    TRACK_LEAD,
+    DeviceError,
+    RotatorDevice,
+    SwitchDevice,
+    moon,
+    registry,
+)
+from serialMetrics import TimedLock, metrics
+from serialSwitch import PRESETS, SerialSwitch
 from Test_CW_gnu import testSpeci
 
 UTC = timezone.utc
@@ -64,46 +78,44 @@ APP_PASSWORD = os.getenv("APP_PASSWORD")
 CAMERA_SOURCE = os.getenv("CAMERA_SOURCE")
 camera = CameraStream(src=CAMERA_SOURCE, jpeg_quality=80)
 
+# Simulated time: CLOCK_WARP=600 runs Moon, tracking and waits 600x faster
+CLOCK_WARP = os.getenv("CLOCK_WARP")
+if CLOCK_WARP:
+    clock.set_clock(clock.SimClock(warp=float(CLOCK_WARP)))
+
+# Extra ports offered in the port lists, e.g. emulator ptys (see emulator.py)
+EXTRA_SERIAL_PORTS = [p for p in os.getenv("EXTRA_SERIAL_PORTS", "").split(",") if p]
+
+# Cached port list, refreshed on hotplug / in the background (see portRegistry.py)
+port_registry = PortRegistry(extra_ports=EXTRA_SERIAL_PORTS)
+
+# Pico / MD-01 auto-discovery; PORT_DISCOVERY_CACHE keeps the USB serial
+# number -> role mapping across restarts (see portDiscovery.py)
+port_discovery = PortDiscovery(port_registry, cache_path=os.getenv("PORT_DISCOVERY_CACHE"))
+
 # -----------------------------------------------------------------------------
 # Global shared objects / locks
 # -----------------------------------------------------------------------------
 
 measurements = []
 
-serial_lock = threading.Lock()
-camera_lock = threading.Lock()
+# App locks record wait / hold times (see /metrics/serial). The MD-01 port
+# is owned by its AntennaActor, the Pico port by its SwitchDevice.
+camera_lock = TimedLock("camera")
 
-tracking_thread: Optional[threading.Thread] = None
-tracking_stop = threading.Event()
-
-# Pico coax switch wrapper instance (created after probe)
-switch: Optional[SerialSwitch] = None
-
-# MD-01 antenna wrapper instance
-ant: Optional[SerialAntenna] = None
+# MD-01 rotators and the Pico: see the "Devices" section
+# (rotator = registry "main", coax_switch = registry "coax")
 
 # -----------------------------------------------------------------------------
 # Constants: antenna / tracking / safety
 # -----------------------------------------------------------------------------
 
-# Parking position for the antenna
-PARKAZ = 40
-PARKEL = 60
-
-# Tracking parameters
-ELEVATION_MIN = 15          # deg — tracking allowed only above this (unless force=1)
-POS_TOL = 0.1               # deg — how close is “on target” for az & el
-DEAD_BAND = 0.1             # deg — ignore tiny corrections
-SEND_INTERVAL = 3.0         # s   — minimum time between corrections
-SLEW_TIMEOUT = 180          # s   — max time for initial / park slew
+# Parking position and tracking parameters: see devices.py
+# (PARKAZ, PARKEL, ELEVATION_MIN, POS_TOL, DEAD_BAND, SEND_INTERVAL,
+#  SLEW_TIMEOUT, TRACK_LEAD)
 
-# Mechanical azimuth limits
-AZ_LIMIT = 540              # total safe mechanical range ±540°
-CABLE_MARGIN = 30           # safety margin before wrap
-
-# Controller azimuth encoding parameters
-AZ_OFFSET_DEG = 0           # offset if your mount is shifted
-AZ_FLIP_180 = True          # quick flip by 180° if reference is inverted
+# Mechanical azimuth limits and controller encoding: see tracking.py
+# (AZ_LIMIT, CABLE_MARGIN, AZ_OFFSET_DEG, AZ_FLIP_180)
 
 # -----------------------------------------------------------------------------
 # Measurement live console (SSE)
@@ -112,7 +124,7 @@ AZ_FLIP_180 = True          # quick flip by 180° if reference is inverted
 MEAS_LOG_MAX = 3000
 meas_log = deque(maxlen=MEAS_LOG_MAX)  # keeps recent lines
 meas_stream = Queue()                  # pushes lines to connected browsers
-meas_lock = threading.Lock()
+meas_lock = TimedLock("meas")
 meas_running = False
 
 # -----------------------------------------------------------------------------
@@ -137,12 +149,13 @@ state: Dict[str, Any] = {
     "switches": {"S1": 0, "S2": 0, "S3": 0},
     "moon_next_above_15": None,
     "moon_next_below_15": None,
+    "tracking_stats": None,
+    "telemetry_period_s": None,
+    "link": None,
+    "switch_link": None,
+    "coax_timing": None,
 }
 
-# Continuous moon azimuth tracking state
-moon_cont_az: Optional[float] = None
-last_moon_az: Optional[float] = None
-
 # -----------------------------------------------------------------------------
 # Small helpers: status, auth, SSE printing
 # -----------------------------------------------------------------------------
@@ -156,7 +169,7 @@ def set_status(level: str, message: str) -> None:
     """
     state["status_level"] = level
     state["status"] = message
-    state["status_at"] = datetime.now(UTC).isoformat()
+    state["status_at"] = clock.now(UTC).isoformat()
 
 
 def api_action(fn):
@@ -211,7 +224,7 @@ def inject_auth_flags():
 
 def meas_print(line: str) -> None:
     """Append a line to measurement log + push to SSE listeners."""
-    ts = datetime.now().strftime("%H:%M:%S")
+    ts = clock.now().strftime("%H:%M:%S")
     msg = f"[{ts}] {line}".rstrip()
 
     with meas_lock:
@@ -223,133 +236,57 @@ def meas_print(line: str) -> None:
         pass
 
 
-def stop_tracking_worker() -> None:
-    """
-    Stop the background tracking thread (if running) and
-    mark state['tracking'] = False.
-    """
-    global tracking_thread
-
-    tracking_stop.set()
-
-    if tracking_thread and tracking_thread.is_alive():
-        try:
-            tracking_thread.join(timeout=1)
-        except Exception:
-            pass
-
-    tracking_thread = None
-    state["tracking"] = False
-
+def list_serial_ports() -> list:
+    """Serial ports for the port dropdowns (system ports + EXTRA_SERIAL_PORTS)."""
+    return port_registry.ports()
 
-# -----------------------------------------------------------------------------
-# Angle / coordinate helpers
-# -----------------------------------------------------------------------------
-
-def norm360(x: float) -> float:
-    """Normalize angle to [0, 360)."""
-    return x % 360
-
-
-def signed180(x: float) -> float:
-    """Wrap any angle to [-180, +180)."""
-    return ((x + 180) % 360) - 180
 
-
-def app_to_ctrl_continuous(app_deg: float) -> float:
-    """
-    Convert an angle in app coordinates to controller 'continuous' azimuth
-    (before wrapping/encoding).
+def port_roles() -> Dict[str, str]:
     """
-    val = app_deg - AZ_OFFSET_DEG
-    if AZ_FLIP_180:
-        val -= 180
-    return val
-
-def ctrl_to_app_continuous(ctrl_deg: float) -> float:
+    {port: role}, most reliable source winning: connected devices, then
+    the last discovery scan, then USB serial numbers in the discovery
+    cache, then the registry's VID/PID guess.
     """
-    Convert controller azimuth to app/sky azimuth (inverse of app_to_ctrl_continuous).
-    """
-    val = ctrl_deg
-    if AZ_FLIP_180:
-        val += 180
-    val += AZ_OFFSET_DEG
-    return val
-
-
-def ctrl_to_app_norm(ctrl_deg: float) -> float:
-    """Controller azimuth -> app/sky azimuth, normalized to [0, 360)."""
-    return norm360(ctrl_to_app_continuous(ctrl_deg))
-
-
-def encode_ctrl_az_from_continuous(app_cont_deg: float) -> float:
-    """
-    Take a continuous desired azimuth in app-space (can be negative or >360),
-    map to controller space, and encode as a single signed command in
-    [-180, +180].
-    """
-    ctrl_cont = app_to_ctrl_continuous(app_cont_deg)
-    cmd = signed180(ctrl_cont)
-
-    # Avoid -0.0 which some firmwares display oddly.
-    if abs(cmd) < 1e-6:
-        cmd = 0.0
-
-    return round(cmd, 1)
-
-
-def ang_err(target_deg: float, current_deg: float) -> float:
-    """Signed minimal angle error in degrees, in [-180, +180]."""
-    return ((target_deg - current_deg + 180) % 360) - 180
+    roles = port_registry.roles()
+    cache = port_discovery.cache
+    for info in port_registry.all():
+        if info.serial_number in cache:
+            roles[info.device] = cache[info.serial_number]
+    scan = port_discovery.last_scan
+    if scan:
+        roles.update({d: e["role"] for d, e in scan["ports"].items() if e["role"]})
+    roles.update(ports_in_use())
+    return roles
 
 
-def unwrap_azimuth(current: float, last: float) -> float:
+def port_context() -> Dict[str, Any]:
     """
-    Unwrap azimuth to produce a continuous angle, avoiding 0/360 jumps.
+    Template variables for the MD-01 / Pico port dropdowns: the ports,
+    their known roles (see port_roles) and the port to preselect.
     """
-    delta = current - last
-    if delta > 180:
-        delta -= 360
-    elif delta < -180:
-        delta += 360
-    return last + delta
-
-def unwrap_ctrl_az(current_az_deg: float, last_cont: float) -> float:
-    """
-    Unwrap controller-read azimuth into a continuous azimuth.
-    Uses normalized current angle, but produces a continuous result.
-    """
-    cur = norm360(current_az_deg)
-    last_norm = norm360(last_cont)
-    delta = cur - last_norm
-    if delta > 180:
-        delta -= 360
-    elif delta < -180:
-        delta += 360
-    return last_cont + delta
-
-def safe_azimuth(target_az: float, current_az: float) -> float:
-    """
-    Compute a cable-safe azimuth command.
+    ports = list_serial_ports()
+    roles = port_roles()
+    md01 = [p for p in ports if roles.get(p) == ROLE_MD01]
+    pico = [p for p in ports if roles.get(p) == ROLE_PICO]
+    return {
+        "ports": ports,
+        "port_roles": roles,
+        "preferred_md01": md01[0] if md01 else "COM5",
+        "preferred_pico": pico[0] if pico else "COM7",
+    }
 
-    - Keeps rotation within ±AZ_LIMIT range
-    - Chooses the shortest rotation
-    """
-    delta = target_az - (current_az % 360)
-    if delta > 180:
-        delta -= 360
-    elif delta < -180:
-        delta += 360
 
-    new_az = current_az + delta
+def remember_port(port: Optional[str], role: str) -> None:
+    """A device answered on `port`: cache its role by USB serial number."""
+    info = port_registry.info(port) if port else None
+    if info is not None:
+        port_discovery.remember(info.serial_number, role)
 
-    # Wrap protection
-    if new_az > AZ_LIMIT - CABLE_MARGIN:
-        new_az -= 360
-    elif new_az < -AZ_LIMIT + CABLE_MARGIN:
-        new_az += 360
 
-    return new_az
+def ports_in_use() -> Dict[str, str]:
+    """{port: role} of every connected device; discovery must not open these."""
+    return {d.port: (ROLE_MD01 if d.kind == RotatorDevice.kind else ROLE_PICO)
+            for d in registry.all() if d.port and d.connected}
 
 
 # -----------------------------------------------------------------------------
@@ -376,90 +313,25 @@ def ensure_camera_running() -> None:
 
 
 # -----------------------------------------------------------------------------
-# Antenna helpers
+# Devices
 # -----------------------------------------------------------------------------
 
-def wait_until_position(
-    target_az: float,
-    target_el: float,
-    timeout: float = SLEW_TIMEOUT,
-) -> bool:
-    """
-    Block until antenna reaches (target_az, target_el) within POS_TOL, or
-    until timeout.
-
-    Returns True if target reached, otherwise False.
-    """
-    global ant
-
-    t0 = time.time()
-    while time.time() - t0 < timeout and not tracking_stop.is_set():
-        if ant is None:
-            return False
-
-        with serial_lock:
-            az_ctrl, el = ant.read_md01_position()
-
-        az_app = ctrl_to_app_continuous(az_ctrl)
-
-        state["az"] = round(az, 1)
-        try:
-            state["az_cont"] = round(
-                unwrap_ctrl_az(az, float(state.get("az_cont", az))),
-                2,
-            )
-        except Exception:
-            state["az_cont"] = round(az, 2)
-        state["az_norm"] = round(state["az"] % 360, 1)
-        state["el"] = round(el, 1)
-
-        az_ok = abs(ang_err(target_az % 360, az_app % 360)) <= POS_TOL
-        el_ok = abs(target_el - el) <= POS_TOL
-
-        if az_ok and el_ok:
-            return True
-
-        time.sleep(0.5)
-
-    return False
-
-
-def wait_for_moon_above(min_el: float = ELEVATION_MIN, poll_s: float = 10) -> bool:
-    """
-    Block until Moon elevation is >= min_el, or tracking_stop is set.
-
-    Returns True if Moon reaches the minimum elevation, False if stopped first.
-    """
-    while not tracking_stop.is_set():
-        try:
-            azm, elm = CalcMoonPos.get_moon_position()
-            state["az_moon"] = round(azm, 1)
-            state["el_moon"] = round(elm, 1)
-            if elm >= min_el:
-                return True
-        except Exception:
-            pass
-        time.sleep(poll_s)
-    return False
-
-
-def go_to_parking() -> None:
-    """Command the antenna to park and wait until it reaches the parking position."""
-    global ant
-    if ant is None:
-        return
-
-    with serial_lock:
-        cmd_az = encode_ctrl_az_from_continuous(PARKAZ)
-        ant.send_rot2_set(ant.ser, cmd_az, PARKEL)
-
-    set_status("info", f"Parking: Az={PARKAZ}°, El={PARKEL}°")
-    reached = wait_until_position(PARKAZ, PARKEL, timeout=SLEW_TIMEOUT)
+# The MD-01 behind the single-antenna routes below. Its state namespace is
+# the global state and its telemetry feeds the position history; more
+# rotators and switch boxes are added at runtime through /devices/<id>/...
+rotator: RotatorDevice = registry.add(
+    RotatorDevice("main", moon, state=state, history=position_history)
+)
 
-    if reached:
-        set_status("info", "Parked and waiting for Moon to rise")
-    else:
-        set_status("warning", "Park slew timed out; holding position")
+# The Pico behind the /coax/... routes, also in the global state (under
+# switch_port / switch_connected / switch_link). Every relay reply it reads
+# refreshes the /coax/status cache.
+coax_switch: SwitchDevice = registry.add(SwitchDevice(
+    "coax",
+    state=state,
+    keys={"port": "switch_port", "connected": "switch_connected", "link": "switch_link"},
+    on_reply=lambda raw: _coax_cache_store(raw),
+))
 
 
 # -----------------------------------------------------------------------------
@@ -468,52 +340,17 @@ def go_to_parking() -> None:
 
 def poll_loop() -> None:
     """
-    Background loop that:
-
-    - Periodically reads antenna position (if connected)
-    - Keeps the global state angles up to date
-    - Continually updates Moon position and threshold crossing times
+    Background loop that continually updates Moon position and threshold
+    crossing times for all rotators. Antenna angles come from each
+    rotator's telemetry stream (see RotatorDevice.start_telemetry).
     """
-    global ant
-
-    fail_count = 0
-    last_good_cont: Optional[float] = None
-    MAX_JUMP_DEG = 60.0  # ignore single-sample az jumps bigger than this (noise/wrap glitch)
-
     while True:
-        if state["connected"] and ant:
-            try:
-                with serial_lock:
-                    az_ctrl, el = ant.read_md01_position()
-
-                az_app = ctrl_to_app_continuous(az_ctrl)
-
-                state["az"] = round(az_app, 1)
-                state["az_norm"] = round(norm360(az_app), 1)
-                state["el"] = round(el, 1)
-                fail_count = 0
-            except Exception as exc:  # noqa: BLE001
-                fail_count += 1
-                set_status("warning", f"Read error ({fail_count})")
-                if fail_count >= 3:
-                    try:
-                        with serial_lock:
-                            ant.close()
-                    except Exception:  # noqa: BLE001
-                        pass
-                    ant = None
-                    state["connected"] = False
-                    set_status("error", f"Connection lost: {exc}")
-                    fail_count = 0
-                time.sleep(2)
-        else:
-            time.sleep(1)
-
         # Always update Moon position + projected crossing times
         try:
-            azm, elm = CalcMoonPos.get_moon_position()
-            state["az_moon"] = round(azm, 1)
-            state["el_moon"] = round(elm, 1)
+            azm, elm = moon.position()
+            for dev in registry.all(RotatorDevice.kind):
+                dev.state["az_moon"] = round(azm, 1)
+                dev.state["el_moon"] = round(elm, 1)
 
             try:
                 next_up_iso, next_down_iso = CalcMoonPos.get_moon_threshold_times(
@@ -528,7 +365,7 @@ def poll_loop() -> None:
         except Exception:
             pass
 
-        time.sleep(1)
+        clock.sleep(1)
 
 
 # -----------------------------------------------------------------------------
@@ -543,8 +380,7 @@ def index():
     - Shows live data (status, az/el, moon, camera, coax state)
     - No controls
     """
-    ports = [p.device for p in serial.tools.list_ports.comports()]
-    return render_template("view.html", state=state, ports=ports)
+    return render_template("view.html", state=state, **port_context())
 
 
 @app.route("/control")
@@ -555,13 +391,11 @@ def control():
     - Requires login
     - Uses existing control UI (index.html)
     """
-    ports = [p.device for p in serial.tools.list_ports.comports()]
-
     if not is_authenticated():
         # Show login form, then come back here
         return render_template("login.html", error=None, next=url_for("control"))
 
-    return render_template("index.html", state=state, ports=ports)
+    return render_template("index.html", state=state, **port_context())
 
 
 @app.route("/status")
@@ -602,30 +436,20 @@ def logout():
 # Connect / disconnect MD-01 controller
 # -----------------------------------------------------------------------------
 
+def rotator_connect(port: str) -> Tuple[float, float]:
+    """Connect the main MD-01 on `port` (every connect path goes here)."""
+    az, el = rotator.connect(port)
+    remember_port(port, ROLE_MD01)
+    return az, el
+
+
 @app.route("/connect", methods=["POST"])
 @api_action
 @require_auth
 def connect():
     """Connect to the MD-01 controller on the selected serial port."""
-    global ant
-
     port = request.form.get("port")
-    ant = SerialAntenna(port)
-    if not ant.status():
-        raise RuntimeError("Port could not be opened")
-
-    with serial_lock:
-        az, el = ant.read_md01_position()
-
-    state.update(
-        {
-            "port": port,
-            "connected": True,
-            "az": round(az, 1),
-            "az_norm": round(az % 360, 1),
-            "el": round(el, 1),
-        }
-    )
+    az, el = rotator_connect(port)
     set_status("success", f"Connected with {port} (Az={az:.1f}°, El={el:.1f}°)")
     return jsonify(success=True, status=state["status"])
 
@@ -639,25 +463,8 @@ def connect_public():
     - Used by the data-only view (no login required)
     - Only opens the serial port and reads current position
     """
-    global ant
-
     port = request.form.get("port")
-    ant = SerialAntenna(port)
-    if not ant.status():
-        raise RuntimeError("Port could not be opened")
-
-    with serial_lock:
-        az, el = ant.read_md01_position()
-
-    state.update(
-        {
-            "port": port,
-            "connected": True,
-            "az": round(az, 1),
-            "az_norm": round(az % 360, 1),
-            "el": round(el, 1),
-        }
-    )
+    az, el = rotator_connect(port)
     set_status("success", f"[view] Connected with {port} (Az={az:.1f}°, El={el:.1f}°)")
     return jsonify(success=True, status=state["status"])
 
@@ -667,29 +474,7 @@ def connect_public():
 @api_action
 def disconnect():
     """Disconnect from the MD-01, park, and stop tracking."""
-    global ant, tracking_thread
-
-    tracking_stop.set()
-
-    if tracking_thread and tracking_thread.is_alive():
-        tracking_thread.join(timeout=1)
-
-    if ant:
-        with serial_lock:
-            safe_az_app = safe_azimuth(PARKAZ, state["az"])
-            cmd_az_ctrl = encode_ctrl_az_from_continuous(safe_az_app)
-            ant.send_rot2_set(ant.ser, cmd_az_ctrl, PARKEL)
-            ant.stopMovement()
-
-
-        time.sleep(0.3)
-        with serial_lock:
-            ant.close()
-
-        ant = None
-
-    state.update({"connected": False, "tracking": False, "az": 0.0, "el": 0.0})
-    set_status("info", "Not connected")
+    rotator.disconnect()
     return jsonify(success=True, status=state["status"])
 
 
@@ -702,37 +487,14 @@ def disconnect():
 @api_action
 def set_position():
     """Manually set antenna position (az, el)."""
-    global ant
-
     force = request.args.get("force", "0") == "1"
     az_req = float(request.form["az"])
     el_req = float(request.form["el"])
 
-    if (el_req <= ELEVATION_MIN) and not force:
-        set_status("warning", f"Elevation must be >= {ELEVATION_MIN}°")
-        return jsonify(success=False, status=state["status"]), 400
-
-    if not ant:
-        set_status("error", "Not connected")
+    try:
+        rotator.set_position(az_req, el_req, force=force)
+    except DeviceError:
         return jsonify(success=False, status=state["status"]), 400
-
-    cur_app = float(state.get("az_cont", state["az"]))
-    tgt_app = norm360(az_req)
-    cont_app = safe_azimuth(tgt_app, cur_app)
-    cmd_ctrl_az = encode_ctrl_az_from_continuous(cont_app)
-
-    with serial_lock:
-        ant.send_rot2_set(ant.ser, cmd_ctrl_az, el_req)
-
-    # Optimistic UI update (poll loop will refine).
-    state["az_norm"] = round(norm360(cont_app), 1)
-    state["az_cont"] = round(cont_app, 2)
-
-    delta = signed180(tgt_app - cur_app)
-    set_status(
-        "success",
-        f"Set to {tgt_app:.1f}° (Δ={delta:.1f}°) → cmd {cmd_ctrl_az:.1f}° / {el_req:.1f}°",
-    )
     return jsonify(success=True, status=state["status"])
 
 
@@ -747,178 +509,28 @@ def tracker():
     """
     Toggle Moon tracking.
 
-    - Starts background thread when enabling.
+    - Starts background thread when enabling (see RotatorDevice.start_tracking).
     - Stops tracking and motion when disabling.
+    - lead=0 commands the current Moon position instead of leading it.
     """
-    global ant, tracking_thread, moon_cont_az, last_moon_az
-
-    if not (state["connected"] and ant):
+    if not rotator.connected:
         set_status("error", "Controller not connected!")
         return jsonify(success=False, status=state["status"]), 400
 
     force = request.args.get("force", "0") == "1"
-    state["tracking"] = not state["tracking"]
+    use_lead = request.args.get("lead", "1" if TRACK_LEAD else "0") == "1"
 
-    if state["tracking"]:
-        # Kill any existing worker.
-        if tracking_thread and tracking_thread.is_alive():
-            tracking_stop.set()
-            try:
-                tracking_thread.join(timeout=1)
-            except Exception:
-                pass
-
-        tracking_stop.clear()
-
-        def _loop():
-            nonlocal force
-            global moon_cont_az, last_moon_az, ant
-
-            # Step 0: park and wait if Moon below minimum elevation (unless forced)
-            try:
-                azm, elm = CalcMoonPos.get_moon_position()
-                state["az_moon"] = round(azm, 1)
-                state["el_moon"] = round(elm, 1)
-            except Exception:
-                set_status("warning", "Could not compute Moon position; retrying…")
-                time.sleep(2)
-
-            if (state.get("el_moon", 0) < ELEVATION_MIN) and not force:
-                go_to_parking()
-                if not wait_for_moon_above():
-                    return
-                try:
-                    azm, elm = CalcMoonPos.get_moon_position()
-                    state["az_moon"] = round(azm, 1)
-                    state["el_moon"] = round(elm, 1)
-                except Exception:
-                    pass
-
-            # Step 1: initial slew
-            if last_moon_az is not None:
-                moon_cont_az = unwrap_azimuth(state["az_moon"], last_moon_az)
-            else:
-                moon_cont_az = state["az_moon"]
-            last_moon_az = state["az_moon"]
-
-            # use continuous az estimate for safe wrap handling
-            cur_cont = float(state.get("az_cont", state["az"]))
-            desired_az = safe_azimuth(moon_cont_az, cur_cont)
-            desired_el = state["el_moon"]
-
-            if ant is None:
-                return
-
-            with serial_lock:
-                cmd_az = encode_ctrl_az_from_continuous(desired_az)
-                ant.send_rot2_set(ant.ser, cmd_az, desired_el)
-
-            set_status("busy", f"Slewing to Moon: Az={desired_az:.1f}°, El={desired_el:.1f}°")
-
-            reached = wait_until_position(desired_az, desired_el, timeout=SLEW_TIMEOUT)
-            if not reached:
-                set_status("warning", "Initial slew timed out; entering tracking anyway")
-            else:
-                set_status("success", "On target — starting active tracking")
-
-            # Step 2: active tracking
-            last_send = 0.0
-            while not tracking_stop.is_set():
-                try:
-                    azm, elm = CalcMoonPos.get_moon_position()
-                    state["az_moon"] = round(azm, 1)
-                    state["el_moon"] = round(elm, 1)
-                except Exception as exc:  # noqa: BLE001
-                    set_status("warning", f"Moon calc error: {exc}")
-                    time.sleep(1)
-                    continue
-
-                if state["el_moon"] < ELEVATION_MIN and not force:
-                    go_to_parking()
-                    if not wait_for_moon_above():
-                        break
-                    last_moon_az = None
-                    continue
-
-                if last_moon_az is not None:
-                    moon_cont_az = unwrap_azimuth(state["az_moon"], last_moon_az)
-                else:
-                    moon_cont_az = state["az_moon"]
-                last_moon_az = state["az_moon"]
-
-                desired_az = safe_azimuth(moon_cont_az, state["az"])
-                desired_el = state["el_moon"]
-
-                if ant is None:
-                    break
-
-                with serial_lock:
-                    try:
-                        cur_az_ctrl, cur_el = ant.read_md01_position()
-                        cur_az_app = ctrl_to_app_continuous(cur_az_ctrl)
-                    except Exception as exc:  # noqa: BLE001
-                        set_status("error", f"Read error during tracking: {exc}")
-                        time.sleep(1)
-                        continue
-
-
-                state["az"] = round(cur_az_app, 1)
-                state["az_norm"] = round(norm360(cur_az_app), 1)
-                state["el"] = round(cur_el, 1)
-                # Update state with continuous unwrap (same logic as poll_loop)
-                try:
-                    prev = float(state.get("az_cont", cur_az))
-                    cont = unwrap_ctrl_az(float(cur_az), prev)
-                    # Filter tracking-loop glitches too
-                    if abs(cont - prev) <= 60.0:
-                        state["az_cont"] = round(cont, 2)
-                    state["az"] = round(float(state.get("az_cont", cur_az)), 1)
-                except Exception:
-                    state["az"] = round(cur_az, 1)
-                state["az_norm"] = round(norm360(state["az"]), 1)
-                state["el"] = round(cur_el, 1)
-
-
-
-                err_az = ang_err(desired_az % 360, cur_az_app % 360)
-                err_el = desired_el - cur_el
-
-                now = time.time()
-                if (
-                    (abs(err_az) > DEAD_BAND or abs(err_el) > DEAD_BAND)
-                    and (now - last_send >= SEND_INTERVAL)
-                ):
-                    with serial_lock:
-                        try:
-                            cmd_az = encode_ctrl_az_from_continuous(desired_az)
-                            ant.send_rot2_set(ant.ser, cmd_az, desired_el)
-                        except Exception as exc:  # noqa: BLE001
-                            set_status("error", f"Tracking error: {exc}")
-                            time.sleep(1)
-                            continue
-
-                    last_send = now
-                    set_status(
-                        "busy",
-                        (
-                            f"Tracking: Az→{desired_az:.1f}°, El→{desired_el:.1f}° "
-                            f"(ΔAz={err_az:.1f}°, ΔEl={err_el:.1f}°)"
-                        ),
-                    )
-
-                time.sleep(0.25)
-
-        tracking_thread = threading.Thread(target=_loop, daemon=True)
-        tracking_thread.start()
+    if not state["tracking"]:
+        rotator.start_tracking(force=force, lead=use_lead)
         return jsonify(success=True, tracking=True, status=state["status"])
 
     # STOP tracking branch
-    stop_tracking_worker()
+    rotator.stop_tracking()
 
     try:
-        if ant:
-            with serial_lock:
-                ant.stopMovement()
+        if rotator.ant:
+            rotator.ant.stop_movement()
+            rotator.kick_telemetry()
     except Exception:
         pass
 
@@ -930,6 +542,10 @@ def tracker():
 # Measurement: start + console write + SSE stream
 # -----------------------------------------------------------------------------
 
+# Flowgraph start -> coax to RX. The Pico switches on its own clock (ARM);
+# see coax_switch_at().
+RX_SWITCH_DELAY_S = 2.4
+
 @app.post("/measurement/start")
 @require_auth
 @api_action
@@ -987,12 +603,19 @@ def measurement_start():
             tb = testSpeci()
 
             tb.start()
-            meas_print("Flowgraph started. Sleeping 2.1s before switching to RX...")
-            time.sleep(2.4)
-
-            meas_print("Switching coax to RX preset...")
-            set_rx()
-            meas_print("Coax switched to RX.")
+            t_start = time.monotonic()
+            meas_print(
+                f"Flowgraph started. Switching coax to RX at T+{RX_SWITCH_DELAY_S:.3f}s..."
+            )
+            timing = coax_switch_at("rx", t_start + RX_SWITCH_DELAY_S)
+            if timing["state"] == "fired":
+                offsets = " ".join(f"{k}={v:+d}us" for k, v in sorted(timing["offsets_us"].items()))
+                meas_print(f"Coax switched to RX by the Pico (coil vs. target: {offsets}).")
+            else:
+                meas_print(
+                    f"Coax switched to RX by the host ({timing['late_us']:+d}us vs. target, "
+                    "firmware without ARM)."
+                )
 
             meas_print("Waiting for flowgraph to finish...")
             tb.wait()
@@ -1078,14 +701,7 @@ def coax_toggle_mode_internal():
 
     Returns: (success: bool, payload: dict)
     """
-    global switch
-
-    if not (
-        switch
-        and getattr(switch, "ser", None)
-        and switch.ser.is_open
-        and state.get("switch_connected")
-    ):
+    if not coax_switch.connected:
         # IMPORTANT: do not call set_status() here (thread context / request context)
         state["status"] = "Pico switch not connected"
         return False, {"status": state["status"]}
@@ -1106,27 +722,12 @@ def coax_toggle_mode_internal():
         else:
             current_mode = "rx"  # unknown/mixed -> next toggle goes to TX
 
-    if current_mode == "tx":
-        new_mode = "rx"
-        target = {"S1": "2", "S2": "1", "S3": "1"}
-        label = "RX"
-    else:
-        new_mode = "tx"
-        target = {"S1": "1", "S2": "2", "S3": "2"}
-        label = "TX"
-
-    all_resp = {}
-    with serial_lock:
-        for sid in (1, 2, 3):
-            side = target[f"S{sid}"]
-            resp = switch.set(sid, side)
-            if isinstance(resp, dict):
-                all_resp.update(resp)
-                sw = resp.get("switches")
-                if isinstance(sw, dict):
-                    switches.update(sw)
-
-    state["switches"] = switches
+    new_mode = "rx" if current_mode == "tx" else "tx"
+    label = new_mode.upper()
+    target = PRESETS[label]
+
+    switches = coax_switch.preset(label)
+
     state["coax_mode"] = new_mode
     state["status"] = f"Coax relays set to {label} preset"
 
@@ -1159,48 +760,13 @@ def coax_toggle_mode():
 # Coax preset helpers: force TX / RX (do NOT toggle)
 # -----------------------------------------------------------------------------
 
-def _require_pico_connected() -> None:
-    global switch
-    if not (
-        switch
-        and getattr(switch, "ser", None)
-        and switch.ser.is_open
-        and state.get("switch_connected")
-    ):
-        raise RuntimeError("Pico switch not connected")
-
-def _coax_apply_preset(target: dict[str, str], mode: str) -> dict[str, str]:
+def _coax_apply_preset(mode: str) -> dict[str, str]:
     """
-    Force all three relays to an explicit preset.
-    target example: {"S1":"1","S2":"2","S3":"2"}
+    Force all three relays to the TX / RX preset in one round trip
+    (SerialSwitch falls back to one SET per relay on older firmware).
     Returns updated switches dict.
     """
-    global switch
-
-    _require_pico_connected()
-
-    switches = state.get("switches") or {}
-    all_resp = {}
-
-    with serial_lock:
-        for sid in (1, 2, 3):
-            side = target[f"S{sid}"]
-            resp = switch.set(sid, side)
-
-            if isinstance(resp, dict):
-                all_resp.update(resp)
-                sw = resp.get("switches")
-                if isinstance(sw, dict):
-                    switches.update(sw)
-
-    # If your pico doesn't echo switches on SET, fall back to a STATUS poll:
-    if not (isinstance(switches, dict) and {"S1", "S2", "S3"} <= set(switches.keys())):
-        st = switch.status_parsed()
-        sw = st.get("switches") or {}
-        if isinstance(sw, dict):
-            switches.update(sw)
-
-    state["switches"] = switches
+    switches = coax_switch.preset(mode.upper())
     state["coax_mode"] = mode
     return switches
 
@@ -1208,7 +774,7 @@ def set_tx() -> dict[str, str]:
     """
     Force TX preset: S1=1, S2=2, S3=2
     """
-    sw = _coax_apply_preset({"S1": "1", "S2": "2", "S3": "2"}, mode="tx")
+    sw = _coax_apply_preset("tx")
     set_status("ok", "Coax forced to TX preset (S1=1, S2=2, S3=2)")
     return sw
 
@@ -1216,70 +782,89 @@ def set_rx() -> dict[str, str]:
     """
     Force RX preset: S1=2, S2=1, S3=1
     """
-    sw = _coax_apply_preset({"S1": "2", "S2": "1", "S3": "1"}, mode="rx")
+    sw = _coax_apply_preset("rx")
     set_status("ok", "Coax forced to RX preset (S1=2, S2=1, S3=1)")
     return sw
 
 
-def probe_pico_port(port: str, timeout: float = 1.0) -> dict:
+def coax_switch_at(mode: str, at: float) -> Dict[str, Any]:
     """
-    Open 'port', send STATUS, and verify we get a Pico-style reply:
-
-        STATE S1=1 S2=2 S3=1
-
-    Returns a switches dict like {"S1": "1", "S2": "1", "S3": "1"}
-    or raises RuntimeError if the port is not our Pico.
+    Apply preset `mode` ("tx" / "rx") at host time.monotonic() `at`, on the
+    Pico's own clock where the firmware supports it (see
+    SwitchDevice.switch_at). Returns the timing dict.
     """
-    ser = None
-    try:
-        ser = serial.Serial(port, baudrate=115200, timeout=0.3)
+    timing = coax_switch.switch_at(mode, at)
+    state["coax_mode"] = mode
+    state["coax_timing"] = timing
+    return timing
 
-        # Flush any garbage / boot messages
-        try:
-            ser.reset_input_buffer()
-            ser.reset_output_buffer()
-        except Exception:
-            pass
 
-        ser.write(b"STATUS\r\n")
-        ser.flush()
+# -----------------------------------------------------------------------------
+# Coax status cache: one STATUS reader instead of one per browser poll
+# -----------------------------------------------------------------------------
 
-        t0 = time.time()
-        switches: dict[str, str] = {}
+COAX_STATUS_REFRESH_S = 2.0     # s — background STATUS period
 
-        while time.time() - t0 < timeout:
-            line = ser.readline()
-            if not line:
-                continue
+# Last known switch state, served by /coax/status. Replaced as a whole, so
+# readers always see a consistent snapshot; "at" is time.monotonic().
+coax_cache: Dict[str, Any] = {
+    "connected": False, "state": "NO SWITCH", "switches": {}, "at": None,
+}
+_coax_refresh = threading.Event()   # set: read STATUS now
+
+
+def _coax_cache_store(raw: str) -> None:
+    """Publish a STATE / OK STATE reply (or an error / NO SWITCH text)."""
+    global coax_cache
+
+    raw = (raw or "").strip()
+    if raw.startswith("OK "):
+        raw = raw[3:]
+    switches = SerialSwitch.parse_state(raw)
+    connected = all(v in ("1", "2") for v in switches.values())
+    coax_cache = {
+        "connected": connected,
+        "state": raw,
+        "switches": switches if connected else {},
+        "at": time.monotonic(),
+    }
 
-            text = line.decode(errors="ignore").strip().upper()
 
-            # Ignore banners / unrelated output
-            if not text.startswith("STATE "):
-                continue
+def coax_read_status() -> None:
+    """Read STATUS from the Pico; the reply reaches the cache via on_reply."""
+    if not coax_switch.connected:
+        _coax_cache_store("RECONNECTING" if coax_switch.link.reconnecting else "NO SWITCH")
+        return
+    try:
+        coax_switch.refresh()
+    except Exception as exc:  # noqa: BLE001
+        _coax_cache_store(f"ERROR: {exc}")
 
-            # Expect: STATE S1=1 S2=2 S3=1
-            parts = text.split()
-            for part in parts[1:]:
-                if "=" not in part:
-                    continue
-                k, v = part.split("=", 1)
-                if k in ("S1", "S2", "S3") and v in ("1", "2"):
-                    switches[k] = v
 
-            if {"S1", "S2", "S3"} <= set(switches.keys()):
-                return switches
+def coax_status_loop() -> None:
+    """
+    Keep coax_cache at most COAX_STATUS_REFRESH_S old.
 
-            raise RuntimeError(f"Bad STATE line on {port!r}: {text!r}")
+    Replies to SET / PRESET refresh the cache as well, which postpones the
+    next STATUS; _coax_refresh.set() forces an immediate read.
+    """
+    while True:
+        at = coax_cache["at"]
+        delay = COAX_STATUS_REFRESH_S - (time.monotonic() - at) if at is not None else 0.0
+        if delay > 0 and not _coax_refresh.wait(delay):
+            continue
+        _coax_refresh.clear()
+        try:
+            coax_read_status()
+        except Exception:  # noqa: BLE001
+            time.sleep(COAX_STATUS_REFRESH_S)
 
-        raise RuntimeError(f"No STATE reply within timeout on {port!r}")
 
-    finally:
-        if ser is not None:
-            try:
-                ser.close()
-            except Exception:
-                pass
+def coax_open(port: str) -> None:
+    """Connect the main Pico on `port` (every connect path goes here)."""
+    coax_switch.connect(port)
+    remember_port(port, ROLE_PICO)
+    _coax_refresh.set()
 
 
 @app.route("/coax/connect", methods=["POST"])
@@ -1287,93 +872,49 @@ def probe_pico_port(port: str, timeout: float = 1.0) -> dict:
 def coax_connect():
     """
     Manually connect to the Pico coax switch on the selected serial port.
-
     - Probes the port for Pico firmware (STATUS -> STATE ...)
-    - Only on success creates SerialSwitch and marks as connected
+    - Only on success opens the switch and marks it as connected
     """
-    global switch
-
     port = request.form.get("port")
     if not port:
         set_status("error", "No switch COM port selected")
         return jsonify(success=False, status=state["status"]), 400
 
     try:
-        switches_dict = probe_pico_port(port)
-
-        with serial_lock:
-            sw = SerialSwitch(port)
-        switch = sw
-
-        state["switch_port"] = port
-        state["switch_connected"] = True
-        state["switches"] = switches_dict
-
-        set_status("success", f"Pico switch connected on {port}")
-        return jsonify(success=True, status=state["status"])
-
+        coax_open(port)
     except Exception as exc:
-        switch = None
-        state["switch_port"] = None
-        state["switch_connected"] = False
         set_status("error", f"Failed to connect Pico switch on {port}: {exc}")
         return jsonify(success=False, status=state["status"]), 500
 
+    return jsonify(success=True, status=state["status"])
+
 
 @app.route("/coax/connect_public", methods=["POST"])
 @api_action
 def coax_connect_public():
     """Public connect for the Pico coax switch (no login)."""
-    global switch
-
     port = request.form.get("port")
     if not port:
         set_status("error", "No switch COM port selected")
         return jsonify(success=False, status=state["status"]), 400
 
     try:
-        switches_dict = probe_pico_port(port)
-
-        with serial_lock:
-            sw = SerialSwitch(port)
-        switch = sw
-
-        state["switch_port"] = port
-        state["switch_connected"] = True
-        state["switches"] = switches_dict
-
-        set_status("success", f"[view] Pico switch connected on {port}")
-        return jsonify(success=True, status=state["status"])
-
+        coax_open(port)
     except Exception as exc:
-        switch = None
-        state["switch_port"] = None
-        state["switch_connected"] = False
         set_status("error", f"[view] Failed to connect Pico switch on {port}: {exc}")
         return jsonify(success=False, status=state["status"]), 500
 
+    set_status("success", f"[view] Pico switch connected on {port}")
+    return jsonify(success=True, status=state["status"])
+
 
 @app.route("/coax/disconnect", methods=["POST"])
 @require_auth
 @api_action
 def coax_disconnect():
     """Disconnect from the Pico coax switch."""
-    global switch
-
-    if switch is not None:
-        try:
-            with serial_lock:
-                if getattr(switch, "ser", None):
-                    switch.ser.close()
-        except Exception:
-            pass
-        switch = None
-
-    state["switch_port"] = None
-    state["switch_connected"] = False
-    state["switches"] = {"S1": 0, "S2": 0, "S3": 0}
-
-    set_status("info", "Pico switch disconnected")
+    coax_switch.disconnect()
+    _coax_cache_store("NO SWITCH")
     return jsonify(success=True, status=state["status"])
 
 
@@ -1382,28 +923,15 @@ def coax_disconnect():
 @api_action
 def coax_set(sid: int, side: str):
     """Set a specific coax switch (S1..S3) to side '1' or '2'."""
-    global switch
-
     side = str(side).strip()
     if sid not in (1, 2, 3) or side not in ("1", "2"):
         return jsonify(success=False, error="Invalid command"), 400
 
-    if not (
-        switch
-        and getattr(switch, "ser", None)
-        and switch.ser.is_open
-        and state.get("switch_connected")
-    ):
+    if not coax_switch.connected:
         set_status("error", "Pico switch not connected")
         return jsonify(success=False, status=state["status"]), 500
 
-    with serial_lock:
-        resp = switch.set(sid, side)
-
-    sw = resp.get("switches") if isinstance(resp, dict) else None
-    if isinstance(sw, dict):
-        state["switches"].update(sw)
-
+    resp = coax_switch.set(sid, side)
     return jsonify(success=True, state=resp, status="Coax command sent")
 
 
@@ -1411,39 +939,22 @@ def coax_set(sid: int, side: str):
 @api_action
 def coax_status():
     """
-    Status endpoint for coax switch.
+    Status endpoint for coax switch, served from coax_cache.
 
-    - Does not try to auto-connect.
-    - Says connected=True ONLY if we have an open switch and can read STATUS.
+    - Does not try to auto-connect and never touches the serial port, so
+      any number of viewers cost one STATUS per COAX_STATUS_REFRESH_S.
+    - connected=True only if the last read returned a valid STATE.
+    - age_s: seconds since that read (None before the first one).
     """
-    global switch
-
-    if not (switch and getattr(switch, "ser", None) and switch.ser.is_open):
-        return jsonify(success=True, connected=False, state="NO SWITCH", switches={}), 200
-
-    switches = {}
-    state_str = ""
-    connected = False
-
-    try:
-        with serial_lock:
-            st = switch.status_parsed()
-
-        state_str = (st.get("raw") or "").strip()
-        sw = st.get("switches") or {}
-
-        if isinstance(sw, dict) and {"S1", "S2", "S3"} <= set(sw.keys()):
-            switches = sw
-            connected = True
-        else:
-            connected = False
-
-    except Exception as exc:  # noqa: BLE001
-        state_str = f"ERROR: {exc}"
-        switches = {}
-        connected = False
-
-    return jsonify(success=True, connected=connected, state=state_str, switches=switches), 200
+    cache = coax_cache
+    at = cache["at"]
+    return jsonify(
+        success=True,
+        connected=cache["connected"],
+        state=cache["state"],
+        switches=cache["switches"],
+        age_s=round(time.monotonic() - at, 2) if at is not None else None,
+    ), 200
 
 
 # -----------------------------------------------------------------------------
@@ -1458,8 +969,82 @@ def data_page():
     - Umlaufbahn (orbit-style) Moon plot
     - EME measurement history (distance, SNR, etc.)
     """
-    ports = [p.device for p in serial.tools.list_ports.comports()]
-    return render_template("data.html", state=state, ports=ports)
+    return render_template("data.html", state=state, **port_context())
+
+
+@app.route("/api/ports")
+def api_ports():
+    """
+    Cached serial ports with USB descriptors and role guess.
+
+    Query args:
+      refresh : 1 = enumerate now instead of serving the cache
+    """
+    if request.args.get("refresh") == "1":
+        port_registry.refresh()
+    return jsonify(
+        ports=[p.as_dict() for p in port_registry.all()],
+        hotplug=port_registry.hotplug,
+        refreshes=port_registry.refreshes,
+    )
+
+
+@app.route("/metrics/serial")
+def metrics_serial():
+    """
+    Latency histograms of serial transactions and lock waits (see serialMetrics.py).
+
+    Per operation: count, errors, mean/p50/p95/max/min/last in ms.
+      pico.<CMD>           Pico command round trip (STATUS, SET, PRESET, ...)
+      md01.read/set/stop   MD-01 serial transaction
+      md01.actor.*         the same as seen by callers, incl. the queue wait
+      lock.<name>.wait     time to acquire an app lock (errors = not acquired)
+      lock.<name>.hold     time the lock was held
+
+    Query args:
+      reset : 1 = clear all histograms after this snapshot (login required)
+    """
+    snapshot = {
+        "since": datetime.fromtimestamp(metrics.since, UTC).isoformat(),
+        "operations": metrics.snapshot(),
+    }
+    if request.args.get("reset") == "1":
+        if not is_authenticated():
+            return jsonify(success=False, status="Authentication required"), 403
+        metrics.reset()
+    return jsonify(success=True, **snapshot)
+
+
+@app.route("/ports/discover", methods=["POST"])
+@api_action
+def ports_discover():
+    """
+    Find the Pico and the MD-01 by probing all free ports in parallel.
+
+    Query args:
+      rescan  : 1 = probe again even if the USB serial number is known
+      connect : 1 = also connect the MD-01 / Pico that are not connected yet
+                (login required)
+    """
+    do_connect = request.args.get("connect") == "1"
+    if do_connect and not is_authenticated():
+        return jsonify(success=False, status="Authentication required"), 403
+
+    scan = port_discovery.scan(in_use=ports_in_use(),
+                               use_cache=request.args.get("rescan") != "1")
+    md01, pico = scan[ROLE_MD01], scan[ROLE_PICO]
+    set_status("info", f"Discovery: MD-01 {md01 or '—'}, Pico {pico or '—'} "
+                       f"({scan['elapsed_s']:.1f} s)")
+
+    if do_connect:
+        if md01 and not rotator.connected:
+            port = md01[0]
+            az, el = rotator_connect(port)
+            set_status("success", f"Connected with {port} (Az={az:.1f}°, El={el:.1f}°)")
+        if pico and not coax_switch.connected:
+            coax_open(pico[0])
+
+    return jsonify(success=True, status=state["status"], **scan)
 
 
 @app.route("/api/measurements")
@@ -1468,6 +1053,53 @@ def api_measurements():
     return jsonify(measurements=measurements, count=len(measurements))
 
 
+@app.route("/api/position/history")
+def api_position_history():
+    """
+    Antenna/Moon position history from the ring buffer.
+
+    Query parameters:
+    - since: Unix timestamp, only rows newer than this (default: all)
+    - decimate: return every n-th row (default 1)
+    - format: 'json' (default) or 'f32' for a binary Float32 payload
+    """
+    since = request.args.get("since", type=float)
+    decimate = max(1, request.args.get("decimate", default=1, type=int))
+    rows = position_history.query(since=since, decimate=decimate)
+
+    if request.args.get("format", "json") == "f32":
+        return Response(to_binary(rows), mimetype=BINARY_MIMETYPE)
+    return jsonify(to_json(rows))
+
+
+@app.route("/api/passes")
+@api_action
+def api_passes():
+    """
+    Upcoming EME passes (Moon above the elevation limit).
+
+    Query args:
+      days   : planning horizon in days (default 7, max 31)
+      min_el : elevation limit in degrees (default ELEVATION_MIN)
+
+    The plan is cached; only the first call (or a longer horizon / new
+    limit) computes ephemerides.
+    """
+    try:
+        days = float(request.args.get("days", 7))
+        min_el = float(request.args.get("min_el", ELEVATION_MIN))
+    except ValueError:
+        return jsonify(success=False, status="days and min_el must be numbers"), 400
+    if not math.isfinite(days) or days <= 0:
+        return jsonify(success=False, status="days must be a number > 0"), 400
+    if not math.isfinite(min_el) or not -90.0 <= min_el <= 90.0:
+        return jsonify(success=False, status="min_el must be between -90 and 90"), 400
+    days = min(days, 31.0)
+
+    passes = pass_planner.plan(days=days, min_el_deg=min_el)
+    return jsonify(passes=passes, count=len(passes), days=days, min_el=min_el)
+
+
 # -----------------------------------------------------------------------------
 # Stop / park
 # -----------------------------------------------------------------------------
@@ -1479,20 +1111,13 @@ def stop():
     """
     Immediate stop of movement AND stop tracking thread.
     Does NOT park – it just freezes everything where it is.
+    While the link is down this still cancels the tracking resume.
     """
-    global ant
-
-    if not ant:
-        set_status("error", "Controller not connected!")
-        return jsonify(success=False, status=state["status"]), 400
-
-    stop_tracking_worker()
-
     try:
-        with serial_lock:
-            ant.stopMovement()
-        set_status("info", "Movement & tracking stopped")
+        rotator.stop()
         return jsonify(success=True, status=state["status"])
+    except DeviceError:
+        return jsonify(success=False, status=state["status"]), 400
     except Exception as exc:  # noqa: BLE001
         set_status("error", f"Error while stopping: {exc}")
         return jsonify(success=False, status=state["status"])
@@ -1503,26 +1128,180 @@ def stop():
 @api_action
 def park():
     """Send antenna to park position."""
-    global ant
-
-    if not ant:
+    if not rotator.connected:
         set_status("error", "Controller not connected!")
         return jsonify(success=False, status=state["status"]), 400
 
     try:
-        with serial_lock:
-            safe_az_app = safe_azimuth(PARKAZ, state["az"])          # app/sky
-            cmd_az_ctrl = encode_ctrl_az_from_continuous(safe_az_app) # controller cmd
-            ant.send_rot2_set(ant.ser, cmd_az_ctrl, PARKEL)
-            ant.stopMovement()
-
-        set_status("info", "Parkposition set")
+        rotator.park()
         return jsonify(success=True, status=state["status"])
     except Exception as exc:  # noqa: BLE001
         set_status("error", f"Error while parking: {exc}")
         return jsonify(success=False, status=state["status"])
 
 
+# -----------------------------------------------------------------------------
+# Device registry: more rotators / switch boxes (see devices.py)
+# -----------------------------------------------------------------------------
+
+def device_action(kind: Optional[str] = None):
+    """
+    Decorator for /devices/<device_id>/... routes.
+
+    - Looks the device up (404 if unknown or of another kind)
+    - DeviceError -> 400, other exceptions -> 500, reported in the device's
+      own status instead of the global one
+    """
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(device_id: str, *args, **kwargs):
+            try:
+                dev = registry.get(device_id, kind)
+            except KeyError:
+                return jsonify(success=False, status=f"Unknown device {device_id!r}"), 404
+            try:
+                return fn(dev, *args, **kwargs)
+            except DeviceError:
+                return jsonify(success=False, status=dev.state["status"]), 400
+            except Exception as exc:  # noqa: BLE001
+                dev.set_status("error", f"{type(exc).__name__}: {exc}")
+                return jsonify(success=False, status=dev.state["status"]), 500
+        return wrapper
+    return decorate
+
+
+@app.route("/devices")
+def devices_list():
+    """All registered devices with their connection state."""
+    return jsonify(devices=registry.summary())
+
+
+@app.route("/devices/<device_id>/connect", methods=["POST"])
+@require_auth
+@api_action
+def device_connect(device_id: str):
+    """
+    Connect a device, registering it on first use.
+
+    Form fields: port, kind ('rotator' | 'switch', default 'rotator').
+    """
+    port = request.form.get("port")
+    kind = request.form.get("kind", RotatorDevice.kind)
+    if not port:
+        return jsonify(success=False, status="No serial port selected"), 400
+
+    try:
+        dev = registry.create(device_id, kind)
+    except DeviceError as exc:
+        return jsonify(success=False, status=str(exc)), 400
+
+    try:
+        if dev.kind == RotatorDevice.kind:
+            az, el = dev.connect(port)
+            dev.set_status("success", f"Connected with {port} (Az={az:.1f}°, El={el:.1f}°)")
+        else:
+            dev.connect(port)
+    except Exception as exc:  # noqa: BLE001
+        dev.set_status("error", f"Failed to connect {device_id} on {port}: {exc}")
+        return jsonify(success=False, status=dev.state["status"]), 500
+    return jsonify(success=True, status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>", methods=["DELETE"])
+@require_auth
+@device_action()
+def device_remove(dev):
+    """Disconnect and unregister a device (the main rotator and Pico stay registered)."""
+    if dev is rotator or dev is coax_switch:
+        return jsonify(success=False, status=f"The main device {dev.id!r} cannot be removed"), 400
+    dev.disconnect()
+    registry.remove(dev.id)
+    return jsonify(success=True, status=f"Device {dev.id} removed")
+
+
+@app.route("/devices/<device_id>/status")
+@device_action()
+def device_status(dev):
+    """State namespace of one device."""
+    return jsonify(dev.status())
+
+
+@app.route("/devices/<device_id>/disconnect", methods=["POST"])
+@require_auth
+@device_action()
+def device_disconnect(dev):
+    dev.disconnect()
+    return jsonify(success=True, status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>/set", methods=["POST"])
+@require_auth
+@device_action(RotatorDevice.kind)
+def device_set(dev):
+    """Manually set a rotator position (az, el; ?force=1 below ELEVATION_MIN)."""
+    force = request.args.get("force", "0") == "1"
+    dev.set_position(float(request.form["az"]), float(request.form["el"]), force=force)
+    return jsonify(success=True, status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>/tracker", methods=["POST"])
+@require_auth
+@device_action(RotatorDevice.kind)
+def device_tracker(dev):
+    """Toggle Moon tracking of a rotator (same arguments as /tracker)."""
+    if not dev.state["tracking"]:
+        dev.start_tracking(
+            force=request.args.get("force", "0") == "1",
+            lead=request.args.get("lead", "1" if TRACK_LEAD else "0") == "1",
+        )
+        return jsonify(success=True, tracking=True, status=dev.state["status"])
+
+    dev.stop()
+    return jsonify(success=True, tracking=False, status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>/stop", methods=["POST"])
+@require_auth
+@device_action(RotatorDevice.kind)
+def device_stop(dev):
+    dev.stop()
+    return jsonify(success=True, status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>/park", methods=["POST"])
+@require_auth
+@device_action(RotatorDevice.kind)
+def device_park(dev):
+    dev.park()
+    return jsonify(success=True, status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>/switch/<int:sid>/<side>", methods=["POST"])
+@require_auth
+@device_action(SwitchDevice.kind)
+def device_switch_set(dev, sid: int, side: str):
+    """Set relay S<sid> of a switch box to side '1' or '2'."""
+    side = str(side).strip()
+    if sid not in (1, 2, 3) or side not in ("1", "2"):
+        return jsonify(success=False, error="Invalid command"), 400
+
+    reply = dev.set(sid, side)
+    return jsonify(success=True, state=reply, switches=dev.state["switches"],
+                   status=dev.state["status"])
+
+
+@app.route("/devices/<device_id>/preset/<name>", methods=["POST"])
+@require_auth
+@device_action(SwitchDevice.kind)
+def device_switch_preset(dev, name: str):
+    """Apply the TX or RX preset of a switch box."""
+    if name.upper() not in PRESETS:
+        return jsonify(success=False, error="Invalid preset"), 400
+
+    switches = dev.preset(name)
+    return jsonify(success=True, switches=switches, status=dev.state["status"])
+
+
 # -----------------------------------------------------------------------------
 # Camera routes
 # -----------------------------------------------------------------------------
@@ -1572,13 +1351,16 @@ _poll_lock = threading.Lock()
 
 def start_background_threads() -> None:
     """
-    Ensure the antenna / Moon poll loop is running,
-    even if the app is started via `flask run` or gunicorn.
+    Ensure the antenna / Moon poll loop, the coax status reader and the port
+    registry refresh are running, even if the app is started via `flask run`
+    or gunicorn.
     """
     global _poll_started
     with _poll_lock:
         if not _poll_started:
             threading.Thread(target=poll_loop, daemon=True).start()
+            threading.Thread(target=coax_status_loop, daemon=True).start()
+            port_registry.start()
             _poll_started = True
 
 
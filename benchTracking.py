@@ -0,0 +1,225 @@
+"""
+Tracking-loop benchmark.
+
+Runs the tracker's control logic (PositionTelemetry filtering +
+TrackingController) against a simulated MD-01 rotator and a time-warped
+Moon pass, and reports for every combination of SEND_INTERVAL, DEAD_BAND
+and poll period:
+
+    - RMS / max pointing error (deg, az scaled by cos(el))
+    - number of SET commands and serial bytes exchanged
+    - CPU time per loop iteration
+    - loop jitter (only with --warp, when the loop is paced in real time)
+
+Examples:
+    python benchTracking.py
+    python benchTracking.py --send-interval 1 3 5 --dead-band 0.05 0.1 0.2
+    python benchTracking.py --hours 2 --warp 500 --lead off
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import CalcMoonPos
+from telemetry import PositionTelemetry
+from tracking import (
+    PassTrajectory,
+    TrackingController,
+    app_to_ctrl_continuous,
+    encode_ctrl_az_from_continuous,
+)
+
+# Serial traffic per transaction (SPID Rot2)
+ROT2_CMD_BYTES = 13
+ROT2_REPLY_BYTES = 12
+
+# Simulated rotator defaults (see emulator.Md01Emulator for the live version)
+SIM_AZ_RATE = 3.0           # deg/s
+SIM_EL_RATE = 2.0           # deg/s
+SIM_LATENCY = 0.5           # s   — SET -> motion start
+SIM_RESOLUTION = 0.1        # deg — controller readout step
+
+MIN_EL = 15.0               # deg — pass limits
+
+
+class SimRotator:
+    """Rotator with constant slew rates and command latency, in simulated time."""
+
+    def __init__(self, az: float, el: float, az_rate: float = SIM_AZ_RATE,
+                 el_rate: float = SIM_EL_RATE, latency: float = SIM_LATENCY,
+                 resolution: float = SIM_RESOLUTION) -> None:
+        self.az = az
+        self.el = el
+        self.az_rate = az_rate
+        self.el_rate = el_rate
+        self.latency = latency
+        self.resolution = resolution
+        self._target = (az, el)
+        self._move_at = 0.0
+        self._t = 0.0
+
+    def advance(self, t: float) -> None:
+        dt = max(0.0, t - max(self._t, self._move_at))
+        self._t = t
+        if dt == 0.0:
+            return
+        for attr, tgt, rate in (("az", self._target[0], self.az_rate),
+                                ("el", self._target[1], self.el_rate)):
+            cur = getattr(self, attr)
+            d = tgt - cur
+            s = rate * dt
+            setattr(self, attr, tgt if abs(d) <= s else cur + (s if d > 0 else -s))
+
+    def set(self, t: float, az: float, el: float) -> None:
+        self.advance(t)
+        self._target = (az, el)
+        self._move_at = t + self.latency
+
+    def read(self, t: float) -> tuple:
+        self.advance(t)
+        q = self.resolution
+        return round(self.az / q) * q, round(self.el / q) * q
+
+
+def find_pass(min_el: float = MIN_EL, now: Optional[float] = None,
+              search_s: float = 2 * 86400.0) -> tuple:
+    """(start, end) Unix times of the current or next pass above min_el."""
+    now = time.time() if now is None else now
+    t = now + 60.0 * np.arange(int(search_s / 60.0))
+    _, el, _ = CalcMoonPos.get_moon_track(t)
+    up = np.flatnonzero(el >= min_el)
+    if not len(up):
+        raise SystemExit(f"No pass above {min_el}° in the next {search_s / 3600:.0f} h")
+    first = up[0]
+    below = np.flatnonzero(el[first:] < min_el)
+    last = first + below[0] - 1 if len(below) else len(t) - 1
+    return float(t[first]), float(t[last])
+
+
+def run(traj: PassTrajectory, send_interval: float, dead_band: float,
+        poll_s: float, lead: bool, warp: float = 0.0,
+        rotator_kw: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Track one precomputed pass and return the metrics."""
+    az0, el0 = traj.at(traj.t0)
+    rot = SimRotator(app_to_ctrl_continuous(az0), el0, **(rotator_kw or {}))
+    tm = PositionTelemetry(read_fn=None, az_cont=az0)
+    ctl = TrackingController(send_interval, dead_band, lead=lead)
+
+    serial_bytes = 0
+    iterations = 0
+    cpu = 0.0
+    intervals: List[float] = []
+
+    t = traj.t0
+    wall_next = time.perf_counter()
+    wall_last = None
+    while t <= traj.t_end:
+        if warp > 0:
+            wall_next += poll_s / warp
+            delay = wall_next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            wall = time.perf_counter()
+            if wall_last is not None:
+                intervals.append(wall - wall_last)
+            wall_last = wall
+
+        az_ctrl, el = rot.read(t)
+        serial_bytes += ROT2_CMD_BYTES + ROT2_REPLY_BYTES
+
+        c0 = time.process_time()
+        sample = tm.publish(t, az_ctrl, el)
+        command = ctl.step(traj, t, sample.t, sample.az, sample.el)
+        if command is not None:
+            cmd_az = encode_ctrl_az_from_continuous(command[0])
+            ctl.sent(t, sample.az, sample.el)
+        cpu += time.process_time() - c0
+
+        if command is not None:
+            rot.set(t, cmd_az, command[1])
+            serial_bytes += ROT2_CMD_BYTES
+
+        iterations += 1
+        t += poll_s
+
+    result = {
+        "send_interval_s": send_interval,
+        "dead_band_deg": dead_band,
+        "poll_s": poll_s,
+        "lead": lead,
+        "pass_h": round((traj.t_end - traj.t0) / 3600, 2),
+        **ctl.stats.as_dict(),
+        "serial_bytes": serial_bytes,
+        "iterations": iterations,
+        "cpu_us_per_iter": round(1e6 * cpu / max(iterations, 1), 1),
+        "jitter_ms": None,
+        "jitter_max_ms": None,
+    }
+    if intervals:
+        dev = (np.array(intervals) - poll_s / warp) * 1e3
+        result["jitter_ms"] = round(float(np.std(dev)), 3)
+        result["jitter_max_ms"] = round(float(np.max(np.abs(dev))), 3)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the Moon tracking loop")
+    parser.add_argument("--send-interval", type=float, nargs="+", default=[3.0])
+    parser.add_argument("--dead-band", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--poll", type=float, nargs="+", default=[0.5])
+    parser.add_argument("--lead", choices=("on", "off", "both"), default="both")
+    parser.add_argument("--hours", type=float, default=None,
+                        help="only track the first N hours of the pass")
+    parser.add_argument("--warp", type=float, default=0.0,
+                        help="pace the loop at N x real time (0: free run, no jitter)")
+    parser.add_argument("--min-el", type=float, default=MIN_EL)
+    parser.add_argument("--az-rate", type=float, default=SIM_AZ_RATE)
+    parser.add_argument("--el-rate", type=float, default=SIM_EL_RATE)
+    parser.add_argument("--latency", type=float, default=SIM_LATENCY)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    start, end = find_pass(args.min_el)
+    if args.hours is not None:
+        end = min(end, start + args.hours * 3600)
+    traj = PassTrajectory.build(start, 180.0, min_el=args.min_el, max_s=end - start)
+    if traj is None:
+        raise SystemExit("Moon not above the limit in the selected window")
+
+    leads = {"on": [True], "off": [False], "both": [False, True]}[args.lead]
+    rotator_kw = {"az_rate": args.az_rate, "el_rate": args.el_rate, "latency": args.latency}
+
+    results = []
+    for send_interval, dead_band, poll_s, lead in itertools.product(
+        args.send_interval, args.dead_band, args.poll, leads
+    ):
+        results.append(run(traj, send_interval, dead_band, poll_s, lead,
+                           warp=args.warp, rotator_kw=rotator_kw))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"Pass {datetime.fromtimestamp(traj.t0, tz=timezone.utc):%Y-%m-%d %H:%M} UTC, "
+          f"{(traj.t_end - traj.t0) / 3600:.1f} h")
+    header = (f"{'send':>5} {'band':>5} {'poll':>5} {'lead':>5} {'rms°':>7} {'max°':>7} "
+              f"{'cmds':>6} {'bytes':>8} {'cpu µs':>7} {'jit ms':>7}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        jitter = "-" if r["jitter_ms"] is None else f"{r['jitter_ms']:.2f}"
+        print(f"{r['send_interval_s']:5.1f} {r['dead_band_deg']:5.2f} {r['poll_s']:5.2f} "
+              f"{'on' if r['lead'] else 'off':>5} {r['rms_deg']:7.4f} {r['max_deg']:7.4f} "
+              f"{r['commands']:6d} {r['serial_bytes']:8d} {r['cpu_us_per_iter']:7.1f} {jitter:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Injectable clock.
+
+Code that deals with Moon time, tracking, parking and waiting calls this
+module instead of time / datetime directly:
+
+    import clock
+    clock.time()            # Unix timestamp
+    clock.sleep(10)
+    clock.now(UTC)          # datetime
+    clock.wait(event, 5)    # Event.wait() on clock time
+    clock.to_real(5)        # clock seconds -> wall seconds (for Condition waits)
+
+By default this is the real clock. For simulations install a SimClock:
+
+    clock.set_clock(clock.SimClock(warp=600))   # 10 min of clock time per second
+
+With warp=0 the simulated time only moves through advance(), which wakes
+every sleeper whose deadline has passed. Ephemeris dates are derived from
+clock.time() (see CalcMoonPos.unix_to_ephem), so the Moon follows the clock.
+
+Serial timeouts and other hardware timing stay on the wall clock.
+"""
+
+from __future__ import annotations
+
+import threading
+import time as _time
+from datetime import datetime, tzinfo
+from typing import Optional
+
+SIM_POLL_S = 0.01           # wall-clock re-check interval while waiting on a SimClock
+
+
+class RealClock:
+    """Wall clock; a thin wrapper around time / datetime."""
+
+    warp = 1.0
+
+    def time(self) -> float:
+        return _time.time()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            _time.sleep(seconds)
+
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        return datetime.now(tz)
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        return event.wait(timeout)
+
+    def to_real(self, seconds: Optional[float]) -> Optional[float]:
+        return seconds
+
+
+class SimClock:
+    """
+    Simulated clock running `warp` times faster than the wall clock.
+
+    start : Unix time the simulation starts at (default: now)
+    warp  : speed-up factor; 0 freezes time except for advance()
+    """
+
+    def __init__(self, start: Optional[float] = None, warp: float = 0.0) -> None:
+        self.warp = float(warp)
+        self._base = _time.time() if start is None else float(start)
+        self._real0 = _time.perf_counter()
+        self._offset = 0.0
+        self._cv = threading.Condition()
+
+    def time(self) -> float:
+        elapsed = (_time.perf_counter() - self._real0) * self.warp
+        return self._base + elapsed + self._offset
+
+    def advance(self, seconds: float) -> None:
+        """Jump forward and wake all sleepers."""
+        with self._cv:
+            self._offset += seconds
+            self._cv.notify_all()
+
+    def to_real(self, seconds: Optional[float]) -> Optional[float]:
+        """Wall-clock time for `seconds` of clock time (None: forever)."""
+        if seconds is None:
+            return None
+        if self.warp <= 0:
+            return SIM_POLL_S
+        return max(0.0, seconds / self.warp)
+
+    def sleep(self, seconds: float) -> None:
+        deadline = self.time() + seconds
+        with self._cv:
+            while True:
+                remaining = deadline - self.time()
+                if remaining <= 0:
+                    return
+                self._cv.wait(self.to_real(remaining))
+
+    def wait(self, event: threading.Event, timeout: Optional[float] = None) -> bool:
+        if timeout is None:
+            return event.wait()
+        deadline = self.time() + timeout
+        while not event.is_set():
+            remaining = deadline - self.time()
+            if remaining <= 0:
+                return False
+            event.wait(min(self.to_real(remaining), SIM_POLL_S))
+        return True
+
+    def now(self, tz: Optional[tzinfo] = None) -> datetime:
+        return datetime.fromtimestamp(self.time(), tz)
+
+
+# Clock used by the whole process
+_clock = RealClock()
+
+
+def get_clock():
+    return _clock
+
+
+def set_clock(new_clock) -> None:
+    """Install a RealClock or SimClock for the whole process."""
+    global _clock
+    _clock = new_clock
+
+
+def time() -> float:
+    return _clock.time()
+
+
+def sleep(seconds: float) -> None:
+    _clock.sleep(seconds)
+
+
+def now(tz: Optional[tzinfo] = None) -> datetime:
+    return _clock.now(tz)
+
+
+def wait(event: threading.Event, timeout: Optional[float] = None) -> bool:
+    return _clock.wait(event, timeout)
+
+
+def to_real(seconds: Optional[float]) -> Optional[float]:
+    return _clock.to_real(seconds)
@@ -0,0 +1,958 @@
+"""
+Device registry: several MD-01 rotators and Pico coax switches in one server.
+
+Every device owns its serial port, its I/O thread(s) and its own state
+namespace (a dict shaped like the app's /status payload):
+
+    RotatorDevice  SerialAntenna -> AntennaActor -> PositionTelemetry,
+                   plus a tracking thread with its own TrackingController
+    SwitchDevice   SerialSwitch guarded by a per-device lock
+
+All tracking rotators share one MoonService, so the Moon position and the
+pass track are computed once per tick, not once per antenna; each rotator
+only plans its own cable wraps on the shared arrays.
+
+The app's original single-antenna routes (/connect, /tracker, ...) drive
+the rotator registered as "main" and the /coax/... routes the switch
+registered as "coax"; both keep their state in the app's global state.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from datetime import timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import CalcMoonPos
+import clock
+from antennaActor import AntennaActor
+from positionHistory import PositionHistory
+from serialComm import SerialAntenna
+from serialMetrics import TimedLock
+from portDiscovery import probe_pico
+from serialSwitch import SerialSwitch
+from supervisor import ConnectionSupervisor
+from telemetry import TELEMETRY_MAX_PERIOD, PositionSample, PositionTelemetry
+from tracking import (
+    TRAJ_MAX_S,
+    TRAJ_STEP_S,
+    PassTrajectory,
+    TrackingController,
+    ang_err,
+    ctrl_to_app_continuous,
+    encode_ctrl_az_from_continuous,
+    norm360,
+    safe_azimuth,
+    signed180,
+    unwrap_ctrl_az,
+)
+
+UTC = timezone.utc
+
+# -----------------------------------------------------------------------------
+# Constants: antenna / tracking / safety
+# -----------------------------------------------------------------------------
+
+# Parking position for the antenna
+PARKAZ = 40
+PARKEL = 60
+
+# Tracking parameters
+ELEVATION_MIN = 15          # deg — tracking allowed only above this (unless force=1)
+POS_TOL = 0.1               # deg — how close is “on target” for az & el
+DEAD_BAND = 0.1             # deg — ignore tiny corrections
+SEND_INTERVAL = 3.0         # s   — minimum time between corrections
+SLEW_TIMEOUT = 180          # s   — max time for initial / park slew
+TRACK_LEAD = True           # command where the Moon will be on arrival (see LeadCompensator)
+TRAJ_RETRY_S = 10.0         # s   — wait before retrying a failed trajectory build
+PICO_CONNECT_TIMEOUT = 1.0  # s   — STATUS handshake on connect (discovery probes are shorter)
+
+MOON_TICK_S = 1.0           # s   — Moon position is recomputed at most once per tick
+TRACK_EXTRA_S = 6 * 3600    # s   — shared Moon track reaches this far beyond max_s
+
+
+class DeviceError(RuntimeError):
+    """A device command was refused (not connected, limits, wrong kind)."""
+
+
+# -----------------------------------------------------------------------------
+# Shared Moon ephemeris
+# -----------------------------------------------------------------------------
+
+class MoonService:
+    """
+    Moon position and pass tracks shared by every tracking antenna.
+
+    position() is recomputed at most once per MOON_TICK_S of clock time.
+    track() samples the Moon on a grid aligned to multiples of step_s and
+    keeps the last track, extra_s longer than requested, so trajectories
+    requested by several antennas within extra_s of each other are slices
+    of the same arrays.
+    """
+
+    def __init__(self, tick_s: float = MOON_TICK_S, step_s: float = TRAJ_STEP_S,
+                 extra_s: float = TRACK_EXTRA_S) -> None:
+        self.tick_s = float(tick_s)
+        self.step_s = float(step_s)
+        self.extra_s = float(extra_s)
+        self._pos: Optional[Tuple[int, float, float]] = None     # (tick, az, el)
+        self._track: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def position(self) -> Tuple[float, float]:
+        """Current Moon (az, el) in degrees."""
+        tick = int(clock.time() // self.tick_s)
+        pos = self._pos
+        if pos is None or pos[0] != tick:
+            az, el = CalcMoonPos.get_moon_position()
+            pos = (tick, az, el)
+            self._pos = pos
+        return pos[1], pos[2]
+
+    def track(self, t_start: float,
+              max_s: float = TRAJ_MAX_S) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(t, az, el) every step_s from the grid point at or before t_start."""
+        step = self.step_s
+        t0 = np.floor(t_start / step) * step
+        n = int(max_s / step) + 1
+        with self._lock:
+            tr = self._track
+            if tr is not None:
+                i0 = int(round((t0 - tr[0][0]) / step))
+                if 0 <= i0 and i0 + n <= len(tr[0]):
+                    return tr[0][i0:i0 + n], tr[1][i0:i0 + n], tr[2][i0:i0 + n]
+
+            t = t0 + step * np.arange(n + int(self.extra_s / step))
+            az, el, _ = CalcMoonPos.get_moon_track(t)
+            self._track = (t, az, el)
+            return t[:n], az[:n], el[:n]
+
+    def trajectory(self, t_start: float, cur_az_cont: float,
+                   min_el: Optional[float] = None) -> Optional[PassTrajectory]:
+        """Remaining pass for an antenna at cur_az_cont (see PassTrajectory.build)."""
+        t, az, el = self.track(t_start)
+        if t[0] < t_start:
+            # Start on the next grid point, so min_el is checked from t_start on
+            t, az, el = t[1:], az[1:], el[1:]
+        return PassTrajectory.from_track(t, az, el, cur_az_cont, min_el=min_el)
+
+
+# -----------------------------------------------------------------------------
+# MD-01 rotator
+# -----------------------------------------------------------------------------
+
+def new_rotator_state() -> Dict[str, Any]:
+    """Empty state namespace of a rotator (same keys as the app's /status)."""
+    return {
+        "connected": False,
+        "status": "Not connected",
+        "status_level": "info",
+        "status_at": None,
+        "az": 0.0,
+        "az_cont": 0.0,
+        "el": 0.0,
+        "az_norm": 0.0,
+        "az_moon": 0.0,
+        "el_moon": 0.0,
+        "tracking": False,
+        "port": None,
+        "tracking_stats": None,
+        "telemetry_period_s": None,
+        "link": None,
+    }
+
+
+class RotatorDevice:
+    """
+    One MD-01 controller: connection, position stream, slews and tracking.
+
+    state   : dict updated in place (pass the app's global state for "main")
+    history : optional PositionHistory fed with every telemetry sample
+    """
+
+    kind = "rotator"
+
+    def __init__(self, device_id: str, moon: MoonService,
+                 state: Optional[Dict[str, Any]] = None,
+                 history: Optional[PositionHistory] = None) -> None:
+        self.id = device_id
+        self.moon = moon
+        self.state = new_rotator_state() if state is None else state
+        self.history = history
+
+        self.ant: Optional[AntennaActor] = None
+        self.telemetry: Optional[PositionTelemetry] = None
+        self.trajectory: Optional[PassTrajectory] = None
+        self.tracking_stop = threading.Event()
+        self._tracking_thread: Optional[threading.Thread] = None
+        self._session: Optional[Tuple[bool, bool]] = None    # (force, lead) to resume
+
+        # Reopens the last port after the link is lost (see _link_lost)
+        self.link = ConnectionSupervisor(
+            f"{device_id}/md01", self._reconnect, on_change=self._on_link_change
+        )
+
+    # --------------------------------------------------------------------- #
+    # Status
+    # --------------------------------------------------------------------- #
+
+    def set_status(self, level: str, message: str) -> None:
+        self.state["status_level"] = level
+        self.state["status"] = message
+        self.state["status_at"] = clock.now(UTC).isoformat()
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.state, id=self.id, kind=self.kind)
+
+    @property
+    def port(self) -> Optional[str]:
+        return self.state["port"]
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.state["connected"] and self.ant)
+
+    def _require_connected(self) -> AntennaActor:
+        ant = self.ant
+        if not (self.state["connected"] and ant):
+            self.set_status("error", "Controller not connected!")
+            raise DeviceError(self.state["status"])
+        return ant
+
+    # --------------------------------------------------------------------- #
+    # Connection / telemetry
+    # --------------------------------------------------------------------- #
+
+    def connect(self, port: str) -> Tuple[float, float]:
+        """Open the MD-01 on `port`, read the position, start the telemetry."""
+        self.link.cancel()
+        self.stop_tracking()
+        return self._open(port)
+
+    def _open(self, port: str, az_cont: Optional[float] = None) -> Tuple[float, float]:
+        """
+        Open the port and initialise the state from the controller position.
+
+        With az_cont (last known continuous azimuth) the reading is unwrapped
+        against it, so the cable wrap survives a reconnect.
+        """
+        # The old handle goes first: a COM port cannot be opened twice
+        self._close_port()
+
+        antenna = SerialAntenna(port)
+        if not antenna.status():
+            raise RuntimeError("Port could not be opened")
+
+        ant = AntennaActor(antenna)
+        try:
+            az, el = ant.read_position()
+        except Exception:
+            ant.close()
+            raise
+        self.ant = ant
+        az_app = ctrl_to_app_continuous(az)
+        if az_cont is not None:
+            az_app = unwrap_ctrl_az(az_app, az_cont)
+
+        self.state.update(
+            {
+                "port": port,
+                "connected": True,
+                "az": round(az_app, 1),
+                "az_cont": round(az_app, 2),
+                "az_norm": round(norm360(az_app), 1),
+                "el": round(el, 1),
+            }
+        )
+        self.start_telemetry()
+        return az, el
+
+    def disconnect(self) -> None:
+        """Stop tracking, park, and close the port."""
+        self.link.cancel()
+        self.stop_tracking()
+
+        ant = self.ant
+        if ant:
+            safe_az_app = safe_azimuth(PARKAZ, self.state["az"])
+            cmd_az_ctrl = encode_ctrl_az_from_continuous(safe_az_app)
+            ant.set_position(cmd_az_ctrl, PARKEL)
+            ant.stop_movement()
+
+            time.sleep(0.3)
+            self._close_port()
+
+        self.state.update({"connected": False, "tracking": False, "az": 0.0, "el": 0.0})
+        self.set_status("info", "Not connected")
+
+    def _on_position(self, sample: PositionSample) -> None:
+        """
+        Telemetry subscriber: mirror every filtered sample into the state
+        and record it, with the Moon position at the same instant, in the history.
+        """
+        self.state["az"] = round(sample.az, 1)
+        self.state["az_cont"] = round(sample.az, 2)
+        self.state["az_norm"] = round(sample.az_norm, 1)
+        self.state["el"] = round(sample.el, 1)
+        tm = self.telemetry
+        if tm:
+            self.state["telemetry_period_s"] = round(tm.period_s, 2)
+
+        if self.history is not None:
+            az_moon, el_moon, _ = CalcMoonPos.get_moon_track(sample.t)
+            self.history.append(sample.t, sample.az, sample.el, float(az_moon), float(el_moon))
+
+    def _on_telemetry_error(self, exc: Exception, fail_count: int) -> None:
+        """Telemetry error hook: drop the connection after 3 failed reads in a row."""
+        self.set_status("warning", f"Read error ({fail_count})")
+        if fail_count < 3:
+            return
+        self._link_lost(exc)
+
+    def _close_port(self) -> None:
+        """Stop the telemetry and close the actor and its port (if open)."""
+        self.stop_telemetry()
+        ant, self.ant = self.ant, None
+        self.state["connected"] = False
+        if ant is not None:
+            try:
+                ant.close()
+            except Exception:  # noqa: BLE001
+                pass
+
+    def _link_lost(self, exc: Exception) -> None:
+        """Close the dead port and let the supervisor reopen it."""
+        # Tracking ends with the port; _session is kept so it can resume
+        self.tracking_stop.set()
+        self.state["tracking"] = False
+
+        self._close_port()
+        self.set_status("error", f"Connection lost: {exc} — reconnecting")
+        self.link.lost(exc)
+
+    def _reconnect(self) -> None:
+        """Supervisor callback: reopen the last port, resync, resume tracking."""
+        port = self.state["port"]
+        az, el = self._open(port, az_cont=float(self.state["az_cont"]))
+        msg = f"Reconnected to {port} (Az={az:.1f}°, El={el:.1f}°)"
+
+        session = self._session
+        if session is not None:
+            self.start_tracking(*session)
+            msg += ", tracking resumed"
+        self.set_status("success", msg)
+
+    def _on_link_change(self, metrics: Dict[str, Any]) -> None:
+        self.state["link"] = metrics
+
+    def start_telemetry(self) -> None:
+        """Start the position stream for the current MD-01 connection."""
+        self.stop_telemetry()
+        if self.ant is None:
+            return
+
+        tm = PositionTelemetry(
+            self.ant.read_position,
+            az_cont=float(self.state.get("az_cont", self.state["az"])),
+            on_error=self._on_telemetry_error,
+        )
+        tm.subscribe(self._on_position)
+        self.telemetry = tm
+        tm.start()
+
+    def kick_telemetry(self) -> None:
+        """A command went to the MD-01: sample fast until the motion settles."""
+        tm = self.telemetry
+        if tm:
+            tm.kick()
+
+    def stop_telemetry(self) -> None:
+        """Stop the position stream (if any)."""
+        tm = self.telemetry
+        if tm:
+            tm.stop()
+            self.telemetry = None
+        self.state["telemetry_period_s"] = None
+
+    # --------------------------------------------------------------------- #
+    # Motion
+    # --------------------------------------------------------------------- #
+
+    def _command(self, az_cont: float, el: float) -> float:
+        """Send a continuous app azimuth + elevation; returns the controller azimuth."""
+        cmd_az = encode_ctrl_az_from_continuous(az_cont)
+        self.ant.set_position(cmd_az, el)
+        self.kick_telemetry()
+        return cmd_az
+
+    def set_position(self, az_req: float, el_req: float, force: bool = False) -> None:
+        """Manually set the antenna position (az, el)."""
+        if (el_req <= ELEVATION_MIN) and not force:
+            self.set_status("warning", f"Elevation must be >= {ELEVATION_MIN}°")
+            raise DeviceError(self.state["status"])
+
+        if not self.ant:
+            self.set_status("error", "Not connected")
+            raise DeviceError(self.state["status"])
+
+        cur_app = float(self.state.get("az_cont", self.state["az"]))
+        tgt_app = norm360(az_req)
+        cont_app = safe_azimuth(tgt_app, cur_app)
+        cmd_ctrl_az = self._command(cont_app, el_req)
+
+        # Optimistic UI update (telemetry will refine).
+        self.state["az_norm"] = round(norm360(cont_app), 1)
+        self.state["az_cont"] = round(cont_app, 2)
+
+        delta = signed180(tgt_app - cur_app)
+        self.set_status(
+            "success",
+            f"Set to {tgt_app:.1f}° (Δ={delta:.1f}°) → cmd {cmd_ctrl_az:.1f}° / {el_req:.1f}°",
+        )
+
+    def stop(self) -> None:
+        """Immediate stop of movement and tracking; does not park."""
+        self.stop_tracking()
+        ant = self._require_connected()
+        ant.stop_movement()
+        self.kick_telemetry()
+        self.set_status("info", "Movement & tracking stopped")
+
+    def park(self) -> None:
+        """Send the antenna to the park position."""
+        ant = self._require_connected()
+        safe_az_app = safe_azimuth(PARKAZ, self.state["az"])          # app/sky
+        cmd_az_ctrl = encode_ctrl_az_from_continuous(safe_az_app)     # controller cmd
+        ant.set_position(cmd_az_ctrl, PARKEL)
+        ant.stop_movement()
+        self.kick_telemetry()
+        self.set_status("info", "Parkposition set")
+
+    def wait_until_position(self, target_az: float, target_el: float,
+                            timeout: float = SLEW_TIMEOUT) -> bool:
+        """
+        Block until the antenna reaches (target_az, target_el) within POS_TOL,
+        until timeout, or until tracking is stopped.
+
+        Returns True if target reached, otherwise False.
+        """
+        t0 = clock.time()
+        while clock.time() - t0 < timeout and not self.tracking_stop.is_set():
+            tm = self.telemetry
+            if self.ant is None or tm is None:
+                return False
+
+            sample = tm.wait_next(timeout=TELEMETRY_MAX_PERIOD + 1.0)
+            if sample is None:
+                continue
+
+            az_ok = abs(ang_err(target_az % 360, sample.az_norm)) <= POS_TOL
+            el_ok = abs(target_el - sample.el) <= POS_TOL
+
+            if az_ok and el_ok:
+                return True
+
+        return False
+
+    def wait_for_moon_above(self, min_el: float = ELEVATION_MIN, poll_s: float = 10) -> bool:
+        """
+        Block until Moon elevation is >= min_el, or tracking is stopped.
+
+        Returns True if Moon reaches the minimum elevation, False if stopped first.
+        """
+        while not self.tracking_stop.is_set():
+            try:
+                azm, elm = self.moon.position()
+                self.state["az_moon"] = round(azm, 1)
+                self.state["el_moon"] = round(elm, 1)
+                if elm >= min_el:
+                    return True
+            except Exception:
+                pass
+            clock.wait(self.tracking_stop, poll_s)
+        return False
+
+    def go_to_parking(self) -> None:
+        """Command the antenna to park and wait until it reaches the parking position."""
+        if self.ant is None:
+            return
+
+        self._command(PARKAZ, PARKEL)
+
+        self.set_status("info", f"Parking: Az={PARKAZ}°, El={PARKEL}°")
+        reached = self.wait_until_position(PARKAZ, PARKEL, timeout=SLEW_TIMEOUT)
+
+        if reached:
+            self.set_status("info", "Parked and waiting for Moon to rise")
+        else:
+            self.set_status("warning", "Park slew timed out; holding position")
+
+    # --------------------------------------------------------------------- #
+    # Moon tracking
+    # --------------------------------------------------------------------- #
+
+    @property
+    def tracking(self) -> bool:
+        return bool(self._tracking_thread and self._tracking_thread.is_alive())
+
+    def start_tracking(self, force: bool = False, lead: bool = TRACK_LEAD) -> None:
+        """
+        Start the tracking thread (replacing a running one).
+
+        force=True does not cut the pass at ELEVATION_MIN; lead=False commands
+        the current Moon position instead of leading it.
+        """
+        self._require_connected()
+        self._join_tracking()
+        # A fresh event per run: a previous loop that is still winding down
+        # keeps its own (set) event and cannot pick up the new session.
+        stop = self.tracking_stop = threading.Event()
+
+        # Correction decisions, feed-forward lead and pointing statistics
+        ctl = TrackingController(SEND_INTERVAL, DEAD_BAND, lead=lead)
+        self._session = (force, lead)
+        self.state["tracking"] = True
+        self.state["tracking_stats"] = ctl.as_dict()
+
+        self._tracking_thread = threading.Thread(
+            target=self._track_loop, args=(ctl, force, stop), daemon=True
+        )
+        self._tracking_thread.start()
+
+    def stop_tracking(self) -> None:
+        """Stop the tracking thread (if running) and mark state['tracking'] = False."""
+        self._session = None
+        self._join_tracking()
+        self.state["tracking"] = False
+        tm = self.telemetry
+        if tm:
+            tm.report_error(0.0)
+
+    def _join_tracking(self) -> None:
+        self.tracking_stop.set()
+        thread = self._tracking_thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            try:
+                thread.join(timeout=1)
+            except Exception:
+                pass
+        self._tracking_thread = None
+
+    def _build_trajectory(self, force: bool) -> Optional[PassTrajectory]:
+        """
+        Precompute the remaining pass from the current antenna azimuth.
+        With force=True the pass is not cut at ELEVATION_MIN.
+        """
+        cur_cont = float(self.state.get("az_cont", self.state["az"]))
+        self.trajectory = self.moon.trajectory(
+            clock.time(),
+            cur_cont,
+            min_el=None if force else ELEVATION_MIN,
+        )
+        return self.trajectory
+
+    def _build_trajectory_retry(self, force: bool,
+                                stop: threading.Event) -> Optional[PassTrajectory]:
+        """
+        _build_trajectory(), retried every TRAJ_RETRY_S while it fails.
+        Returns None if the Moon is below the limit or `stop` was set.
+        """
+        while not stop.is_set():
+            try:
+                return self._build_trajectory(force)
+            except Exception as exc:  # noqa: BLE001
+                self.set_status(
+                    "warning",
+                    f"Could not compute Moon trajectory: {exc} — retrying in {TRAJ_RETRY_S:.0f}s",
+                )
+                clock.wait(stop, TRAJ_RETRY_S)
+        return None
+
+    def _wait_for_pass(self, force: bool,
+                       stop: threading.Event) -> Optional[PassTrajectory]:
+        """
+        Trajectory from now; while the Moon is below the limit the antenna
+        parks and waits for it to rise. Returns None once `stop` is set.
+        """
+        traj = self._build_trajectory_retry(force, stop)
+        while traj is None:
+            if stop.is_set():
+                return None
+            self.go_to_parking()
+            if not self.wait_for_moon_above():
+                return None
+            traj = self._build_trajectory_retry(force, stop)
+        return traj
+
+    def _track_loop(self, ctl: TrackingController, force: bool,
+                    stop: threading.Event) -> None:
+        state = self.state
+
+        # Step 0: park and wait if Moon below minimum elevation (unless forced)
+        here = None
+        while here is None:
+            traj = self._wait_for_pass(force, stop)
+            if traj is None:
+                return
+            # None if the pass ended between the build and now
+            here = traj.at(clock.time())
+
+        # Step 1: initial slew
+        desired_az, desired_el = here
+        state["az_moon"] = round(norm360(desired_az), 1)
+        state["el_moon"] = round(desired_el, 1)
+
+        if self.ant is None:
+            return
+
+        self._command(desired_az, desired_el)
+        self.set_status("busy", f"Slewing to Moon: Az={desired_az:.1f}°, El={desired_el:.1f}°")
+
+        reached = self.wait_until_position(desired_az, desired_el, timeout=SLEW_TIMEOUT)
+        if not reached:
+            self.set_status("warning", "Initial slew timed out; entering tracking anyway")
+        else:
+            self.set_status("success", "On target — starting active tracking")
+
+        # Step 2: active tracking (only indexes into the precomputed pass)
+        while not stop.is_set():
+            if traj.at(clock.time()) is None:
+                # The precomputed array is used up, which is not necessarily
+                # the end of the pass (TRAJ_MAX_S): continue from now while
+                # the Moon is still above the limit, otherwise park and wait
+                # for the next pass.
+                traj = self._build_trajectory_retry(force, stop)
+                if traj is None:
+                    ctl.stats.reset()
+                    traj = self._wait_for_pass(force, stop)
+                    if traj is None:
+                        break
+                continue
+
+            tm = self.telemetry
+            if self.ant is None or tm is None:
+                break
+
+            # Block until the next filtered position sample arrives
+            sample = tm.wait_next(timeout=TELEMETRY_MAX_PERIOD + 1.0)
+            if sample is None:
+                continue
+
+            now = clock.time()
+            command = ctl.step(traj, now, sample.t, sample.az, sample.el)
+            if ctl.moon is not None:
+                state["az_moon"] = round(norm360(ctl.moon[0]), 1)
+                state["el_moon"] = round(ctl.moon[1], 1)
+                # Large pointing errors keep the telemetry at its fast rate
+                tm.report_error(max(
+                    abs(ang_err(norm360(ctl.moon[0]), sample.az_norm)),
+                    abs(ctl.moon[1] - sample.el),
+                ))
+
+            if command is not None:
+                desired_az, desired_el, err_az, err_el = command
+                try:
+                    self._command(desired_az, desired_el)
+                except Exception as exc:  # noqa: BLE001
+                    self.set_status("error", f"Tracking error: {exc}")
+                    clock.sleep(1)
+                    continue
+
+                ctl.sent(now, sample.az, sample.el)
+                self.set_status(
+                    "busy",
+                    (
+                        f"Tracking: Az→{desired_az:.1f}°, El→{desired_el:.1f}° "
+                        f"(ΔAz={err_az:.1f}°, ΔEl={err_el:.1f}°)"
+                    ),
+                )
+
+            state["tracking_stats"] = ctl.as_dict()
+
+        tm = self.telemetry
+        if tm:
+            tm.report_error(0.0)
+
+
+# -----------------------------------------------------------------------------
+# Pico coax switch
+# -----------------------------------------------------------------------------
+
+def new_switch_state() -> Dict[str, Any]:
+    """Empty state namespace of a coax switch."""
+    return {
+        "connected": False,
+        "status": "Not connected",
+        "status_level": "info",
+        "status_at": None,
+        "port": None,
+        "switches": {"S1": 0, "S2": 0, "S3": 0},
+        "link": None,
+    }
+
+
+class SwitchDevice:
+    """
+    One Pico coax switch (three latching relays S1..S3).
+
+    All traffic goes through SerialSwitch under the device's own lock, so
+    requests for different boxes never wait for each other.
+
+    keys renames the "port", "connected" and "link" entries of the state
+    namespace, so the main switch can live in the app's global state next
+    to the main rotator (e.g. {"port": "switch_port", ...}). on_reply is
+    called with every STATE / OK STATE line read from the box.
+    """
+
+    kind = "switch"
+
+    def __init__(
+        self,
+        device_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        keys: Optional[Dict[str, str]] = None,
+        on_reply: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.id = device_id
+        self.state = new_switch_state() if state is None else state
+        self.keys = {k: k for k in ("port", "connected", "link")}
+        self.keys.update(keys or {})
+        self.on_reply = on_reply
+        self.switch: Optional[SerialSwitch] = None
+        self.lock = TimedLock(f"{device_id}/switch")
+        self.link = ConnectionSupervisor(
+            f"{device_id}/pico", self._reconnect, on_change=self._on_link_change
+        )
+
+    def set_status(self, level: str, message: str) -> None:
+        self.state["status_level"] = level
+        self.state["status"] = message
+        self.state["status_at"] = clock.now(UTC).isoformat()
+
+    def status(self) -> Dict[str, Any]:
+        return dict(self.state, id=self.id, kind=self.kind)
+
+    @property
+    def port(self) -> Optional[str]:
+        return self.state[self.keys["port"]]
+
+    @property
+    def connected(self) -> bool:
+        sw = self.switch
+        return bool(sw and sw.ser and sw.ser.is_open and self.state[self.keys["connected"]])
+
+    def _set_link_state(self, port: Optional[str], connected: bool) -> None:
+        self.state[self.keys["port"]] = port
+        self.state[self.keys["connected"]] = connected
+
+    def connect(self, port: str) -> Dict[str, Any]:
+        """Open `port` and verify it answers STATUS with a STATE line."""
+        self.link.cancel()
+        try:
+            return self._open(port)
+        except Exception:
+            self._set_link_state(None, False)
+            raise
+
+    def _open(self, port: str) -> Dict[str, Any]:
+        # The old handle goes first: a COM port cannot be opened twice
+        with self.lock:
+            if self.switch is not None:
+                self.switch.close()
+                self.switch = None
+        switches = probe_pico(port, timeout=PICO_CONNECT_TIMEOUT)
+        with self.lock:
+            self.switch = SerialSwitch(port)
+
+        self._set_link_state(port, True)
+        self._update("STATE " + " ".join(f"{k}={v}" for k, v in sorted(switches.items())))
+        self.set_status("success", f"Pico switch connected on {port}")
+        return self.state["switches"]
+
+    def disconnect(self) -> None:
+        self.link.cancel()
+        with self.lock:
+            if self.switch is not None:
+                self.switch.close()
+                self.switch = None
+        self._set_link_state(None, False)
+        self.state["switches"] = {"S1": 0, "S2": 0, "S3": 0}
+        self.set_status("info", "Pico switch disconnected")
+
+    def _require_connected(self) -> SerialSwitch:
+        if not self.connected:
+            self.set_status("error", "Pico switch not connected")
+            raise DeviceError(self.state["status"])
+        return self.switch
+
+    def _update(self, reply: str) -> None:
+        """Take the relay positions from a 'STATE ...' / 'OK STATE ...' reply."""
+        switches = SerialSwitch.parse_state(reply)
+        if not any(switches.values()):
+            return
+        current = dict(self.state.get("switches") or {})
+        current.update({k: v for k, v in switches.items() if v is not None})
+        self.state["switches"] = current
+        if self.on_reply:
+            self.on_reply(reply)
+
+    def _call(self, fn: Callable[[SerialSwitch], Any]) -> Any:
+        """Run fn(switch) under the lock; an I/O error starts the reconnect."""
+        sw = self._require_connected()
+        try:
+            with self.lock:
+                return fn(sw)
+        except RuntimeError as exc:
+            self._link_lost(exc)
+            raise
+
+    def set(self, sid: int, side: str) -> str:
+        """Set relay S<sid> to side '1' or '2'; returns the raw reply."""
+        reply = self._call(lambda sw: sw.set(sid, side))
+        self._update(reply)
+        self.set_status("ok", f"S{sid} set to {side}")
+        return reply
+
+    def preset(self, name: str) -> Dict[str, Any]:
+        """Apply a named preset ('TX' / 'RX') in one round trip."""
+        resp = self._call(lambda sw: sw.preset(name))
+        self._update(resp["raw"])
+        self.set_status("ok", f"Preset {name.upper()} applied")
+        return self.state["switches"]
+
+    def refresh(self) -> Dict[str, Any]:
+        """Read STATUS from the box."""
+        st = self._call(lambda sw: sw.status_parsed())
+        self._update(st["raw"])
+        return self.state["switches"]
+
+    def switch_at(self, name: str, at: float) -> Dict[str, Any]:
+        """
+        Apply preset `name` at host time.monotonic() `at` and return once the
+        relays have switched.
+
+        Firmware with SYNC / ARM switches on its own microsecond clock, so the
+        instant does not depend on Python scheduling or USB latency; the
+        returned SerialSwitch.timing() dict says when each coil fired relative
+        to the target. Older firmware gets a host sleep + preset() and
+        {"state": "host", "preset": ..., "late_us": ...}.
+        """
+        name = name.strip().upper()
+        sw = self._require_connected()
+
+        timing: Optional[Dict[str, Any]] = None
+        if sw.timed_supported is not False:
+            try:
+                with self.lock:
+                    sw.sync()
+                    sw.arm(name, at)
+                # Coil pulse done, then ask when it fired
+                time.sleep(max(0.0, at - time.monotonic()) + 0.1)
+                with self.lock:
+                    timing = sw.timing()
+                    st = sw.status_parsed()
+            except RuntimeError as exc:
+                if sw.timed_supported is not False:
+                    self._link_lost(exc)
+                    raise
+
+        if timing is not None and timing["state"] == "fired":
+            self._update(st["raw"])
+            self.set_status("ok", f"Coax switched to {name} by the Pico at its scheduled time")
+            return timing
+
+        if timing is not None:
+            # Armed but not fired in time: do not let it switch later on
+            self._call(lambda s: s.disarm())
+        time.sleep(max(0.0, at - time.monotonic()))
+        late = time.monotonic() - at
+        self.preset(name)
+        return {"state": "host", "preset": name, "late_us": round(late * 1e6)}
+
+    def _link_lost(self, exc: Exception) -> None:
+        if self.port is None:
+            return                      # disconnected on purpose meanwhile
+        self.state[self.keys["connected"]] = False
+        self.set_status("error", f"Connection lost: {exc} — reconnecting")
+        self.link.lost(exc)
+
+    def _reconnect(self) -> None:
+        """Supervisor callback: reopen the last port and re-read the relays."""
+        port = self.port
+        self._open(port)
+        self.set_status("success", f"Pico switch reconnected on {port}")
+
+    def _on_link_change(self, metrics: Dict[str, Any]) -> None:
+        self.state[self.keys["link"]] = metrics
+
+
+# -----------------------------------------------------------------------------
+# Registry
+# -----------------------------------------------------------------------------
+
+DEVICE_KINDS: Dict[str, Callable[..., Any]] = {
+    RotatorDevice.kind: lambda device_id: RotatorDevice(device_id, moon),
+    SwitchDevice.kind: SwitchDevice,
+}
+
+
+class DeviceRegistry:
+    """Devices by id; ids are unique across kinds."""
+
+    def __init__(self) -> None:
+        self._devices: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, device):
+        with self._lock:
+            if device.id in self._devices:
+                raise DeviceError(f"Device {device.id!r} already exists")
+            self._devices[device.id] = device
+        return device
+
+    def create(self, device_id: str, kind: str):
+        """Return device `device_id`, creating a `kind` device if it is new."""
+        with self._lock:
+            dev = self._devices.get(device_id)
+            if dev is None:
+                if kind not in DEVICE_KINDS:
+                    raise DeviceError(f"Unknown device kind {kind!r}")
+                dev = DEVICE_KINDS[kind](device_id)
+                self._devices[device_id] = dev
+            elif dev.kind != kind:
+                raise DeviceError(f"Device {device_id!r} is a {dev.kind}")
+            return dev
+
+    def get(self, device_id: str, kind: Optional[str] = None):
+        """Device by id (and kind); raises KeyError if there is none."""
+        dev = self._devices.get(device_id)
+        if dev is None or (kind is not None and dev.kind != kind):
+            raise KeyError(device_id)
+        return dev
+
+    def remove(self, device_id: str):
+        with self._lock:
+            return self._devices.pop(device_id, None)
+
+    def all(self, kind: Optional[str] = None) -> List[Any]:
+        return [d for d in list(self._devices.values()) if kind is None or d.kind == kind]
+
+    def summary(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": d.id,
+                "kind": d.kind,
+                "connected": d.connected,
+                "port": d.port,
+                "status": d.state.get("status"),
+            }
+            for d in self.all()
+        ]
+
+
+# Shared by the app: one Moon service for every rotator
+moon = MoonService()
+registry = DeviceRegistry()
@@ -1,3 +1,6 @@
+import threading
+from collections import namedtuple
+
 import numpy as np
 import matplotlib.pyplot as plt
 from skyfield.api import load, wgs84
@@ -25,110 +28,163 @@ DAY     = now.day
 POINTS_PER_DAY = 24 * 12
 
 
+# ================== EPHEMERIS CONTEXT ==================
+
+EPHEMERIS_FILE = 'de440s.bsp'
+
+EphemerisContext = namedtuple("EphemerisContext", "ts eph earth moon station")
+
+_ephemeris = None
+_ephemeris_lock = threading.Lock()
+
+
+def get_ephemeris():
+    """
+    Shared Skyfield context for the whole process, loaded on first use.
+
+    The SPK kernel is opened only once (jplephem memory-maps its segments, so
+    pages are read from disk on demand) and the timescale and station vector
+    are reused by every caller and thread.
+
+    Rückgabe: EphemerisContext(ts, eph, earth, moon, station)
+    """
+    global _ephemeris
+    ctx = _ephemeris
+    if ctx is not None:
+        return ctx
+    with _ephemeris_lock:
+        if _ephemeris is None:
+            ts = load.timescale()
+            eph = load(EPHEMERIS_FILE)
+            earth = eph['earth']
+            moon  = eph['moon']
+            station = earth + wgs84.latlon(STATION_LAT, STATION_LON, elevation_m=STATION_ELV)
+            _ephemeris = EphemerisContext(ts, eph, earth, moon, station)
+        return _ephemeris
+
+
+def unix_to_time(t_unix):
+    """Unix timestamp(s) [s] -> Skyfield Time (UTC days are exactly 86400 s)."""
+    ts = get_ephemeris().ts
+    t_unix = np.asarray(t_unix, dtype=float)
+    days = np.floor(t_unix / 86400.0)
+    return ts.utc(1970, 1, 1 + days, 0, 0, t_unix - days * 86400.0)
+
+
 # ================== CORE CALC ==================
 
-def compute_eme_day():
-    # Load time scale and ephemeris
-    ts = load.timescale()
-    # Times over one UTC day
-    hours = np.linspace(0, 24, POINTS_PER_DAY)
-    t = ts.utc(YEAR, MONTH, DAY, hours)
+C_M_S = 299_792_458.0  # m/s
 
-    # JPL ephemeris
-    eph = load('de440s.bsp')
-    earth = eph['earth']
-    moon  = eph['moon']
+# Dense time vectors are evaluated exactly on nodes at most this far apart
+# and filled in by interpolation (see _eme_vectors_dense).
+NODE_STEP_S = 60.0
 
-    # Station
-    station = earth + wgs84.latlon(STATION_LAT, STATION_LON, elevation_m=STATION_ELV)
 
-    distances_km = []
-    range_rates_m_s = []
-    doppler_2way_Hz = []
-    moon_up_mask = []
+def _eme_vectors(t, station, moon):
+    """Exact station -> Moon vectors: r [km], v [km/s] (3, N) and altitude [deg]."""
+    astrometric = station.at(t).observe(moon)
+    alt, az, _ = astrometric.apparent().altaz()
+    return astrometric.position.km, astrometric.velocity.km_per_s, alt.degrees
 
-    c = 299_792_458.0  # m/s
 
-    for ti in t:
-        # Vector station -> moon
-        astrometric = station.at(ti).observe(moon)
+def _eme_vectors_dense(t, station, moon):
+    """
+    Station -> Moon vectors for a long Time array.
 
-        # Distance (topocentric)
-        distance = astrometric.distance().km   # km
-        distances_km.append(distance)
+    The Moon's topocentric track is smooth on a scale of minutes, so Skyfield
+    is only evaluated on a node grid (NODE_STEP_S). Positions in between come
+    from cubic Hermite interpolation with the node velocities as slopes,
+    velocities and altitude from linear interpolation.
+    """
+    tt = t.tt
+    tt0 = tt.min()
+    span_s = (tt.max() - tt0) * 86400.0
+    n = int(np.ceil(span_s / NODE_STEP_S)) + 1
+    h_s = span_s / (n - 1)
 
-        # Position & velocity (km, km/s) to get range rate
-        r_km, v_km_s = astrometric.position.km, astrometric.velocity.km_per_s
-        r_vec = np.array(r_km)
-        v_vec = np.array(v_km_s)
+    t_nodes = t.ts.tt_jd(tt0 + np.arange(n) * h_s / 86400.0)
+    r_n, v_n, alt_n = _eme_vectors(t_nodes, station, moon)
 
-        R_km = np.linalg.norm(r_vec)
-        r_hat = r_vec / R_km
-        Rdot_km_s = np.dot(v_vec, r_hat)   # km/s
-        Rdot_m_s = Rdot_km_s * 1000.0      # m/s
-        range_rates_m_s.append(Rdot_m_s)
+    x = (tt - tt0) * 86400.0 / h_s
+    i = np.clip(np.floor(x).astype(int), 0, n - 2)
+    s = x - i
+    s2 = s * s
+    s3 = s2 * s
 
-        # 2-way Doppler: up + down
-        doppler_2way = -2.0 * (Rdot_m_s / c) * FREQ_HZ
-        doppler_2way_Hz.append(doppler_2way)
+    p0, p1 = r_n[:, i], r_n[:, i + 1]
+    m0, m1 = v_n[:, i] * h_s, v_n[:, i + 1] * h_s
 
-        # Check if Moon is above horizon
-        alt, az, _ = astrometric.apparent().altaz()
-        moon_up_mask.append(alt.degrees > 0.0)
+    r = ((2*s3 - 3*s2 + 1) * p0 + (s3 - 2*s2 + s) * m0
+         + (-2*s3 + 3*s2) * p1 + (s3 - s2) * m1)
+    v = v_n[:, i] + s * (v_n[:, i + 1] - v_n[:, i])
+    alt = alt_n[i] + s * (alt_n[i + 1] - alt_n[i])
+    return r, v, alt
 
-    return np.array(hours), np.array(distances_km), np.array(range_rates_m_s), np.array(doppler_2way_Hz), np.array(moon_up_mask)
 
-def compute_eme_interval(duration_hours=1.0, step_minutes=1.0):
-    ts = load.timescale()
-    eph = load('de440s.bsp')
-    earth = eph['earth']
-    moon  = eph['moon']
-    station = earth + wgs84.latlon(STATION_LAT, STATION_LON, elevation_m=STATION_ELV)
+def compute_eme(t, station, moon):
+    """
+    EME geometry station -> Moon for a Skyfield Time (scalar or array).
 
-    # time array: from 0 to duration_hours, in step_minutes
-    minutes = np.arange(0, duration_hours * 60 + 1e-9, step_minutes)
-    hours   = minutes / 60.0
-    t = ts.utc(YEAR, MONTH, DAY, hours)
+    Evaluates the whole time vector in one vectorized pass (no Python loop
+    over samples). Time arrays denser than NODE_STEP_S are interpolated from
+    exact node evaluations, which keeps a full day at 1 s resolution fast.
 
-    distances_km = []
-    Rdot_m_s     = []
-    doppler_Hz   = []
-    moon_up      = []
+    Rückgabe:
+      distances_km    : topocentric range [km]
+      range_rates_m_s : range rate [m/s] (positive = Moon receding)
+      doppler_2way_Hz : 2-way Doppler at FREQ_HZ [Hz]
+      alt_deg         : apparent altitude of the Moon [deg]
+    """
+    tt = t.tt
+    n = np.size(tt)
+    span_s = (np.max(tt) - np.min(tt)) * 86400.0
+    if n > 8 and 0.0 < span_s < NODE_STEP_S * (n - 1) / 2:
+        r_km, v_km_s, alt_deg = _eme_vectors_dense(t, station, moon)
+    else:
+        r_km, v_km_s, alt_deg = _eme_vectors(t, station, moon)
 
-    c = 299_792_458.0
+    # Position & velocity (km, km/s), shape (3,) or (3, N)
+    distances_km = np.sqrt(np.sum(r_km * r_km, axis=0))
+    range_rates_m_s = np.sum(r_km * v_km_s, axis=0) / distances_km * 1000.0
 
-    for ti in t:
-        astrometric = station.at(ti).observe(moon)
+    # 2-way Doppler: up + down
+    doppler_2way_Hz = -2.0 * (range_rates_m_s / C_M_S) * FREQ_HZ
 
-        distance = astrometric.distance().km
-        distances_km.append(distance)
+    return distances_km, range_rates_m_s, doppler_2way_Hz, alt_deg
 
-        r_km, v_km_s = astrometric.position.km, astrometric.velocity.km_per_s
-        r_vec = np.array(r_km)
-        v_vec = np.array(v_km_s)
 
-        R_km = np.linalg.norm(r_vec)
-        r_hat = r_vec / R_km
-        Rdot_km_s = np.dot(v_vec, r_hat)
-        Rdot = Rdot_km_s * 1000.0
-        Rdot_m_s.append(Rdot)
+def compute_eme_day():
+    # Shared time scale, JPL ephemeris and station
+    ts, eph, earth, moon, station = get_ephemeris()
 
-        doppler = -2.0 * (Rdot / c) * FREQ_HZ
-        doppler_Hz.append(doppler)
+    # Times over one UTC day
+    hours = np.linspace(0, 24, POINTS_PER_DAY)
+    t = ts.utc(YEAR, MONTH, DAY, hours)
+
+    distances_km, range_rates_m_s, doppler_2way_Hz, alt_deg = compute_eme(t, station, moon)
+
+    # Check if Moon is above horizon
+    moon_up_mask = alt_deg > 0.0
+
+    return hours, distances_km, range_rates_m_s, doppler_2way_Hz, moon_up_mask
+
+def compute_eme_interval(duration_hours=1.0, step_minutes=1.0):
+    ts, eph, earth, moon, station = get_ephemeris()
 
-        alt, az, _ = astrometric.apparent().altaz()
-        moon_up.append(alt.degrees > 0)
+    # time array: from 0 to duration_hours, in step_minutes
+    minutes = np.arange(0, duration_hours * 60 + 1e-9, step_minutes)
+    hours   = minutes / 60.0
+    t = ts.utc(YEAR, MONTH, DAY, hours)
+
+    distances_km, Rdot_m_s, doppler_Hz, alt_deg = compute_eme(t, station, moon)
+    moon_up = alt_deg > 0
 
-    return hours, np.array(distances_km), np.array(Rdot_m_s), np.array(doppler_Hz), np.array(moon_up)
+    return hours, distances_km, Rdot_m_s, doppler_Hz, moon_up
 
 
 def compute_eme_interval_seconds(duration_seconds=2.0, step_seconds=0.1):
 
-    ts = load.timescale()
-    eph = load('de440s.bsp')
-    earth = eph['earth']
-    moon  = eph['moon']
-    station = earth + wgs84.latlon(STATION_LAT, STATION_LON, elevation_m=STATION_ELV)
+    ts, eph, earth, moon, station = get_ephemeris()
 
     # Time offsets in seconds
     seconds = np.arange(0.0, duration_seconds + 1e-9, step_seconds)
@@ -147,67 +203,24 @@ def compute_eme_interval_seconds(duration_seconds=2.0, step_seconds=0.1):
     )
     # 't' is now a Skyfield Time array
 
-    distances_km = []
-    Rdot_m_s     = []
-    doppler_Hz   = []
-    f_rx_Hz      = []
-    moon_up      = []
-
-    c = 299_792_458.0
-
-    for ti in t:
-        astrometric = station.at(ti).observe(moon)
-
-        distance = astrometric.distance().km
-        distances_km.append(distance)
-
-        r_km, v_km_s = astrometric.position.km, astrometric.velocity.km_per_s
-        r_vec = np.array(r_km)
-        v_vec = np.array(v_km_s)
-
-        R_km = np.linalg.norm(r_vec)
-        r_hat = r_vec / R_km
-
-        Rdot_km_s = np.dot(v_vec, r_hat)
-        Rdot = Rdot_km_s * 1000.0
-        Rdot_m_s.append(Rdot)
-
-        doppler = -2.0 * (Rdot / c) * FREQ_HZ
-        doppler_Hz.append(doppler)
-
-        f_rx = FREQ_HZ + doppler
-        f_rx_Hz.append(f_rx)
-
-        alt, az, _ = astrometric.apparent().altaz()
-        moon_up.append(alt.degrees > 0.0)
+    distances_km, Rdot_m_s, doppler_Hz, alt_deg = compute_eme(t, station, moon)
+    f_rx_Hz = FREQ_HZ + doppler_Hz
+    moon_up = alt_deg > 0.0
 
     return (
         seconds,                          # time offsets (s) from "now"
-        np.array(distances_km),
-        np.array(Rdot_m_s),
-        np.array(doppler_Hz),
-        np.array(f_rx_Hz),
-        np.array(moon_up),
+        distances_km,
+        Rdot_m_s,
+        doppler_Hz,
+        f_rx_Hz,
+        moon_up,
     )
 
 # ========= NEU: Hilfsfunktion für Doppler an einem Zeitpunkt =========
 
 def _doppler_2way_for_time(t, earth, moon, station):
     """2-way Doppler in Hz für einen gegebenen Skyfield-Time t."""
-    astrometric = station.at(t).observe(moon)
-
-    r_km, v_km_s = astrometric.position.km, astrometric.velocity.km_per_s
-    r_vec = np.array(r_km)
-    v_vec = np.array(v_km_s)
-
-    R_km = np.linalg.norm(r_vec)
-    r_hat = r_vec / R_km
-    Rdot_km_s = np.dot(v_vec, r_hat)
-    Rdot_m_s = Rdot_km_s * 1000.0
-
-    c = 299_792_458.0
-    doppler_2way = -2.0 * (Rdot_m_s / c) * FREQ_HZ
-    return doppler_2way
+    return compute_eme(t, station, moon)[2]
 
 def doppler_change_at_utc(hour_utc, minute_utc=0, span_s=10.0):
     """
@@ -224,11 +237,7 @@ def doppler_change_at_utc(hour_utc, minute_utc=0, span_s=10.0):
       d_center_Hz     : Doppler exakt zur angegebenen Zeit
     """
 
-    ts = load.timescale()
-    eph = load('de440s.bsp')
-    earth = eph['earth']
-    moon  = eph['moon']
-    station = earth + wgs84.latlon(STATION_LAT, STATION_LON, elevation_m=STATION_ELV)
+    ts, eph, earth, moon, station = get_ephemeris()
 
     # Zeit genau am gewünschten UTC-Zeitpunkt
     center_dt = datetime(
@@ -237,17 +246,14 @@ def doppler_change_at_utc(hour_utc, minute_utc=0, span_s=10.0):
         tzinfo=timezone.utc
     )
 
-    # Zwei Zeitpunkte symmetrisch um center_dt
-    dt_before = center_dt - timedelta(seconds=span_s / 2.0)
-    dt_after  = center_dt + timedelta(seconds=span_s / 2.0)
-
-    t_before = ts.from_datetime(dt_before)
-    t_after  = ts.from_datetime(dt_after)
-    t_center = ts.from_datetime(center_dt)
+    # Drei Zeitpunkte (vorher, Mitte, nachher) in einem Aufruf
+    t = ts.from_datetimes([
+        center_dt - timedelta(seconds=span_s / 2.0),
+        center_dt,
+        center_dt + timedelta(seconds=span_s / 2.0),
+    ])
 
-    d_before_Hz = _doppler_2way_for_time(t_before, earth, moon, station)
-    d_after_Hz  = _doppler_2way_for_time(t_after, earth, moon, station)
-    d_center_Hz = _doppler_2way_for_time(t_center, earth, moon, station)
+    d_before_Hz, d_center_Hz, d_after_Hz = _doppler_2way_for_time(t, earth, moon, station)
 
     delta_doppler_Hz = d_after_Hz - d_before_Hz
     rate_Hz_per_s = delta_doppler_Hz / span_s
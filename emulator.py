@@ -0,0 +1,480 @@
+"""
+MD-01 and Pico coax switch emulator over pseudo-terminals (Linux/macOS).
+
+Each emulator opens a pty pair and serves the device protocol on it, so
+SerialAntenna, SerialSwitch and the whole Flask app can run without
+hardware:
+
+    python emulator.py
+    EXTRA_SERIAL_PORTS=/dev/pts/5,/dev/pts/6 python app.py
+
+MD-01 (SPID Rot2, 13-byte commands, 12-byte replies):
+    W  0000000000  0x1F 0x20   read position   -> position frame
+    W  0000000000  0x0F 0x20   stop            -> position frame
+    W  HHHH PH VVVV PV 0x2F 0x20   set position (H = PH * (360 + az))
+
+Pico (line based, as TXRXSwitcher/main.py):
+    SET S1_2            -> OK STATE S1=2 S2=1 S3=1
+    SET S1_2 S2_1 S3_1  -> OK STATE S1=2 S2=1 S3=1   (one coil pulse)
+    PRESET RX           -> OK STATE S1=2 S2=1 S3=1
+    STATUS              -> STATE S1=2 S2=1 S3=1
+    SYNC                -> SYNC <ticks_us>
+    ARM RX <ticks_us>   -> OK ARMED RX TARGET=<ticks_us> NOW=<ticks_us>
+    DISARM              -> OK DISARMED
+    TIMING              -> TIMING FIRED RX TARGET=<t> S1=<t> S2=<t> S3=<t>
+    (--legacy-pico: single SET only and no scheduled switching, as the
+     firmware before batching; it also prints "DEBUG set_switch: ..." and
+     "DEBUG pulsing GPIO Pin(...)" before every "OK STATE" reply)
+
+Timing is modelled with constant slew rates, a command-to-motion latency,
+the serial byte time at the configured baud rate and the relay latency;
+replies can optionally be corrupted to exercise resync / error paths.
+Rotator motion follows the injectable clock, so `--warp` matches an app
+started with CLOCK_WARP; byte and relay timing stay on the wall clock.
+"""
+
+from __future__ import annotations
+
+import abc
+import argparse
+import os
+import random
+import select
+import threading
+import time
+import tty
+from typing import Dict, Optional
+
+import clock
+
+# MD-01 defaults
+MD01_BAUD = 9600
+MD01_AZ_RATE = 3.0          # deg/s — azimuth slew rate
+MD01_EL_RATE = 2.0          # deg/s — elevation slew rate
+MD01_LATENCY = 0.2          # s     — SET received -> motion starts
+MD01_REPLY_DELAY = 0.01     # s     — controller processing time
+MD01_CMD_LEN = 13
+
+# Pico defaults
+PICO_BAUD = 115200
+PICO_RELAY_LATENCY = 0.06   # s — coil pulse (50 ms) + settling
+PICO_TICKS_PERIOD = 1 << 30 # time.ticks_us() wrap
+PICO_SPIN_S = 0.002         # s — busy-wait before an armed switch (as the firmware)
+PICO_COIL_PINS = {          # coil -> GPIO, as in TXRXSwitcher/main.py
+    "S1_1": 20, "S1_2": 21, "S2_1": 19, "S2_2": 18, "S3_1": 17, "S3_2": 16,
+}
+PICO_COIL_US = 3            # us — between two coils switched in one pulse
+
+
+class PtyEmulator(abc.ABC):
+    """
+    Base class: owns a pty pair and a worker thread serving the master side.
+
+    `port` is the slave device path to hand to pyserial.
+    """
+
+    def __init__(self, baud: int, corrupt_prob: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        self.baud = baud
+        self.corrupt_prob = corrupt_prob
+        self.rng = random.Random(seed)
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "PtyEmulator":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                ready, _, _ = select.select([self._master], [], [], 0.1)
+                if not ready:
+                    continue
+                data = os.read(self._master, 256)
+            except OSError:
+                return
+            self.bytes_in += len(data)
+            self.on_data(data)
+
+    @abc.abstractmethod
+    def on_data(self, data: bytes) -> None:
+        """Handle bytes written by the host to the slave side."""
+
+    def byte_time(self, n: int) -> float:
+        """Time to send n bytes (8N1: 10 bits per byte)."""
+        return n * 10.0 / self.baud
+
+    def send(self, data: bytes, delay: float = 0.0) -> None:
+        """Write a reply after `delay` plus its transmission time."""
+        if self.corrupt_prob and self.rng.random() < self.corrupt_prob:
+            data = self._corrupt(data)
+        time.sleep(delay + self.byte_time(len(data)))
+        try:
+            os.write(self._master, data)
+        except OSError:
+            return
+        self.bytes_out += len(data)
+
+    def _corrupt(self, data: bytes) -> bytes:
+        buf = bytearray(data)
+        kind = self.rng.choice(("flip", "drop", "garbage"))
+        i = self.rng.randrange(len(buf))
+        if kind == "flip":
+            buf[i] ^= 1 << self.rng.randrange(8)
+        elif kind == "drop":
+            del buf[i]
+        else:
+            buf[i:i] = bytes(self.rng.randrange(256) for _ in range(self.rng.randint(1, 4)))
+        return bytes(buf)
+
+
+class Md01Emulator(PtyEmulator):
+    """
+    SPID MD-01 controller with a rotator that slews at constant rates.
+
+    Angles are controller angles (what read_md01_position returns).
+    """
+
+    def __init__(self, az: float = 0.0, el: float = 90.0,
+                 az_rate: float = MD01_AZ_RATE, el_rate: float = MD01_EL_RATE,
+                 latency: float = MD01_LATENCY, baud: int = MD01_BAUD,
+                 reply_delay: float = MD01_REPLY_DELAY, **kwargs) -> None:
+        super().__init__(baud, **kwargs)
+        self.az_rate = az_rate
+        self.el_rate = el_rate
+        self.latency = latency
+        self.reply_delay = reply_delay
+
+        self._lock = threading.Lock()
+        self._az = float(az)
+        self._el = float(el)
+        self._target = (self._az, self._el)
+        self._move_at = 0.0         # clock time the current motion starts
+        self._t_update = clock.time()
+        self._buf = bytearray()
+
+        self.reads = 0
+        self.sets = 0
+        self.stops = 0
+
+    # Motion model
+
+    def _advance(self, now: float) -> None:
+        t0 = max(self._t_update, self._move_at)
+        dt = max(0.0, now - t0)
+        self._t_update = now
+        if dt == 0.0:
+            return
+
+        def step(cur: float, tgt: float, rate: float) -> float:
+            d = tgt - cur
+            s = rate * dt
+            return tgt if abs(d) <= s else cur + (s if d > 0 else -s)
+
+        self._az = step(self._az, self._target[0], self.az_rate)
+        self._el = step(self._el, self._target[1], self.el_rate)
+
+    def position(self) -> tuple:
+        with self._lock:
+            self._advance(clock.time())
+            return self._az, self._el
+
+    def set_target(self, az: float, el: float) -> None:
+        with self._lock:
+            now = clock.time()
+            self._advance(now)
+            self._target = (az, el)
+            self._move_at = now + self.latency
+
+    def halt(self) -> None:
+        with self._lock:
+            self._advance(clock.time())
+            self._target = (self._az, self._el)
+
+    # Protocol
+
+    @staticmethod
+    def encode_frame(az: float, el: float) -> bytes:
+        """12-byte position reply: raw digits of (angle + 360) in 0.1 deg."""
+        def digits(angle: float) -> list:
+            v = int(round((angle + 360.0) * 10))
+            return [v // 1000 % 10, v // 100 % 10, v // 10 % 10, v % 10]
+
+        return bytes([0x57] + digits(az) + [10] + digits(el) + [10, 0x20])
+
+    def on_data(self, data: bytes) -> None:
+        self._buf += data
+        while True:
+            start = self._buf.find(0x57)
+            if start < 0:
+                self._buf.clear()
+                return
+            del self._buf[:start]
+            if len(self._buf) < MD01_CMD_LEN:
+                return
+            cmd = bytes(self._buf[:MD01_CMD_LEN])
+            if cmd[-1] != 0x20:
+                del self._buf[0]        # not a command start, resync
+                continue
+            del self._buf[:MD01_CMD_LEN]
+            self._handle(cmd)
+
+    def _handle(self, cmd: bytes) -> None:
+        k = cmd[11]
+        if k == 0x1F:
+            self.reads += 1
+            self.send(self.encode_frame(*self.position()), self.reply_delay)
+        elif k == 0x0F:
+            self.stops += 1
+            self.halt()
+            self.send(self.encode_frame(*self.position()), self.reply_delay)
+        elif k == 0x2F:
+            try:
+                h = int(cmd[1:5].decode("ascii"))
+                v = int(cmd[6:10].decode("ascii"))
+            except ValueError:
+                return
+            ph = cmd[5] or 1
+            pv = cmd[10] or 1
+            self.sets += 1
+            self.set_target(h / ph - 360.0, v / pv - 360.0)
+
+
+class PicoEmulator(PtyEmulator):
+    """Pico coax switch: three latching relays S1..S3."""
+
+    PRESETS = {
+        "TX": {"S1": "1", "S2": "2", "S3": "2"},
+        "RX": {"S1": "2", "S2": "1", "S3": "1"},
+    }
+
+    def __init__(self, relay_latency: float = PICO_RELAY_LATENCY,
+                 baud: int = PICO_BAUD, debug_lines: Optional[bool] = None,
+                 legacy: bool = False, **kwargs) -> None:
+        super().__init__(baud, **kwargs)
+        self.relay_latency = relay_latency
+        # The old firmware's DEBUG prints; by default only the legacy firmware has them
+        self.debug_lines = legacy if debug_lines is None else debug_lines
+        self.legacy = legacy            # no batched SET / PRESET
+        self.commands = 0
+        self.switches: Dict[str, str] = {"S1": "1", "S2": "1", "S3": "1"}
+        self._buf = bytearray()
+
+        # ticks_us() starts at a random point, so hosts must really sync
+        self._tick0 = self.rng.randrange(PICO_TICKS_PERIOD)
+        self._armed: Optional[threading.Timer] = None
+        self._armed_at: Optional[tuple] = None      # (preset, target ticks)
+        self._last_fire: Dict[str, object] = {"preset": None, "target": None, "coils": {}}
+        self._lock = threading.Lock()
+
+    def state_string(self) -> str:
+        return "STATE " + " ".join(f"{k}={v}" for k, v in self.switches.items())
+
+    def ticks_us(self) -> int:
+        return (self._tick0 + int(time.monotonic() * 1e6)) % PICO_TICKS_PERIOD
+
+    def _ticks_until(self, target: int) -> int:
+        d = (target - self.ticks_us()) % PICO_TICKS_PERIOD
+        return d - PICO_TICKS_PERIOD if d >= PICO_TICKS_PERIOD // 2 else d
+
+    def _switch(self, targets: Dict[str, str], preset: Optional[str] = None,
+                target: Optional[int] = None) -> None:
+        now = self.ticks_us()
+        with self._lock:
+            self.switches.update(targets)
+            self._last_fire = {
+                "preset": preset, "target": target,
+                "coils": {sid: (now + i * PICO_COIL_US) % PICO_TICKS_PERIOD
+                          for i, sid in enumerate(sorted(targets))},
+            }
+
+    def _fire_armed(self) -> None:
+        with self._lock:
+            if self._armed_at is None:
+                return
+            name, target = self._armed_at
+        while self._ticks_until(target) > 0:
+            pass
+        with self._lock:
+            if self._armed_at != (name, target):
+                return                  # disarmed / re-armed meanwhile
+            self._armed_at = None
+        self._switch(self.PRESETS[name], name, target)
+
+    def _disarm(self) -> None:
+        with self._lock:
+            self._armed_at = None
+            if self._armed is not None:
+                self._armed.cancel()
+                self._armed = None
+
+    def timing_string(self) -> str:
+        with self._lock:
+            if self._armed_at is not None:
+                return f"TIMING ARMED {self._armed_at[0]} TARGET={self._armed_at[1]}"
+            fire = self._last_fire
+        if not fire["coils"]:
+            return "TIMING NONE"
+        parts = ["TIMING FIRED", fire["preset"] or "SET"]
+        if fire["target"] is not None:
+            parts.append(f"TARGET={fire['target']}")
+        parts += [f"{k}={v}" for k, v in sorted(fire["coils"].items())]
+        return " ".join(parts)
+
+    def _handle_timed(self, line: str) -> None:
+        if line == "SYNC":
+            self._reply(f"SYNC {self.ticks_us()}")
+        elif line == "TIMING":
+            self._reply(self.timing_string())
+        elif line == "DISARM":
+            self._disarm()
+            self._reply("OK DISARMED")
+        else:                           # ARM <preset> <ticks_us>
+            try:
+                _, name, target = line.split()
+                target = int(target) % PICO_TICKS_PERIOD
+            except ValueError:
+                self._reply("ERROR Format")
+                return
+            if name not in self.PRESETS:
+                self._reply("ERROR Invalid preset")
+                return
+            self._disarm()
+            delay = max(0.0, self._ticks_until(target) / 1e6 - PICO_SPIN_S)
+            with self._lock:
+                self._armed_at = (name, target)
+                self._armed = threading.Timer(delay, self._fire_armed)
+                self._armed.daemon = True
+                self._armed.start()
+            self._reply(f"OK ARMED {name} TARGET={target} NOW={self.ticks_us()}")
+
+    def on_data(self, data: bytes) -> None:
+        self._buf += data
+        while b"\n" in self._buf:
+            line, _, rest = bytes(self._buf).partition(b"\n")
+            self._buf = bytearray(rest)
+            self._handle(line.decode(errors="ignore").strip().upper())
+
+    def _reply(self, text: str, delay: float = 0.0) -> None:
+        self.send((text + "\r\n").encode("ascii"), delay)
+
+    def _handle(self, line: str) -> None:
+        if not line:
+            return
+        self.commands += 1
+        if line == "STATUS":
+            self._reply(self.state_string())
+            return
+        if not self.legacy and (line in ("SYNC", "TIMING", "DISARM")
+                                or line.startswith("ARM ")):
+            self._handle_timed(line)
+            return
+        if line.startswith("PRESET ") and not self.legacy:
+            name = line.split()[-1]
+            targets = self.PRESETS.get(name)
+            if targets is None:
+                self._reply("ERROR Invalid preset")
+                return
+            self._switch(targets, name)
+            self._reply("OK " + self.state_string(), self.relay_latency)
+            return
+        if not line.startswith("SET "):
+            return                      # firmware ignores unknown input
+
+        tokens = line.split()[1:]
+        if self.legacy and len(tokens) != 1:
+            self._reply("ERROR Format")
+            return
+        targets = {}
+        try:
+            for tok in tokens:
+                sid, side = tok.split("_")
+                if sid not in self.switches or side not in ("1", "2"):
+                    self._reply("ERROR Invalid switch")
+                    return
+                targets[sid] = side
+        except ValueError:
+            self._reply("ERROR Format")
+            return
+        if not targets:
+            self._reply("ERROR Format")
+            return
+
+        if self.debug_lines:
+            for sid, side in targets.items():
+                pin = f"{sid}_{side}"
+                self._reply(f"DEBUG set_switch: {sid} {side} pin: {pin}")
+                self._reply(f"DEBUG pulsing GPIO Pin(GPIO{PICO_COIL_PINS[pin]}, mode=OUT)")
+        self._switch(targets)
+        # All coils are pulsed together: one relay latency per command
+        self._reply("OK " + self.state_string(), self.relay_latency)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="MD-01 / Pico emulator on ptys")
+    parser.add_argument("--az", type=float, default=0.0, help="initial controller azimuth")
+    parser.add_argument("--el", type=float, default=90.0, help="initial elevation")
+    parser.add_argument("--az-rate", type=float, default=MD01_AZ_RATE)
+    parser.add_argument("--el-rate", type=float, default=MD01_EL_RATE)
+    parser.add_argument("--latency", type=float, default=MD01_LATENCY)
+    parser.add_argument("--baud", type=int, default=MD01_BAUD)
+    parser.add_argument("--relay-latency", type=float, default=PICO_RELAY_LATENCY)
+    parser.add_argument("--legacy-pico", action="store_true",
+                        help="Pico firmware without batched SET / PRESET / ARM")
+    parser.add_argument("--corrupt", type=float, default=0.0,
+                        help="probability that a reply is corrupted")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--warp", type=float, default=None,
+                        help="simulated clock speed-up (use the app's CLOCK_WARP)")
+    args = parser.parse_args()
+
+    if args.warp:
+        clock.set_clock(clock.SimClock(warp=args.warp))
+
+    md01 = Md01Emulator(
+        az=args.az, el=args.el, az_rate=args.az_rate, el_rate=args.el_rate,
+        latency=args.latency, baud=args.baud,
+        corrupt_prob=args.corrupt, seed=args.seed,
+    ).start()
+    pico = PicoEmulator(
+        relay_latency=args.relay_latency, legacy=args.legacy_pico,
+        corrupt_prob=args.corrupt, seed=args.seed,
+    ).start()
+
+    print(f"MD-01: {md01.port}")
+    print(f"Pico : {pico.port}")
+    print(f"EXTRA_SERIAL_PORTS={md01.port},{pico.port}")
+    try:
+        while True:
+            time.sleep(5)
+            az, el = md01.position()
+            print(f"az={az:7.1f} el={el:5.1f}  reads={md01.reads} sets={md01.sets} "
+                  f"stops={md01.stops}  switches={pico.state_string()}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        md01.stop()
+        pico.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+EME pass planner.
+
+Finds every window in the next N days in which the Moon is above an
+elevation limit:
+
+    1. coarse altitude samples over the whole horizon (one call)
+    2. bisection of all threshold crossings at once (one call per step)
+    3. per-window statistics from a 1-minute sampling (one call)
+
+Crossings use CalcMoonPos's convention (refracted upper limb, as ephem's
+next_rising), so windows start and end at the times /status shows; the
+statistics come from the vectorized Skyfield engine in dopplerTry2.
+
+Results are cached, so repeated queries are answered from memory.
+"""
+
+from __future__ import annotations
+
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import CalcMoonPos
+import clock
+from dopplerTry2 import C_M_S, compute_eme, get_ephemeris, unix_to_time
+
+COARSE_STEP_S = 600.0       # altitude sampling before refinement
+REFINE_TOL_S = 1.0          # bisection stops below this bracket width
+STATS_STEP_S = 60.0         # sampling inside a window for peak/range/Doppler
+CACHE_EXTRA_S = 86400.0     # plan this much further than asked, to reuse the cache
+
+
+def _altitude(t_unix: np.ndarray) -> np.ndarray:
+    return CalcMoonPos.get_moon_limb_altitude(np.atleast_1d(t_unix))
+
+
+def _iso(t_unix: float) -> str:
+    return datetime.fromtimestamp(t_unix, tz=timezone.utc).isoformat()
+
+
+def find_windows(t_start: float, t_end: float, min_el_deg: float) -> List[tuple]:
+    """
+    Return [(rise, set), ...] Unix timestamps of all windows with the Moon
+    above min_el_deg between t_start and t_end.
+
+    Windows already open at t_start start at t_start, windows still open at
+    t_end end at t_end.
+    """
+    n = int(np.ceil((t_end - t_start) / COARSE_STEP_S)) + 1
+    t = np.linspace(t_start, t_end, n)
+    above = _altitude(t) >= min_el_deg
+
+    # Brackets [lo, hi] around every change of the above/below state
+    idx = np.flatnonzero(above[1:] != above[:-1])
+    lo = t[idx]
+    hi = t[idx + 1]
+    rising = above[idx + 1]
+
+    # Bisect all brackets together
+    while len(lo) and np.max(hi - lo) > REFINE_TOL_S:
+        mid = (lo + hi) / 2
+        mid_above = _altitude(mid) >= min_el_deg
+        crossed = mid_above == rising
+        hi = np.where(crossed, mid, hi)
+        lo = np.where(crossed, lo, mid)
+
+    crossings = (lo + hi) / 2
+    rises = list(crossings[rising])
+    sets = list(crossings[~rising])
+
+    if above[0]:
+        rises.insert(0, t_start)
+    if above[-1]:
+        sets.append(t_end)
+
+    return list(zip(rises, sets))
+
+
+def window_stats(windows: List[tuple]) -> List[Dict[str, Any]]:
+    """
+    Peak elevation, range, Doppler and echo delay for each (rise, set) window.
+
+    All windows are sampled at STATS_STEP_S in a single engine call.
+    """
+    if not windows:
+        return []
+
+    samples = [np.append(np.arange(rise, set_, STATS_STEP_S), set_) for rise, set_ in windows]
+    bounds = np.cumsum([0] + [len(s) for s in samples])
+    t_all = np.concatenate(samples)
+
+    ctx = get_ephemeris()
+    dist_km, _, doppler_hz, alt_deg = compute_eme(unix_to_time(t_all), ctx.station, ctx.moon)
+
+    passes = []
+    for (rise, set_), a, b in zip(windows, bounds[:-1], bounds[1:]):
+        t = t_all[a:b]
+        d = dist_km[a:b]
+        f = doppler_hz[a:b]
+        el = alt_deg[a:b]
+        k = int(np.argmax(el))
+        passes.append(
+            {
+                "start": _iso(rise),
+                "end": _iso(set_),
+                "start_ts": float(rise),
+                "end_ts": float(set_),
+                "duration_s": round(float(set_ - rise), 1),
+                "peak_el_deg": round(float(el[k]), 2),
+                "peak_time": _iso(float(t[k])),
+                "range_min_km": round(float(d.min()), 1),
+                "range_max_km": round(float(d.max()), 1),
+                "doppler_min_hz": round(float(f.min()), 1),
+                "doppler_max_hz": round(float(f.max()), 1),
+                "doppler_span_hz": round(float(f.max() - f.min()), 1),
+                "echo_delay_min_s": round(float(2e3 * d.min() / C_M_S), 6),
+                "echo_delay_max_s": round(float(2e3 * d.max() / C_M_S), 6),
+            }
+        )
+    return passes
+
+
+class PassPlanner:
+    """
+    Cached pass plan.
+
+    The plan is computed once for `days + 1` days and reused for every query
+    that is still covered by it; passes that ended are dropped on the fly.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._min_el: Optional[float] = None
+        self._t_start = 0.0
+        self._t_end = 0.0
+        self._passes: List[Dict[str, Any]] = []
+
+    def plan(self, days: float = 7.0, min_el_deg: float = 15.0,
+             now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Return all passes above min_el_deg from now until now + days."""
+        now = clock.time() if now is None else now
+        t_end = now + days * 86400.0
+
+        with self._lock:
+            if self._min_el != min_el_deg or now < self._t_start or t_end > self._t_end:
+                self._t_start = now
+                self._t_end = t_end + CACHE_EXTRA_S
+                self._min_el = min_el_deg
+                windows = find_windows(self._t_start, self._t_end, min_el_deg)
+                self._passes = window_stats(windows)
+            passes = self._passes
+
+        return [p for p in passes if p["end_ts"] > now and p["start_ts"] < t_end]
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._min_el = None
+
+
+# Shared planner used by the web app
+planner = PassPlanner()
@@ -0,0 +1,266 @@
+"""
+Auto-discovery of the Pico coax switch and the MD-01 controller.
+
+Every candidate port is probed in its own worker thread, so a full scan
+takes about one probe timeout no matter how many ports there are:
+
+    Pico  : 115200 baud, "STATUS\\r\\n"      -> "STATE S1=.. S2=.. S3=.."
+    MD-01 :   9600 baud, SPID Rot2 read      -> 12-byte 0x57 ... 0x20 frame
+
+The Pico is asked first (unless the port registry guessed MD-01), because
+the Rot2 bytes would sit in the Pico's line buffer and spoil the next
+command. Ports in use by a connected device are never opened.
+
+Results are cached by USB serial number, so a device that moved to
+another port name after a replug is recognised without probing it again.
+The cache can be persisted to a JSON file.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import serial
+
+from portRegistry import ROLE_MD01, ROLE_PICO, PortRegistry
+
+PROBE_TIMEOUT_S = 0.5       # s — per protocol and port (a silent port costs 2x)
+PROBE_WORKERS = 16          # max. ports probed at the same time
+
+PICO_BAUD = 115200
+MD01_BAUD = 9600
+MD01_READ_CMD = bytes([0x57] + [0] * 10 + [0x1F, 0x20])
+MD01_FRAME_LEN = 12
+
+
+def probe_pico(port: str, timeout: float = PROBE_TIMEOUT_S) -> Dict[str, str]:
+    """
+    Open 'port', send STATUS, and verify we get a Pico-style reply:
+
+        STATE S1=1 S2=2 S3=1
+
+    Returns a switches dict like {"S1": "1", "S2": "1", "S3": "1"}
+    or raises RuntimeError if the port is not our Pico.
+    """
+    ser = None
+    try:
+        ser = serial.Serial(port, baudrate=PICO_BAUD, timeout=0.3)
+
+        # Flush any garbage / boot messages
+        try:
+            ser.reset_input_buffer()
+            ser.reset_output_buffer()
+        except Exception:
+            pass
+
+        ser.write(b"STATUS\r\n")
+        ser.flush()
+
+        t0 = time.time()
+        switches: Dict[str, str] = {}
+
+        while time.time() - t0 < timeout:
+            line = ser.readline()
+            if not line:
+                continue
+
+            text = line.decode(errors="ignore").strip().upper()
+
+            # Ignore banners / unrelated output
+            if not text.startswith("STATE "):
+                continue
+
+            # Expect: STATE S1=1 S2=2 S3=1
+            for part in text.split()[1:]:
+                if "=" not in part:
+                    continue
+                k, v = part.split("=", 1)
+                if k in ("S1", "S2", "S3") and v in ("1", "2"):
+                    switches[k] = v
+
+            if {"S1", "S2", "S3"} <= set(switches.keys()):
+                return switches
+
+            raise RuntimeError(f"Bad STATE line on {port!r}: {text!r}")
+
+        raise RuntimeError(f"No STATE reply within timeout on {port!r}")
+
+    finally:
+        if ser is not None:
+            try:
+                ser.close()
+            except Exception:
+                pass
+
+
+def probe_md01(port: str, timeout: float = PROBE_TIMEOUT_S) -> Tuple[float, float]:
+    """
+    Send one Rot2 read to 'port' and wait for a position frame.
+
+    Returns the controller (az, el) or raises RuntimeError.
+    """
+    with serial.Serial(port, baudrate=MD01_BAUD, timeout=0.05) as ser:
+        ser.reset_input_buffer()
+        ser.write(MD01_READ_CMD)
+
+        deadline = time.monotonic() + timeout
+        buf = bytearray()
+        while time.monotonic() < deadline:
+            buf += ser.read(MD01_FRAME_LEN)
+            start = buf.find(0x57)
+            if start < 0:
+                buf.clear()
+                continue
+            del buf[:start]
+            if len(buf) >= MD01_FRAME_LEN:
+                if buf[MD01_FRAME_LEN - 1] == 0x20:
+                    f = buf
+                    az = f[1] * 100 + f[2] * 10 + f[3] + f[4] / 10.0 - 360
+                    el = f[6] * 100 + f[7] * 10 + f[8] + f[9] / 10.0 - 360
+                    return az, el
+                del buf[0]          # not a frame start, resync
+
+    raise RuntimeError(f"No Rot2 frame within timeout on {port!r}")
+
+
+PROBES = {ROLE_PICO: probe_pico, ROLE_MD01: probe_md01}
+
+
+class PortDiscovery:
+    """
+    Finds which port is the Pico and which the MD-01.
+
+    scan() returns
+        {"pico": [ports], "md01": [ports],
+         "ports": {device: {"role", "source", "serial_number", "detail"}},
+         "elapsed_s": float}
+    where source is "probe", "cache" (known USB serial number) or "in use".
+    """
+
+    def __init__(self, ports: PortRegistry, timeout: float = PROBE_TIMEOUT_S,
+                 max_workers: int = PROBE_WORKERS,
+                 cache_path: Optional[str] = None) -> None:
+        self.port_registry = ports
+        self.timeout = float(timeout)
+        self.max_workers = int(max_workers)
+        self.cache_path = cache_path
+        self.last_scan: Optional[Dict[str, Any]] = None
+
+        self._cache: Dict[str, str] = {}        # USB serial number -> role
+        self._lock = threading.Lock()
+        self._load()
+
+    # --------------------------------------------------------------------- #
+    # Serial-number cache
+    # --------------------------------------------------------------------- #
+
+    def _load(self) -> None:
+        if not (self.cache_path and os.path.exists(self.cache_path)):
+            return
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                data = json.load(f)
+            self._cache = {str(k): str(v) for k, v in data.items() if v in PROBES}
+        except (OSError, ValueError):
+            self._cache = {}
+
+    def _save(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            with open(self.cache_path, "w", encoding="utf-8") as f:
+                json.dump(self._cache, f, indent=2, sort_keys=True)
+        except OSError:
+            pass
+
+    def remember(self, serial_number: Optional[str], role: str) -> None:
+        """Record the role of a USB device (also used after manual connects)."""
+        if not serial_number:
+            return
+        with self._lock:
+            if self._cache.get(serial_number) == role:
+                return
+            self._cache[serial_number] = role
+            self._save()
+
+    def forget(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._save()
+
+    @property
+    def cache(self) -> Dict[str, str]:
+        return dict(self._cache)
+
+    # --------------------------------------------------------------------- #
+    # Scan
+    # --------------------------------------------------------------------- #
+
+    def _probe(self, device: str, hint: Optional[str]) -> Tuple[Optional[str], Any]:
+        """Try both protocols (hinted one first); returns (role, detail)."""
+        order = [ROLE_MD01, ROLE_PICO] if hint == ROLE_MD01 else [ROLE_PICO, ROLE_MD01]
+        errors = []
+        for role in order:
+            try:
+                return role, PROBES[role](device, self.timeout)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(f"{role}: {exc}")
+        return None, "; ".join(errors)
+
+    def scan(self, in_use: Optional[Dict[str, str]] = None,
+             use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Probe all candidate ports concurrently.
+
+        in_use    : {device: role} of ports held by connected devices (not opened)
+        use_cache : False probes ports even when their serial number is known
+        """
+        t0 = time.monotonic()
+        in_use = in_use or {}
+        result: Dict[str, Dict[str, Any]] = {}
+        todo: List[Any] = []
+
+        for info in self.port_registry.all():
+            entry = {"role": None, "source": None,
+                     "serial_number": info.serial_number, "detail": None}
+            result[info.device] = entry
+            if info.device in in_use:
+                entry.update(role=in_use[info.device], source="in use")
+            elif use_cache and info.serial_number in self._cache:
+                entry.update(role=self._cache[info.serial_number], source="cache")
+            else:
+                todo.append(info)
+
+        if todo:
+            pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(todo)),
+                                      thread_name_prefix="port-probe")
+            futures = {pool.submit(self._probe, i.device, i.role): i for i in todo}
+            # Every probe is bounded by 2 x timeout; never wait much longer
+            done, _ = wait(futures, timeout=2 * self.timeout + 1.0)
+            pool.shutdown(wait=False)
+
+            for fut, info in futures.items():
+                entry = result[info.device]
+                entry["source"] = "probe"
+                if fut not in done:
+                    entry["detail"] = "probe timed out"
+                    continue
+                role, detail = fut.result()
+                entry.update(role=role, detail=detail)
+                if role:
+                    self.remember(info.serial_number, role)
+
+        scan = {
+            ROLE_PICO: [d for d, e in result.items() if e["role"] == ROLE_PICO],
+            ROLE_MD01: [d for d, e in result.items() if e["role"] == ROLE_MD01],
+            "ports": result,
+            "elapsed_s": round(time.monotonic() - t0, 3),
+        }
+        self.last_scan = scan
+        return scan
+
@@ -0,0 +1,215 @@
+"""
+Serial port registry.
+
+serial.tools.list_ports.comports() walks sysfs (or the registry on
+Windows) and can take tens of milliseconds, so the ports are enumerated
+once and kept in memory together with their USB descriptors. The list is
+refreshed
+
+    - on hotplug events, when pyudev is installed (Linux), and
+    - every PORT_REFRESH_S seconds by a background thread otherwise
+      (and as a safety net with pyudev),
+
+so page renders only read the cache. Every port gets a role guess from
+its USB vendor id, which lets the UI tell the MD-01 from the Pico.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import serial.tools.list_ports
+
+try:  # optional: hotplug events on Linux
+    import pyudev
+except ImportError:  # pragma: no cover - depends on the platform
+    pyudev = None
+
+PORT_REFRESH_S = 30.0       # s — background re-enumeration period
+HOTPLUG_SETTLE_S = 0.5      # s — wait after a udev event until sysfs is complete
+
+# USB vendor ids used for the role guess
+PICO_VID = 0x2E8A           # Raspberry Pi (RP2040, MicroPython USB CDC)
+USB_SERIAL_VIDS = {         # USB-RS232 bridges in front of an MD-01
+    0x0403: "FTDI",
+    0x067B: "Prolific",
+    0x10C4: "Silicon Labs",
+    0x1A86: "WCH",
+}
+
+ROLE_PICO = "pico"
+ROLE_MD01 = "md01"
+
+
+@dataclass(frozen=True)
+class PortInfo:
+    """Cached descriptor of one serial port."""
+
+    device: str
+    description: str = ""
+    hwid: str = ""
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    manufacturer: Optional[str] = None
+    product: Optional[str] = None
+    location: Optional[str] = None
+    role: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = asdict(self)
+        d["vid"] = f"{self.vid:04X}" if self.vid is not None else None
+        d["pid"] = f"{self.pid:04X}" if self.pid is not None else None
+        return d
+
+
+def guess_role(vid: Optional[int]) -> Optional[str]:
+    """'pico' for a Raspberry Pi vendor id, 'md01' for a USB-serial bridge."""
+    if vid == PICO_VID:
+        return ROLE_PICO
+    if vid in USB_SERIAL_VIDS:
+        return ROLE_MD01
+    return None
+
+
+def enumerate_ports(extra_ports: Iterable[str] = ()) -> Dict[str, PortInfo]:
+    """One full enumeration (slow path); extra ports have no descriptors."""
+    ports: Dict[str, PortInfo] = {}
+    for p in serial.tools.list_ports.comports():
+        ports[p.device] = PortInfo(
+            device=p.device,
+            description=p.description or "",
+            hwid=p.hwid or "",
+            vid=p.vid,
+            pid=p.pid,
+            serial_number=p.serial_number,
+            manufacturer=p.manufacturer,
+            product=p.product,
+            location=p.location,
+            role=guess_role(p.vid),
+        )
+    for dev in extra_ports:
+        if dev not in ports:
+            ports[dev] = PortInfo(device=dev, description="extra port")
+    return ports
+
+
+class PortRegistry:
+    """
+    In-memory list of serial ports, kept up to date by a background thread.
+
+    Subscribers are called as callback(ports) from the refresh thread when
+    the set of ports or one of their descriptors changed.
+    """
+
+    def __init__(self, extra_ports: Iterable[str] = (),
+                 refresh_s: float = PORT_REFRESH_S) -> None:
+        self.extra_ports = list(extra_ports)
+        self.refresh_s = float(refresh_s)
+        self.refreshes = 0
+        self.hotplug = False            # True while pyudev events are used
+
+        self._ports: Optional[Dict[str, PortInfo]] = None
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[Dict[str, PortInfo]], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --------------------------------------------------------------------- #
+    # Background refresh
+    # --------------------------------------------------------------------- #
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.refresh_s + 1.0)
+        self._thread = None
+
+    def _run(self) -> None:
+        self.refresh()
+        monitor = self._udev_monitor()
+        while not self._stop.is_set():
+            if monitor is not None:
+                # Blocks until a tty is added / removed, or the timer expires
+                try:
+                    device = monitor.poll(timeout=self.refresh_s)
+                except Exception:  # noqa: BLE001
+                    monitor = None
+                    self.hotplug = False
+                    continue
+                if device is not None and self._stop.wait(HOTPLUG_SETTLE_S):
+                    return
+            elif self._stop.wait(self.refresh_s):
+                return
+            self.refresh()
+
+    def _udev_monitor(self):
+        if pyudev is None:
+            return None
+        try:
+            monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+            monitor.filter_by(subsystem="tty")
+            monitor.start()
+        except Exception:  # noqa: BLE001
+            return None
+        self.hotplug = True
+        return monitor
+
+    # --------------------------------------------------------------------- #
+    # Cache
+    # --------------------------------------------------------------------- #
+
+    def refresh(self) -> Dict[str, PortInfo]:
+        """Enumerate now; subscribers hear about it if anything changed."""
+        ports = enumerate_ports(self.extra_ports)
+        with self._lock:
+            changed = ports != self._ports
+            self._ports = ports
+            self.refreshes += 1
+        if changed:
+            for cb in list(self._subscribers):
+                try:
+                    cb(ports)
+                except Exception:  # noqa: BLE001
+                    pass
+        return ports
+
+    def _cached(self) -> Dict[str, PortInfo]:
+        ports = self._ports
+        return ports if ports is not None else self.refresh()
+
+    def ports(self) -> List[str]:
+        """Device names for the port dropdowns."""
+        return list(self._cached())
+
+    def info(self, device: str) -> Optional[PortInfo]:
+        return self._cached().get(device)
+
+    def all(self) -> List[PortInfo]:
+        return list(self._cached().values())
+
+    def roles(self) -> Dict[str, str]:
+        """device -> guessed role, for ports with a guess."""
+        return {d: p.role for d, p in self._cached().items() if p.role}
+
+    def find(self, role: str) -> List[str]:
+        """Ports whose role guess is `role`."""
+        return [d for d, p in self._cached().items() if p.role == role]
+
+    def subscribe(self, callback: Callable[[Dict[str, PortInfo]], None]) -> None:
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Dict[str, PortInfo]], None]) -> None:
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
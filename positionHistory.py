@@ -0,0 +1,108 @@
+"""
+Position history of the MD-01.
+
+Fixed-size ring buffer backed by one numpy array, fed by the position
+telemetry. Each row holds the antenna position, the Moon position at the
+same instant and the pointing error, so a whole pass can be plotted without
+the browser rebuilding the history from /status polls. Memory use is fixed
+by the capacity, no matter how long the app runs.
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from tracking import ang_err
+
+HISTORY_CAPACITY = 200_000   # rows; ~27 h at 0.5 s telemetry, ~11 MB
+
+# Column layout of every row
+COLUMNS = ("t", "az", "el", "az_moon", "el_moon", "err_az", "err_el")
+
+# Binary payload: header followed by rows x columns little-endian float32.
+# Float32 cannot hold a Unix timestamp to the second, so the "t" column is
+# sent as seconds relative to t_base from the header.
+BINARY_MAGIC = b"PHST"
+BINARY_HEADER = struct.Struct("<4sIId")     # magic, rows, columns, t_base
+BINARY_MIMETYPE = "application/octet-stream"
+
+
+class PositionHistory:
+    """
+    Ring buffer of position samples.
+
+    append() is called from the telemetry thread, query() from request
+    handlers; both take the same lock, query() returns a copy.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CAPACITY) -> None:
+        self.capacity = int(capacity)
+        self._data = np.zeros((self.capacity, len(COLUMNS)), dtype=np.float64)
+        self._head = 0          # next row to write
+        self._count = 0         # valid rows (<= capacity)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, t: float, az: float, el: float,
+               az_moon: float, el_moon: float) -> None:
+        """Store one sample; the pointing error is Moon minus antenna."""
+        err_az = ang_err(az_moon % 360.0, az % 360.0)
+        err_el = el_moon - el
+        with self._lock:
+            self._data[self._head] = (t, az, el, az_moon, el_moon, err_az, err_el)
+            self._head = (self._head + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._head = 0
+            self._count = 0
+
+    def query(self, since: Optional[float] = None, decimate: int = 1) -> np.ndarray:
+        """
+        Rows in time order, optionally only those with t > since and only
+        every `decimate`-th row. Returns a (rows, len(COLUMNS)) copy.
+        """
+        decimate = max(1, int(decimate))
+        with self._lock:
+            start = (self._head - self._count) % self.capacity
+            idx = (start + np.arange(self._count)) % self.capacity
+            if since is not None:
+                # Rows are stored in time order, so a binary search finds the cut
+                first = int(np.searchsorted(self._data[idx, 0], since, side="right"))
+                idx = idx[first:]
+            return self._data[idx[::decimate]].copy()
+
+
+def to_json(rows: np.ndarray) -> Dict[str, Any]:
+    """Column-wise JSON payload (times relative to t_base, angles rounded)."""
+    t_base = float(rows[0, 0]) if len(rows) else 0.0
+    payload: Dict[str, Any] = {
+        "columns": list(COLUMNS),
+        "rows": int(len(rows)),
+        "t_base": t_base,
+        "t_last": float(rows[-1, 0]) if len(rows) else None,
+    }
+    for i, name in enumerate(COLUMNS):
+        col = rows[:, i] - t_base if name == "t" else rows[:, i]
+        payload[name] = np.round(col, 3).tolist()
+    return payload
+
+
+def to_binary(rows: np.ndarray) -> bytes:
+    """Header + row-major float32 payload (see BINARY_HEADER)."""
+    t_base = float(rows[0, 0]) if len(rows) else 0.0
+    out = rows.astype(np.float64, copy=True)
+    out[:, 0] -= t_base
+    header = BINARY_HEADER.pack(BINARY_MAGIC, len(rows), len(COLUMNS), t_base)
+    return header + out.astype("<f4").tobytes()
+
+
+# Shared history fed by the app's telemetry subscriber
+history = PositionHistory()
@@ -1,10 +1,23 @@
 import serial
 import time
 
+from serialMetrics import metrics
+
+# SPID Rot 2 reply frame: 0x57, 10 data bytes, 0x20
+FRAME_LEN = 12
+FRAME_START = 0x57
+FRAME_END = 0x20
+
+READ_TIMEOUT = 1.0          # s — give up on a position reply after this
+READ_POLL = 0.02            # s — port timeout while a frame is being assembled
+
 class SerialAntenna:
     def __init__(self, port, baudrate=9600):
+        self.last_read_latency = None   # s, write -> complete frame
+        self.read_count = 0
+        self.resync_count = 0           # bytes dropped to find a frame start
         try:
-            self.ser = serial.Serial(port, baudrate, timeout=1)
+            self.ser = serial.Serial(port, baudrate, timeout=READ_POLL)
             self.connected = self.ser.is_open
             try:
                 self.az, self.el = self.read_md01_position()
@@ -19,11 +32,42 @@ class SerialAntenna:
     def status(self):
         return self.connected and self.ser.is_open
 
-    def read_md01_position(self):
+    def _read_frame(self, deadline):
+        """
+        Collect bytes until a complete 0x57 ... 0x20 frame has arrived.
+
+        Returns as soon as the frame is complete. Leading garbage and broken
+        frames are skipped by searching for the next start byte.
+        """
+        buf = bytearray()
+        while time.perf_counter() < deadline:
+            buf += self.ser.read(FRAME_LEN - len(buf))
+
+            start = buf.find(FRAME_START)
+            if start < 0:
+                self.resync_count += len(buf)
+                buf.clear()
+                continue
+            if start > 0:
+                self.resync_count += start
+                del buf[:start]
+
+            if len(buf) == FRAME_LEN:
+                if buf[-1] == FRAME_END:
+                    return bytes(buf)
+                # Not a frame after all: drop this start byte and search again
+                self.resync_count += 1
+                del buf[0]
+        raise TimeoutError("No valid frame received")
+
+    def read_md01_position(self, timeout=READ_TIMEOUT):
         """
         Send a SPID Rot 2 'Read position' command for MD-01.
         Calculate the Azimuth and Elevation from recieved Packet.
 
+        The reply is read as soon as it arrives (no fixed delay); the time
+        from command to complete frame is kept in last_read_latency.
+
         returns: az and el of the Antenna.
         """
         if not self.connected:
@@ -32,19 +76,17 @@ class SerialAntenna:
                     [0]*10 +        # 10 times 0 (would be az/el at send)
                     [0x1F, 0x20])   # command for read and stop bit
         self.ser.reset_input_buffer()
-        self.ser.write(cmd)
-        time.sleep(0.1)
-        frame = self.ser.read(12)
-        if not frame or frame[0] != 0x57:
-            raise TimeoutError("No valid frame received")
-        az = frame[1]*100 + frame[2]*10 + frame[3]
-        if len(frame) >= 5:
-            az += frame[4]/10.0
+        with metrics.timer("md01.read"):
+            t0 = time.perf_counter()
+            self.ser.write(cmd)
+            frame = self._read_frame(t0 + timeout)
+            self.last_read_latency = time.perf_counter() - t0
+        self.read_count += 1
+
+        az = frame[1]*100 + frame[2]*10 + frame[3] + frame[4]/10.0
         az -= 360
-        el = 0.0
-        if len(frame) >= 10:
-            el = frame[6]*100 + frame[7]*10 + frame[8] + frame[9]/10.0
-            el -= 360
+        el = frame[6]*100 + frame[7]*10 + frame[8] + frame[9]/10.0
+        el -= 360
         return az, el
     
     def build_rot2_set_command(self, az_deg, el_deg, ph=10, pv=10):
@@ -88,14 +130,16 @@ class SerialAntenna:
         el_deg: target elevation in degrees (float or int)
         """
         cmd = self.build_rot2_set_command(az_deg, el_deg)
-        ser.reset_input_buffer()
-        ser.write(cmd)
+        with metrics.timer("md01.set"):
+            ser.reset_input_buffer()
+            ser.write(cmd)
         
     def stopMovement(self):
         if self.connected:
             cmd = bytes([0x57] + [0]*10 + [0x0F, 0x20])
-            self.ser.reset_input_buffer()
-            self.ser.write(cmd)
+            with metrics.timer("md01.stop"):
+                self.ser.reset_input_buffer()
+                self.ser.write(cmd)
         else:
             raise ConnectionError("Serial port not connected")
 
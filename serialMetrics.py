@@ -0,0 +1,179 @@
+"""
+Latency instrumentation for serial transactions and locks.
+
+Every operation name ("pico.STATUS", "md01.read", "lock.coax/switch.wait", ...)
+gets a LatencyHistogram with fixed log-spaced buckets, so memory stays
+constant however long the app runs:
+
+    BUCKETS_PER_DECADE buckets per factor of 10 between HIST_MIN_S and
+    HIST_MAX_S  ->  percentiles are good to about +-12 %; count, mean,
+    min, max and the last value are exact.
+
+TimedLock is a drop-in threading.Lock that records how long callers wait
+for it and how long it is held. The global `metrics` collects everything
+and is served as JSON by /metrics/serial.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+HIST_MIN_S = 1e-6           # s — first bucket edge (faster lands in bucket 0)
+HIST_MAX_S = 100.0          # s — last bucket edge (slower lands in the last one)
+BUCKETS_PER_DECADE = 10     # bucket ratio 10**0.1 = 1.26
+
+_N_BUCKETS = int(round(math.log10(HIST_MAX_S / HIST_MIN_S) * BUCKETS_PER_DECADE)) + 2
+
+
+def _bucket(seconds: float) -> int:
+    if seconds <= HIST_MIN_S:
+        return 0
+    i = int(math.log10(seconds / HIST_MIN_S) * BUCKETS_PER_DECADE) + 1
+    return min(i, _N_BUCKETS - 1)
+
+
+def _bucket_mid(i: int) -> float:
+    """Geometric centre of bucket i (s)."""
+    if i == 0:
+        return HIST_MIN_S
+    return HIST_MIN_S * 10 ** ((i - 0.5) / BUCKETS_PER_DECADE)
+
+
+class LatencyHistogram:
+    """Fixed-size latency histogram of one operation."""
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * _N_BUCKETS
+        self.count = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.min_s: Optional[float] = None
+        self.max_s: Optional[float] = None
+        self.last_s: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, ok: bool = True) -> None:
+        seconds = max(0.0, float(seconds))
+        with self._lock:
+            self.counts[_bucket(seconds)] += 1
+            self.count += 1
+            if not ok:
+                self.errors += 1
+            self.total_s += seconds
+            self.last_s = seconds
+            if self.min_s is None or seconds < self.min_s:
+                self.min_s = seconds
+            if self.max_s is None or seconds > self.max_s:
+                self.max_s = seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (s), clamped to the exact min / max."""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = q * self.count
+            seen = 0
+            for i, n in enumerate(self.counts):
+                seen += n
+                if n and seen >= rank:
+                    return min(max(_bucket_mid(i), self.min_s), self.max_s)
+            return self.max_s
+
+    def as_dict(self) -> Dict[str, Any]:
+        def ms(s: Optional[float]) -> Optional[float]:
+            return round(s * 1e3, 3) if s is not None else None
+
+        p50, p95 = self.quantile(0.50), self.quantile(0.95)
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": ms(self.total_s / self.count) if self.count else None,
+            "p50_ms": ms(p50),
+            "p95_ms": ms(p95),
+            "max_ms": ms(self.max_s),
+            "min_ms": ms(self.min_s),
+            "last_ms": ms(self.last_s),
+        }
+
+
+class LatencyMetrics:
+    """Histograms by operation name, created on first use."""
+
+    def __init__(self) -> None:
+        self.since = time.time()
+        self._hists: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        hist = self._hists.get(name)
+        if hist is None:
+            with self._lock:
+                hist = self._hists.setdefault(name, LatencyHistogram())
+        return hist
+
+    def observe(self, name: str, seconds: float, ok: bool = True) -> None:
+        self.histogram(name).observe(seconds, ok)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Time the block; an exception counts as an error and is re-raised."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - t0, ok=False)
+            raise
+        self.observe(name, time.perf_counter() - t0)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._hists.items())
+        return {name: hist.as_dict() for name, hist in items}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists = {}
+            self.since = time.time()
+
+
+metrics = LatencyMetrics()
+
+
+class TimedLock:
+    """
+    threading.Lock that records "lock.<name>.wait" (time to acquire) and
+    "lock.<name>.hold" (time until release) in `metrics`.
+    """
+
+    def __init__(self, name: str, registry: Optional[LatencyMetrics] = None) -> None:
+        self.name = name
+        self._metrics = registry or metrics
+        self._lock = threading.Lock()
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        t0 = time.perf_counter()
+        ok = self._lock.acquire(blocking, timeout)
+        t1 = time.perf_counter()
+        self._metrics.observe(f"lock.{self.name}.wait", t1 - t0, ok)
+        if ok:
+            self._acquired_at = t1
+        return ok
+
+    def release(self) -> None:
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        self._metrics.observe(f"lock.{self.name}.hold", held)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc) -> None:
+        self.release()
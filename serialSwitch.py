@@ -4,14 +4,50 @@ SerialSwitch driver for the Raspberry Pi Pico coax switch.
 Protocol (examples):
     SET S1_1
     SET S2_2
+    SET S1_2 S2_1 S3_1  -> "OK STATE S1=2 S2=1 S3=1"   (one round trip)
+    PRESET RX           -> "OK STATE S1=2 S2=1 S3=1"
     STATUS  -> "STATE S1=1 S2=2 S3=1"
+
+Firmware without the batched SET / PRESET answers "ERROR ..."; the
+switch then falls back to one SET per relay. That firmware also prints
+"DEBUG ..." lines before each reply; they are skipped.
+
+Scheduled switching (times are the Pico's time.ticks_us()):
+    SYNC                -> "SYNC 123456789"
+    ARM RX 125856789    -> "OK ARMED RX TARGET=125856789 NOW=123460012"
+    DISARM              -> "OK DISARMED"
+    TIMING              -> "TIMING FIRED RX TARGET=125856789 S1=125856791 S2=125856794 S3=125856797"
+                           ("TIMING ARMED RX TARGET=..." / "TIMING NONE")
+
+sync() maps the host's time.monotonic() onto the Pico clock, so arm()
+can schedule a preset for a host instant; the firmware then switches on
+its own clock and timing() reports when each coil fired.
 """
 
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import serial
 
+from serialMetrics import metrics
+
+# Relay positions of the named presets (as in TXRXSwitcher/main.py)
+PRESETS: Dict[str, Dict[str, str]] = {
+    "TX": {"S1": "1", "S2": "2", "S3": "2"},
+    "RX": {"S1": "2", "S2": "1", "S3": "1"},
+}
+
+TICKS_PERIOD = 1 << 30      # MicroPython time.ticks_us() wraps at 2**30 us
+DEBUG_PREFIX = "DEBUG"      # firmware trace lines, never a reply
+REPLY_MAX_LINES = 8         # DEBUG lines tolerated before a reply
+SYNC_ROUNDS = 5             # SYNC exchanges per sync(); the fastest one wins
+
+
+def ticks_diff(a: int, b: int) -> int:
+    """a - b in microseconds across the ticks_us() wrap (as time.ticks_diff)."""
+    d = (a - b) % TICKS_PERIOD
+    return d - TICKS_PERIOD if d >= TICKS_PERIOD // 2 else d
+
 
 class SerialSwitch:
     """
@@ -38,6 +74,10 @@ class SerialSwitch:
         self.timeout = timeout
         self.ser: Optional[serial.Serial] = None
         self.connected: bool = False
+        self.batch_supported: Optional[bool] = None   # None: not known yet
+        self.timed_supported: Optional[bool] = None   # SYNC / ARM / TIMING
+        # Last sync: (host monotonic s, Pico ticks_us, round trip s)
+        self._sync: Optional[Tuple[float, int, float]] = None
 
         self._open()
 
@@ -62,17 +102,26 @@ class SerialSwitch:
         """
         Send a single command line and return the reply as a stripped string.
 
-        Raises RuntimeError if the port is not open or I/O fails.
+        DEBUG lines printed before the reply are skipped; "" means no reply
+        within the port timeout. Raises RuntimeError if the port is not open
+        or I/O fails.
         """
         if not (self.ser and self.ser.is_open):
             self.connected = False
             raise RuntimeError("SerialSwitch: port is not open")
 
+        op = "pico." + (cmd.split() or ["?"])[0].upper()
         try:
-            self.ser.reset_input_buffer()
-            self.ser.write((cmd.strip() + "\n").encode("ascii", errors="ignore"))
-            self.ser.flush()
-            line = self.ser.readline().decode(errors="ignore").strip()
+            with metrics.timer(op):
+                self.ser.reset_input_buffer()
+                self.ser.write((cmd.strip() + "\n").encode("ascii", errors="ignore"))
+                self.ser.flush()
+                for _ in range(REPLY_MAX_LINES):
+                    line = self.ser.readline().decode(errors="ignore").strip()
+                    if not line.startswith(DEBUG_PREFIX):
+                        break
+                else:
+                    line = ""
             self.connected = True
             return line
         except Exception as exc:  # noqa: BLE001
@@ -101,6 +150,151 @@ class SerialSwitch:
         cmd = f"SET S{sid}_{side}"
         return self._send_raw(cmd)
 
+    def set_many(self, targets: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Set several relays in one round trip.
+
+        targets: {"S1": "2", "S2": "1", "S3": "1"}  ->  "SET S1_2 S2_1 S3_1"
+
+        Returns {"raw": reply, "switches": {...}} like status_parsed().
+        """
+        for sid, side in targets.items():
+            if sid not in ("S1", "S2", "S3") or str(side) not in ("1", "2"):
+                raise ValueError(f"invalid relay target {sid}={side}")
+        cmd = "SET " + " ".join(f"{sid}_{side}" for sid, side in sorted(targets.items()))
+        return self._batched(cmd, targets)
+
+    def preset(self, name: str) -> Dict[str, Any]:
+        """
+        Apply a named preset ("TX" / "RX") with one PRESET command.
+
+        Old firmware ignores PRESET silently (a full read timeout), so the
+        batched SET is used until the firmware has proven it understands it.
+        """
+        name = name.strip().upper()
+        if name not in PRESETS:
+            raise ValueError(f"unknown preset {name!r}")
+        if not self.batch_supported:
+            return self.set_many(PRESETS[name])
+        return self._batched(f"PRESET {name}", PRESETS[name])
+
+    def _batched(self, cmd: str, targets: Dict[str, str]) -> Dict[str, Any]:
+        if self.batch_supported is not False:
+            raw = self._send_raw(cmd)
+            switches = self.parse_state(raw)
+            if raw.startswith("OK") and all(switches.values()):
+                self.batch_supported = True
+                return {"raw": raw, "switches": switches}
+            if not raw.startswith("ERROR") or self.batch_supported:
+                raise RuntimeError(f"SerialSwitch: unexpected reply to {cmd!r}: {raw!r}")
+            self.batch_supported = False        # old firmware: "ERROR Format"
+
+        for sid, side in sorted(targets.items()):
+            self.set(int(sid[1]), side)
+        st = self.status_parsed()
+        return {"raw": st["raw"], "switches": st["switches"]}
+
+    # --------------------------------------------------------------------- #
+    # Scheduled switching
+    # --------------------------------------------------------------------- #
+
+    def sync(self, rounds: int = SYNC_ROUNDS) -> Dict[str, Any]:
+        """
+        Share a time base with the Pico.
+
+        Sends SYNC `rounds` times and keeps the exchange with the shortest
+        round trip; the Pico clock is assumed to be read half way through
+        it, so the mapping is good to +- rtt/2.
+
+        Returns {"host_s", "pico_us", "rtt_s"}. Raises RuntimeError (and
+        sets timed_supported = False) if the firmware has no SYNC.
+        """
+        best: Optional[Tuple[float, int, float]] = None
+        for _ in range(max(1, rounds)):
+            t0 = time.monotonic()
+            raw = self._send_raw("SYNC")
+            t1 = time.monotonic()
+            parts = raw.split()
+            if len(parts) != 2 or parts[0] != "SYNC" or not parts[1].isdigit():
+                self.timed_supported = False
+                raise RuntimeError(f"SerialSwitch: no SYNC support (reply {raw!r})")
+            if best is None or t1 - t0 < best[2]:
+                best = ((t0 + t1) / 2, int(parts[1]), t1 - t0)
+
+        self.timed_supported = True
+        self._sync = best
+        return {"host_s": best[0], "pico_us": best[1], "rtt_s": best[2]}
+
+    def to_ticks(self, t: float) -> int:
+        """Pico ticks_us() at host time.monotonic() `t` (after sync())."""
+        if self._sync is None:
+            raise RuntimeError("SerialSwitch: sync() first")
+        host_s, pico_us, _ = self._sync
+        return (pico_us + round((t - host_s) * 1e6)) % TICKS_PERIOD
+
+    def arm(self, name: str, at: float) -> Dict[str, Any]:
+        """
+        Let the Pico apply preset `name` at host time.monotonic() `at`.
+
+        Returns {"preset", "target_us", "lead_us", "raw"}; lead_us is how
+        early the command arrived (negative: already late, fires at once).
+        """
+        name = name.strip().upper()
+        if name not in PRESETS:
+            raise ValueError(f"unknown preset {name!r}")
+        target = self.to_ticks(at)
+        raw = self._send_raw(f"ARM {name} {target}")
+        if not raw.startswith("OK ARMED"):
+            raise RuntimeError(f"SerialSwitch: unexpected reply to ARM: {raw!r}")
+        fields = self._fields(raw)
+        lead = ticks_diff(target, fields["NOW"]) if "NOW" in fields else None
+        return {"preset": name, "target_us": target, "lead_us": lead, "raw": raw}
+
+    def disarm(self) -> str:
+        return self._send_raw("DISARM")
+
+    def timing(self) -> Dict[str, Any]:
+        """
+        Parsed TIMING reply:
+
+            {"state": "fired", "preset": "RX", "target_us": 125856789,
+             "coils_us":   {"S1": 125856791, "S2": 125856794, "S3": 125856797},
+             "offsets_us": {"S1": 2, "S2": 5, "S3": 8},     # coil - target
+             "raw": "TIMING FIRED ..."}
+
+        state is "none", "armed" or "fired"; preset is None for a SET.
+        """
+        raw = self._send_raw("TIMING")
+        parts = raw.split()
+        if len(parts) < 2 or parts[0] != "TIMING":
+            raise RuntimeError(f"SerialSwitch: unexpected reply to TIMING: {raw!r}")
+
+        fields = self._fields(raw)
+        target = fields.get("TARGET")
+        coils = {k: v for k, v in fields.items() if k in ("S1", "S2", "S3")}
+        preset = parts[2] if len(parts) > 2 and parts[2] in PRESETS else None
+        return {
+            "state": parts[1].lower(),
+            "preset": preset,
+            "target_us": target,
+            "coils_us": coils,
+            "offsets_us": (
+                {k: ticks_diff(v, target) for k, v in coils.items()}
+                if target is not None else {}
+            ),
+            "raw": raw,
+        }
+
+    @staticmethod
+    def _fields(raw: str) -> Dict[str, int]:
+        """Integer KEY=value tokens of a reply line."""
+        fields: Dict[str, int] = {}
+        for token in raw.split():
+            key, sep, val = token.partition("=")
+            if sep and val.lstrip("-").isdigit():
+                fields[key] = int(val)
+        return fields
+
     def status(self) -> str:
         """
         Query raw status string from the Pico.
@@ -122,7 +316,21 @@ class SerialSwitch:
             }
         """
         raw = self.status().strip()
+        switches = self.parse_state(raw)
+
+        # Consider it connected if it looks like a valid STATE line,
+        # or if at least one switch value was parsed.
+        connected = raw.startswith("STATE") or any(v is not None for v in switches.values())
 
+        return {
+            "connected": connected,
+            "raw": raw,
+            "switches": switches,
+        }
+
+    @staticmethod
+    def parse_state(raw: str) -> Dict[str, Optional[str]]:
+        """Relay positions from a "STATE ..." / "OK STATE ..." line (None if absent)."""
         switches: Dict[str, Optional[str]] = {
             "S1": None,
             "S2": None,
@@ -135,16 +343,7 @@ class SerialSwitch:
                 key, val = token.split("=", 1)
                 if key in switches:
                     switches[key] = val
-
-        # Consider it connected if it looks like a valid STATE line,
-        # or if at least one switch value was parsed.
-        connected = raw.startswith("STATE") or any(v is not None for v in switches.values())
-
-        return {
-            "connected": connected,
-            "raw": raw,
-            "switches": switches,
-        }
+        return switches
 
     def close(self) -> None:
         """Close the serial port, if open."""
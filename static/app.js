@@ -878,9 +878,23 @@ document.addEventListener("DOMContentLoaded", () => {
     }
   });
 
-  // First draw + periodic refresh
-  refreshStatus();
-  setInterval(refreshStatus, 2000);
+  // First draw + periodic refresh, following the server's telemetry rate
+  const STATUS_POLL_MIN_MS = 250;
+  const STATUS_POLL_MAX_MS = 2000;
+
+  async function statusLoop() {
+    try {
+      await refreshStatus();
+    } finally {
+      // Always reschedule: a failed request must not end the polling
+      const period = window.LAST_STATUS && window.LAST_STATUS.telemetry_period_s;
+      const delay = period
+        ? Math.min(STATUS_POLL_MAX_MS, Math.max(STATUS_POLL_MIN_MS, period * 1000))
+        : STATUS_POLL_MAX_MS;
+      setTimeout(statusLoop, delay);
+    }
+  }
+  statusLoop();
 });
 
 // --- Camera health / overlay --------------------------------------------------
@@ -1186,6 +1200,8 @@ async function pollCoax() {
 
     const statusEl = document.getElementById("coax-status");
     if (statusEl) {
+      // Served from the server-side cache; age_s = seconds since the last read
+      statusEl.title = j.age_s != null ? `Last read ${j.age_s.toFixed(1)} s ago` : "";
       if (connected) {
         statusEl.textContent = "Pico switch: online";
         statusEl.classList.remove("text-danger");
@@ -1318,10 +1334,80 @@ async function refreshMeasurements() {
   }
 }
 
+// ==================== Data page: pointing error ====================
+const POINTING_WINDOW_S = 6 * 3600;   // shown history
+let pointingChart = null;
+let pointingLastT = null;             // Unix time of newest row we have
+
+function buildPointingChart(ctx) {
+  pointingChart = new Chart(ctx, {
+    type: "line",
+    data: {
+      datasets: [
+        { label: "Az error [°]", data: [], borderWidth: 1.5, pointRadius: 0 },
+        { label: "El error [°]", data: [], borderWidth: 1.5, pointRadius: 0 },
+      ],
+    },
+    options: {
+      responsive: true,
+      maintainAspectRatio: false,
+      animation: false,
+      parsing: false,
+      plugins: { legend: { labels: { color: "#e5e7eb" } } },
+      scales: {
+        x: {
+          type: "linear",
+          ticks: {
+            color: "#9ca3af",
+            callback: (v) => new Date(v * 1000).toISOString().slice(11, 19),
+          },
+          grid: { display: false },
+        },
+        y: { ticks: { color: "#9ca3af" }, grid: { color: "rgba(55,65,81,0.4)" } },
+      },
+    },
+  });
+}
+
+async function refreshPointingHistory() {
+  const canvas = document.getElementById("pointingChart");
+  if (!canvas) return;
+  if (!pointingChart) buildPointingChart(canvas.getContext("2d"));
+
+  // First load: decimated window; afterwards only the new rows
+  const since = pointingLastT ?? Date.now() / 1000 - POINTING_WINDOW_S;
+  const decimate = pointingLastT === null ? 4 : 1;
+
+  try {
+    const res = await fetch(`/api/position/history?since=${since}&decimate=${decimate}`, { cache: "no-store" });
+    const h = await res.json();
+    if (!h.rows) return;
+
+    const [azSet, elSet] = pointingChart.data.datasets;
+    for (let i = 0; i < h.rows; i++) {
+      const t = h.t_base + h.t[i];
+      azSet.data.push({ x: t, y: h.err_az[i] });
+      elSet.data.push({ x: t, y: h.err_el[i] });
+    }
+    pointingLastT = h.t_last;
+
+    const tMin = pointingLastT - POINTING_WINDOW_S;
+    for (const ds of [azSet, elSet]) {
+      const cut = ds.data.findIndex((p) => p.x >= tMin);
+      if (cut > 0) ds.data.splice(0, cut);
+    }
+    pointingChart.update("none");
+  } catch (e) {
+    console.warn("Error fetching position history:", e);
+  }
+}
+
 // Called from data_page.html
 function initDataPage() {
   refreshMeasurements();
   setInterval(refreshMeasurements, 5000);
+  refreshPointingHistory();
+  setInterval(refreshPointingHistory, 5000);
 }
 
 // ==================== Measurement SSE Console (only) ====================
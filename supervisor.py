@@ -0,0 +1,148 @@
+"""
+Connection supervisor for serial links (MD-01, Pico coax switch).
+
+When a link is reported lost, a worker thread calls `reconnect_fn` with
+exponential backoff (1 s, 2 s, 4 s, ... up to RECONNECT_MAX_S) until it
+succeeds or the supervisor is cancelled by a manual connect / disconnect.
+reconnect_fn reopens the last known port and restores the device (resync,
+resumed tracking); any exception counts as a failed attempt.
+
+Backoff and downtime are wall-clock times: they describe the hardware,
+not the (possibly simulated) Moon clock.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+RECONNECT_BASE_S = 1.0      # s — delay before the first attempt
+RECONNECT_MAX_S = 60.0      # s — backoff ceiling
+RECONNECT_FACTOR = 2.0      # delay multiplier after every failed attempt
+
+
+class ConnectionSupervisor:
+    """
+    Reconnects one link and keeps its availability metrics.
+
+    on_change(metrics) is called after every state change with as_dict(),
+    so the owner can publish the metrics in its state namespace.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        reconnect_fn: Callable[[], None],
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+        base_s: float = RECONNECT_BASE_S,
+        max_s: float = RECONNECT_MAX_S,
+        factor: float = RECONNECT_FACTOR,
+    ) -> None:
+        self.name = name
+        self.reconnect_fn = reconnect_fn
+        self.on_change = on_change
+        self.base_s = float(base_s)
+        self.max_s = float(max_s)
+        self.factor = float(factor)
+
+        self.state = "up"               # up | reconnecting
+        self.outages = 0                # links lost
+        self.reconnects = 0             # successful reconnects
+        self.attempts = 0               # reconnect attempts (all outages)
+        self.last_error: Optional[str] = None
+        self.next_attempt_s: Optional[float] = None
+        self.total_downtime_s = 0.0     # closed outages
+        self.last_downtime_s: Optional[float] = None
+        self._down_since: Optional[float] = None    # monotonic
+
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def reconnecting(self) -> bool:
+        return self.state == "reconnecting"
+
+    def lost(self, exc: Optional[BaseException] = None) -> None:
+        """The link failed: start reconnecting (no-op if already doing so)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.state = "reconnecting"
+            self.outages += 1
+            self.last_error = str(exc) if exc is not None else None
+            self._down_since = time.monotonic()
+            self._cancel.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._changed()
+
+    def cancel(self) -> None:
+        """Stop reconnecting (manual connect / disconnect took over)."""
+        self._cancel.set()
+        thread = self._thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout=1.0)
+        with self._lock:
+            if self.state == "reconnecting":
+                self._close_outage()
+            self.state = "up"
+            self.next_attempt_s = None
+        self._changed()
+
+    def _close_outage(self) -> None:
+        if self._down_since is not None:
+            self.last_downtime_s = time.monotonic() - self._down_since
+            self.total_downtime_s += self.last_downtime_s
+            self._down_since = None
+
+    def _run(self) -> None:
+        delay = self.base_s
+        while True:
+            self.next_attempt_s = delay
+            self._changed()
+            if self._cancel.wait(delay):
+                return
+
+            self.attempts += 1
+            try:
+                self.reconnect_fn()
+            except Exception as exc:  # noqa: BLE001
+                self.last_error = str(exc)
+                delay = min(delay * self.factor, self.max_s)
+                continue
+
+            if self._cancel.is_set():
+                return
+            with self._lock:
+                self.reconnects += 1
+                self.state = "up"
+                self.next_attempt_s = None
+                self._close_outage()
+            self._changed()
+            return
+
+    def _changed(self) -> None:
+        if self.on_change:
+            try:
+                self.on_change(self.as_dict())
+            except Exception:  # noqa: BLE001
+                pass
+
+    def as_dict(self) -> Dict[str, Any]:
+        down = self._down_since
+        current = time.monotonic() - down if down is not None else None
+        return {
+            "state": self.state,
+            "outages": self.outages,
+            "reconnects": self.reconnects,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "next_attempt_s": self.next_attempt_s,
+            "downtime_s": round(current, 1) if current is not None else None,
+            "last_downtime_s": (
+                round(self.last_downtime_s, 1) if self.last_downtime_s is not None else None
+            ),
+            "total_downtime_s": round(self.total_downtime_s + (current or 0.0), 1),
+        }
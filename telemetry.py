@@ -0,0 +1,226 @@
+"""
+Position telemetry for the MD-01.
+
+One producer thread samples the rotator, converts the reading to app
+coordinates, unwraps it into a continuous azimuth, rejects single-sample
+jumps and fans the resulting samples out to any number of consumers.
+Consumers either register a callback or block on wait_next().
+
+The sampling rate adapts to the rotator: the fastest period (floor) while it
+moves, right after a command (kick()) or while the reported pointing error
+is large (report_error()); otherwise the period grows step by step up to the
+slowest one (ceiling) when parked or idle.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import clock
+from tracking import ctrl_to_app_continuous, norm360, unwrap_ctrl_az
+
+TELEMETRY_MIN_PERIOD = 0.2  # s   — period floor (slewing / large error)
+TELEMETRY_MAX_PERIOD = 2.0  # s   — period ceiling (parked / idle)
+TELEMETRY_BACKOFF = 1.5     # period growth per quiet sample
+MOVE_EPS_DEG = 0.05         # deg — position change that counts as "moving"
+ERROR_FAST_DEG = 0.5        # deg — pointing error that keeps the fast rate
+MAX_JUMP_DEG = 60.0         # deg — ignore single-sample az jumps bigger than this
+MAX_REJECTS = 3             # accept a jump once it has been seen this many times in a row
+
+
+@dataclass(frozen=True)
+class PositionSample:
+    """One filtered position reading."""
+
+    seq: int            # increases by one per published sample
+    t: float            # Unix timestamp of the read
+    az_ctrl: float      # raw controller azimuth (deg)
+    el: float           # elevation (deg)
+    az: float           # continuous app azimuth (deg), unwrapped + filtered
+    az_norm: float      # app azimuth in [0, 360)
+
+
+class PositionTelemetry:
+    """
+    Producer thread: read -> convert -> unwrap -> filter -> publish.
+
+    read_fn      : callable returning (az_ctrl, el), e.g. AntennaActor.read_position
+    min_period_s : fastest sampling period (floor)
+    max_period_s : slowest sampling period (ceiling)
+    on_error     : optional callback(exc, fail_count) for failed reads
+    """
+
+    def __init__(
+        self,
+        read_fn: Callable[[], Tuple[float, float]],
+        min_period_s: float = TELEMETRY_MIN_PERIOD,
+        max_period_s: float = TELEMETRY_MAX_PERIOD,
+        max_jump_deg: float = MAX_JUMP_DEG,
+        az_cont: Optional[float] = None,
+        on_error: Optional[Callable[[Exception, int], None]] = None,
+    ) -> None:
+        self.read_fn = read_fn
+        self.min_period_s = min_period_s
+        self.max_period_s = max_period_s
+        self.period_s = min_period_s        # current period, adapted per sample
+        self.max_jump_deg = max_jump_deg
+        self.on_error = on_error
+
+        self._az_cont = az_cont     # last accepted continuous azimuth
+        self._rejects = 0
+        self._fail_count = 0
+        self._seq = 0
+        self._latest: Optional[PositionSample] = None
+        self._error_deg = 0.0
+        self._wake = threading.Event()
+        self._subscribers: List[Callable[[PositionSample], None]] = []
+        self._cv = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # --------------------------------------------------------------------- #
+    # Producer
+    # --------------------------------------------------------------------- #
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        with self._cv:
+            self._cv.notify_all()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            t_start = clock.time()
+            self._wake.clear()
+            try:
+                az_ctrl, el = self.read_fn()
+            except Exception as exc:  # noqa: BLE001
+                self._fail_count += 1
+                if self.on_error:
+                    try:
+                        self.on_error(exc, self._fail_count)
+                    except Exception:  # noqa: BLE001
+                        pass
+            else:
+                self._fail_count = 0
+                self.publish(clock.time(), az_ctrl, el)
+            clock.wait(self._wake, max(0.0, t_start + self.period_s - clock.time()))
+
+    def _adapt(self, prev: Optional[PositionSample], az: float, el: float) -> None:
+        """Pick the next sampling period from motion and pointing error."""
+        moving = prev is not None and (
+            abs(az - prev.az) > MOVE_EPS_DEG or abs(el - prev.el) > MOVE_EPS_DEG
+        )
+        if moving or self._error_deg > ERROR_FAST_DEG:
+            self.period_s = self.min_period_s
+        else:
+            self.period_s = min(self.period_s * TELEMETRY_BACKOFF, self.max_period_s)
+
+    def kick(self) -> None:
+        """A command was sent: sample now and at the fastest rate."""
+        self.period_s = self.min_period_s
+        self._wake.set()
+
+    def report_error(self, error_deg: float) -> None:
+        """Pointing error seen by the tracker; large errors keep the fast rate."""
+        self._error_deg = abs(error_deg)
+
+    @property
+    def rate_hz(self) -> float:
+        return 1.0 / self.period_s
+
+    def _unwrap(self, az_app: float) -> float:
+        """Single unwrap + glitch filter for every consumer."""
+        if self._az_cont is None:
+            self._az_cont = az_app
+            return az_app
+
+        cont = unwrap_ctrl_az(az_app, self._az_cont)
+        if abs(cont - self._az_cont) > self.max_jump_deg:
+            self._rejects += 1
+            if self._rejects < MAX_REJECTS:
+                return self._az_cont
+        self._rejects = 0
+        self._az_cont = cont
+        return cont
+
+    def publish(self, t: float, az_ctrl: float, el: float) -> PositionSample:
+        """Filter one raw reading and hand it to all consumers."""
+        az = self._unwrap(ctrl_to_app_continuous(az_ctrl))
+        self._adapt(self._latest, az, el)
+        with self._cv:
+            self._seq += 1
+            sample = PositionSample(
+                seq=self._seq,
+                t=t,
+                az_ctrl=az_ctrl,
+                el=el,
+                az=az,
+                az_norm=norm360(az),
+            )
+            self._latest = sample
+            self._cv.notify_all()
+
+        for cb in list(self._subscribers):
+            try:
+                cb(sample)
+            except Exception:  # noqa: BLE001
+                pass
+        return sample
+
+    def resync(self, az_cont: Optional[float]) -> None:
+        """Restart the unwrap from a known continuous azimuth (None: next sample)."""
+        self._az_cont = az_cont
+        self._rejects = 0
+
+    # --------------------------------------------------------------------- #
+    # Consumers
+    # --------------------------------------------------------------------- #
+
+    @property
+    def latest(self) -> Optional[PositionSample]:
+        return self._latest
+
+    def subscribe(self, callback: Callable[[PositionSample], None]) -> None:
+        """Call callback(sample) from the producer thread for every sample."""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[PositionSample], None]) -> None:
+        try:
+            self._subscribers.remove(callback)
+        except ValueError:
+            pass
+
+    def wait_next(self, after_seq: Optional[int] = None,
+                  timeout: Optional[float] = None) -> Optional[PositionSample]:
+        """
+        Block until a sample newer than after_seq (default: the latest one
+        at call time) is available. Returns None on timeout (clock seconds)
+        or stop.
+        """
+        with self._cv:
+            if after_seq is None:
+                after_seq = self._seq
+            self._cv.wait_for(
+                lambda: self._seq > after_seq or self._stop.is_set(),
+                clock.to_real(timeout),
+            )
+            if self._seq > after_seq:
+                return self._latest
+            return None
@@ -0,0 +1,123 @@
+"""AntennaActor queue: priorities and how queued commands are merged."""
+
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from antennaActor import AntennaActor
+
+
+class FakeAntenna:
+    """SerialAntenna stand-in; the first read blocks until `release` is set."""
+
+    def __init__(self):
+        self.ser = None
+        self.calls = []
+        self.busy = threading.Event()
+        self.release = threading.Event()
+
+    def read_md01_position(self):
+        self.calls.append(("read",))
+        if not self.busy.is_set():
+            self.busy.set()
+            self.release.wait(5)
+        return 10.0, 20.0
+
+    def send_rot2_set(self, ser, az, el):
+        self.calls.append(("set", az, el))
+
+    def stopMovement(self):
+        self.calls.append(("stop",))
+
+    def close(self):
+        self.calls.append(("close",))
+
+    def status(self):
+        return True
+
+
+@pytest.fixture
+def busy_actor():
+    """An actor whose worker is stuck in a read, so commands pile up."""
+    antenna = FakeAntenna()
+    actor = AntennaActor(antenna)
+    first = actor.submit_read()
+    assert antenna.busy.wait(2)
+    yield actor, antenna, first
+    antenna.release.set()
+    if not actor._closed:
+        actor.close()
+
+
+def test_queued_reads_share_one_transaction(busy_actor):
+    actor, antenna, first = busy_actor
+    reads = [actor.submit_read() for _ in range(5)]
+    antenna.release.set()
+
+    assert first.result(2) == (10.0, 20.0)
+    assert all(f.result(2) == (10.0, 20.0) for f in reads)
+    assert antenna.calls == [("read",), ("read",)]
+
+
+def test_only_newest_set_is_sent(busy_actor):
+    actor, antenna, _ = busy_actor
+    sets = [actor.submit_set(az, 30.0) for az in (1.0, 2.0, 3.0)]
+    antenna.release.set()
+
+    for f in sets:
+        f.result(2)
+    assert [c for c in antenna.calls if c[0] == "set"] == [("set", 3.0, 30.0)]
+
+
+def test_stop_runs_first_and_cancels_queued_sets(busy_actor):
+    actor, antenna, _ = busy_actor
+    read = actor.submit_read()
+    move = actor.submit_set(5.0, 30.0)
+    stop = actor.submit_stop()
+    antenna.release.set()
+
+    stop.result(2)
+    read.result(2)
+    with pytest.raises(CancelledError):
+        move.result(2)
+    assert antenna.calls == [("read",), ("stop",), ("read",)]
+
+
+def close_in_background(actor, queued):
+    """Call close() from another thread once it is queued behind `queued` commands."""
+    closing = threading.Thread(target=actor.close)
+    closing.start()
+    deadline = time.monotonic() + 2
+    while len(actor._queue) < queued + 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return closing
+
+
+def test_close_overtakes_queued_reads_and_sets(busy_actor):
+    actor, antenna, _ = busy_actor
+    read = actor.submit_read()
+    move = actor.submit_set(5.0, 30.0)
+    closing = close_in_background(actor, queued=2)
+    antenna.release.set()
+    closing.join(2)
+
+    for f in (read, move):
+        with pytest.raises(ConnectionError):
+            f.result(2)
+    # The read in flight finishes, then the port is closed right away
+    assert antenna.calls == [("read",), ("close",)]
+    with pytest.raises(ConnectionError):
+        actor.submit_read().result(1)
+
+
+def test_stop_still_runs_before_close(busy_actor):
+    actor, antenna, _ = busy_actor
+    closing = close_in_background(actor, queued=0)
+    stop = actor.submit_stop()
+    antenna.release.set()
+    closing.join(2)
+
+    stop.result(2)
+    assert antenna.calls == [("read",), ("stop",), ("close",)]
@@ -0,0 +1,65 @@
+"""plan_cable_wraps: whole-pass wrap planning within the cable limits."""
+
+import numpy as np
+import pytest
+
+from tracking import AZ_LIMIT, CABLE_MARGIN, plan_cable_wraps
+
+LIMIT = AZ_LIMIT - CABLE_MARGIN
+
+
+def check_plan(az, out, limit=LIMIT):
+    """Every sample points at the Moon and stays inside the limits."""
+    d = (out - az) % 360.0
+    assert np.allclose(np.minimum(d, 360.0 - d), 0.0, atol=1e-9)
+    assert np.all(np.abs(out) <= limit)
+
+
+def sweep(start, end, n=200):
+    """Azimuth samples of a continuous sweep, wrapped to [0, 360)."""
+    return np.linspace(start, end, n) % 360.0
+
+
+def test_crossing_north_needs_no_unwind():
+    az = sweep(340.0, 380.0)
+    out, unwinds = plan_cable_wraps(az, 0.0)
+
+    check_plan(az, out)
+    assert unwinds == 0
+    assert np.all(np.diff(out) > 0)
+    assert out[0] == pytest.approx(-20.0)
+
+
+def test_long_sweep_starts_on_the_wrap_that_avoids_unwinding():
+    az = sweep(270.0, 1170.0)               # 2.5 turns only fit as -450 .. +450
+    out, unwinds = plan_cable_wraps(az, 0.0)
+
+    check_plan(az, out)
+    assert unwinds == 0
+    assert out[0] == pytest.approx(-450.0)
+    assert out[-1] == pytest.approx(450.0)
+
+
+def test_sweep_beyond_the_range_unwinds_once():
+    az = sweep(0.0, 1200.0, n=400)
+    out, unwinds = plan_cable_wraps(az, 0.0)
+
+    check_plan(az, out)
+    assert unwinds == 1
+    assert np.count_nonzero(np.abs(np.diff(out)) > 180.0) == 1
+
+
+def test_shortest_initial_slew_among_equal_plans():
+    az = np.full(10, 100.0)
+    out, unwinds = plan_cable_wraps(az, 350.0)
+
+    assert unwinds == 0
+    assert out[0] == pytest.approx(460.0)   # 110 deg away instead of 250 deg
+
+
+def test_unreachable_samples_fall_back_to_per_sample_rule():
+    az = sweep(0.0, 360.0, n=50)
+    out, _ = plan_cable_wraps(az, 0.0, limit=100.0)
+
+    assert len(out) == len(az)
+    assert np.all(np.isfinite(out))
@@ -0,0 +1,58 @@
+"""SimClock: frozen and warped simulated time."""
+
+import threading
+import time
+
+import pytest
+
+import clock
+
+
+@pytest.fixture
+def sim():
+    old = clock.get_clock()
+    sim = clock.SimClock(start=1_000_000.0)
+    clock.set_clock(sim)
+    yield sim
+    clock.set_clock(old)
+
+
+def test_frozen_clock_only_moves_on_advance(sim):
+    t0 = clock.time()
+    time.sleep(0.02)
+    assert clock.time() == t0 == 1_000_000.0
+
+    sim.advance(3600.0)
+    assert clock.time() == 1_003_600.0
+    assert clock.now().timestamp() == pytest.approx(1_003_600.0)
+
+
+def test_advance_wakes_sleepers_and_waiters(sim):
+    event = threading.Event()
+    done = {}
+
+    def sleeper():
+        clock.sleep(60.0)
+        done["sleep"] = clock.time()
+
+    def waiter():
+        done["wait"] = clock.wait(event, 30.0)
+
+    threads = [threading.Thread(target=sleeper), threading.Thread(target=waiter)]
+    for th in threads:
+        th.start()
+    time.sleep(0.05)
+    assert not done
+
+    sim.advance(61.0)
+    for th in threads:
+        th.join(1.0)
+    assert done["sleep"] >= 1_000_060.0
+    assert done["wait"] is False
+
+
+def test_warped_clock_runs_faster():
+    sim = clock.SimClock(start=0.0, warp=1000.0)
+    time.sleep(0.05)
+    assert 40.0 <= sim.time() < 1000.0
+    assert sim.to_real(10.0) == pytest.approx(0.01)
@@ -0,0 +1,71 @@
+"""Shared Moon service, device registry and the coax switch device."""
+
+import numpy as np
+import pytest
+
+import CalcMoonPos
+from devices import DeviceError, DeviceRegistry, MoonService, SwitchDevice
+from emulator import PicoEmulator
+
+
+@pytest.fixture
+def counted_tracks(monkeypatch):
+    calls = []
+    track = CalcMoonPos.get_moon_track
+
+    def counting(times):
+        calls.append(len(times))
+        return track(times)
+
+    monkeypatch.setattr(CalcMoonPos, "get_moon_track", counting)
+    return calls
+
+
+def test_track_requests_are_slices_of_one_shared_track(counted_tracks):
+    moon = MoonService(step_s=2.0, extra_s=3600.0)
+    t0 = 1767225600.0
+    a = moon.track(t0, max_s=600.0)
+    b = moon.track(t0 + 120.0, max_s=600.0)           # a later antenna
+    c = moon.track(t0 + 3.0, max_s=600.0)             # off the grid: same grid
+
+    assert len(counted_tracks) == 1
+    assert b[0][0] == t0 + 120.0 and c[0][0] == t0 + 2.0
+    assert np.array_equal(a[1][60:], b[1][:-60])
+
+    moon.track(t0 + 7200.0, max_s=600.0)              # beyond extra_s
+    assert len(counted_tracks) == 2
+
+
+def test_registry_ids_are_unique_across_kinds():
+    reg = DeviceRegistry()
+    sw = reg.create("box", "switch")
+
+    assert reg.create("box", "switch") is sw
+    with pytest.raises(DeviceError):
+        reg.create("box", "rotator")
+    with pytest.raises(DeviceError):
+        reg.add(SwitchDevice("box"))
+    with pytest.raises(KeyError):
+        reg.get("box", kind="rotator")
+    assert [d["id"] for d in reg.summary()] == ["box"]
+
+
+def test_switch_device_writes_its_renamed_state_keys():
+    emu = PicoEmulator(relay_latency=0.0).start()
+    state, replies = {}, []
+    sw = SwitchDevice("coax", state=state,
+                      keys={"port": "switch_port", "connected": "switch_connected",
+                            "link": "switch_link"},
+                      on_reply=replies.append)
+    try:
+        sw.connect(emu.port)
+        assert state["switch_port"] == emu.port and state["switch_connected"]
+        assert "port" not in state and "connected" not in state
+
+        sw.preset("RX")
+        assert state["switches"] == {"S1": "2", "S2": "1", "S3": "1"}
+        assert replies[-1].endswith("STATE S1=2 S2=1 S3=1")
+    finally:
+        sw.disconnect()
+        emu.stop()
+    assert state["switch_connected"] is False and state["switch_port"] is None
@@ -0,0 +1,67 @@
+"""Feed-forward lead and the per-sample tracking decision."""
+
+import numpy as np
+import pytest
+
+from tracking import (
+    LEAD_ALPHA,
+    LEAD_LATENCY_S,
+    LEAD_MAX_S,
+    LeadCompensator,
+    PassTrajectory,
+    TrackingController,
+)
+
+
+def moving_moon(rate_dps: float = 0.01) -> PassTrajectory:
+    t = np.arange(0.0, 3600.0, 2.0)
+    return PassTrajectory(t, 100.0 + rate_dps * t, np.full(len(t), 30.0))
+
+
+def test_plain_mode_commands_the_current_position():
+    traj = moving_moon()
+    lead = LeadCompensator(3.0, 0.1, enabled=False)
+    assert lead.target(traj, 100.0, 101.0, 30.0) == traj.at(100.0)
+    assert lead.lead_s == 0.0
+
+
+def test_lead_points_ahead_of_the_moon():
+    traj = moving_moon()
+    lead = LeadCompensator(3.0, 0.1)
+    az, _ = lead.target(traj, 100.0, 101.0, 30.0)
+
+    assert 0.0 < lead.lead_s <= LEAD_MAX_S
+    assert az == pytest.approx(traj.at(100.0 + lead.lead_s)[0])
+    assert az > traj.at(100.0)[0]
+
+
+def test_latency_is_learned_from_motion_start():
+    lead = LeadCompensator(3.0, 0.1)
+    lead.on_sample(0.0, 0.0, 30.0)
+    lead.on_command(0.0, 0.0, 30.0)
+    lead.on_sample(0.5, 0.0, 30.0)              # not moving yet
+    lead.on_sample(1.0, 0.5, 30.0)              # moving: started at ~0.75 s
+
+    expected = (1 - LEAD_ALPHA) * LEAD_LATENCY_S + LEAD_ALPHA * 0.75
+    assert lead.latency_s == pytest.approx(expected)
+
+
+def test_controller_respects_dead_band_and_send_interval():
+    traj = moving_moon(rate_dps=0.0)
+    ctl = TrackingController(send_interval_s=3.0, dead_band_deg=0.1, lead=False)
+
+    assert ctl.step(traj, 10.0, 10.0, 100.05, 30.0) is None      # inside dead band
+    cmd = ctl.step(traj, 11.0, 11.0, 99.0, 30.0)
+    assert cmd is not None and cmd[:2] == pytest.approx((100.0, 30.0))
+
+    ctl.sent(11.0, 99.0, 30.0)
+    assert ctl.step(traj, 12.0, 12.0, 99.0, 30.0) is None        # too soon
+    assert ctl.step(traj, 14.5, 14.5, 99.0, 30.0) is not None
+    assert ctl.as_dict()["commands"] == 1
+
+
+def test_controller_stops_after_the_last_sample():
+    traj = moving_moon()
+    ctl = TrackingController(3.0, 0.1)
+    assert ctl.step(traj, traj.t_end + 1.0, 0.0, 0.0, 30.0) is None
+    assert ctl.moon is None
@@ -0,0 +1,65 @@
+"""CalcMoonPos: interpolated Moon table against exact ephem positions."""
+
+import numpy as np
+
+import CalcMoonPos
+
+T0 = 1767225600.0           # 2026-01-01 00:00 UTC
+
+
+def test_interpolation_error_stays_within_bound():
+    table = CalcMoonPos.MoonEphemerisTable()
+    t = T0 + np.linspace(0.0, 3 * 3600.0, 97) + 17.0       # off the grid
+    az, el, rng = table.query(t)
+    az_x, el_x, rng_x = CalcMoonPos._compute_track(t)
+
+    d_az = np.abs((az - az_x + 180.0) % 360.0 - 180.0)
+    assert d_az.max() <= 2 * CalcMoonPos.EPHEM_MAX_ERR_DEG
+    assert np.abs(el - el_x).max() <= 2 * CalcMoonPos.EPHEM_MAX_ERR_DEG
+    assert np.abs(rng - rng_x).max() < 1.0
+    assert table.max_err <= CalcMoonPos.EPHEM_MAX_ERR_DEG
+
+
+def test_queries_inside_the_table_do_not_rebuild():
+    table = CalcMoonPos.MoonEphemerisTable()
+    table.query(T0)
+    built = table._table
+    table.query(T0 + CalcMoonPos.EPHEM_SPAN_S / 2)
+    assert table._table is built
+
+    table.query(T0 + 2 * CalcMoonPos.EPHEM_SPAN_S)
+    assert table._table is not built
+
+
+def test_ad_hoc_ranges_leave_the_live_table_alone():
+    CalcMoonPos.get_moon_position()
+    live = CalcMoonPos.moon_table._table
+    CalcMoonPos.get_moon_track(T0 + np.arange(0.0, 6 * 3600.0, 600.0))
+
+    assert CalcMoonPos.moon_table._table is live
+    assert CalcMoonPos.range_table._table is not None
+
+
+# Threshold crossings
+
+def test_crossings_are_cached_until_one_has_passed(monkeypatch):
+    cache = CalcMoonPos.MoonCrossingCache()
+    calls = []
+    compute = cache._compute
+    monkeypatch.setattr(cache, "_compute", lambda *a: calls.append(a) or compute(*a))
+
+    rise, set_ = cache.get(15.0, now=T0)
+    assert cache.get(15.0, now=T0 + 60.0) == (rise, set_)
+    assert len(calls) == 1
+
+    cache.get(15.0, now=min(rise, set_) + 1.0)      # a crossing has passed
+    cache.get(20.0, now=T0)                         # other threshold
+    assert len(calls) == 3
+
+
+def test_crossings_are_threshold_times():
+    rise, set_ = CalcMoonPos.MoonCrossingCache().get(15.0, now=T0)
+    # Upper limb, refracted: ephem's convention for rise / set
+    alt = CalcMoonPos.get_moon_limb_altitude([rise - 60.0, rise + 60.0, set_ - 60.0, set_ + 60.0])
+    assert alt[0] < 15.0 < alt[1]
+    assert alt[3] < 15.0 < alt[2]
@@ -0,0 +1,14 @@
+"""Pass windows agree with the rise / set times shown on /status."""
+
+import CalcMoonPos
+from passPlanner import REFINE_TOL_S, find_windows
+
+T0 = 1767225600.0           # 2026-01-01 00:00 UTC
+
+
+def test_windows_match_moon_crossings():
+    windows = find_windows(T0, T0 + 3 * 86400.0, 15.0)
+    rise, set_ = CalcMoonPos.MoonCrossingCache().get(15.0, now=T0)
+
+    assert min(abs(r - rise) for r, _ in windows) <= REFINE_TOL_S
+    assert min(abs(s - set_) for _, s in windows) <= REFINE_TOL_S
@@ -0,0 +1,73 @@
+"""Parallel port discovery against the MD-01 and Pico emulators."""
+
+import os
+import types
+
+import pytest
+
+import portRegistry
+from emulator import Md01Emulator, PicoEmulator
+from portDiscovery import PortDiscovery
+from portRegistry import ROLE_MD01, ROLE_PICO, PortRegistry
+
+
+def usb_port(device, serial_number, vid=None):
+    return types.SimpleNamespace(
+        device=device, description="usb", hwid="", vid=vid, pid=None,
+        serial_number=serial_number, manufacturer=None, product=None, location=None,
+    )
+
+
+@pytest.fixture
+def bench(monkeypatch):
+    """Pico, MD-01 and a silent pty, listed as USB ports with serial numbers."""
+    pico = PicoEmulator(relay_latency=0.0).start()
+    md01 = Md01Emulator().start()
+    master, slave = os.openpty()
+    silent = os.ttyname(slave)
+
+    ports = [usb_port(pico.port, "PICO-1"), usb_port(md01.port, "FTDI-1", vid=0x1A86),
+             usb_port(silent, "NONE-1")]
+    monkeypatch.setattr(portRegistry.serial.tools.list_ports, "comports", lambda: ports)
+    registry = PortRegistry()
+    yield PortDiscovery(registry, timeout=0.3), pico, md01, silent
+
+    pico.stop()
+    md01.stop()
+    os.close(master)
+    os.close(slave)
+
+
+def test_scan_finds_both_devices_in_parallel(bench):
+    discovery, pico, md01, silent = bench
+    scan = discovery.scan()
+
+    assert scan[ROLE_PICO] == [pico.port]
+    assert scan[ROLE_MD01] == [md01.port]
+    assert scan["ports"][silent]["role"] is None
+    # The silent port costs 2 x timeout; the others run alongside it
+    assert scan["elapsed_s"] < 1.5
+    assert discovery.cache == {"PICO-1": ROLE_PICO, "FTDI-1": ROLE_MD01}
+
+
+def test_known_serial_numbers_are_not_probed_again(bench):
+    discovery, pico, md01, _ = bench
+    discovery.scan()
+    n_pico, n_md01 = pico.bytes_in, md01.bytes_in
+
+    scan = discovery.scan()
+    assert scan["ports"][pico.port]["source"] == "cache"
+    assert (pico.bytes_in, md01.bytes_in) == (n_pico, n_md01)
+
+    scan = discovery.scan(use_cache=False)
+    assert scan["ports"][pico.port]["source"] == "probe"
+    assert pico.bytes_in > n_pico
+
+
+def test_ports_in_use_are_never_opened(bench):
+    discovery, pico, md01, _ = bench
+    scan = discovery.scan(in_use={pico.port: ROLE_PICO}, use_cache=False)
+
+    assert scan["ports"][pico.port]["source"] == "in use"
+    assert scan[ROLE_PICO] == [pico.port]
+    assert pico.bytes_in == 0
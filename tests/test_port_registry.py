@@ -0,0 +1,50 @@
+"""PortRegistry cache, role guesses and change notifications."""
+
+import types
+
+import portRegistry
+from portRegistry import PICO_VID, ROLE_MD01, ROLE_PICO, PortRegistry, guess_role
+
+
+def fake_port(device, vid=None, serial_number=None):
+    return types.SimpleNamespace(
+        device=device, description="", hwid="", vid=vid, pid=None,
+        serial_number=serial_number, manufacturer=None, product=None, location=None,
+    )
+
+
+def test_role_guess_from_vendor_id():
+    assert guess_role(PICO_VID) == ROLE_PICO
+    assert guess_role(0x0403) == ROLE_MD01
+    assert guess_role(0x1234) is None and guess_role(None) is None
+
+
+def test_ports_are_enumerated_once_and_refreshed_on_demand(monkeypatch):
+    listed = [fake_port("/dev/ttyACM0", vid=PICO_VID), fake_port("/dev/ttyUSB0", vid=0x0403)]
+    calls = []
+    monkeypatch.setattr(portRegistry.serial.tools.list_ports, "comports",
+                        lambda: calls.append(1) or list(listed))
+    reg = PortRegistry(extra_ports=["/dev/pts/9"])
+
+    assert reg.ports() == ["/dev/ttyACM0", "/dev/ttyUSB0", "/dev/pts/9"]
+    assert reg.roles() == {"/dev/ttyACM0": ROLE_PICO, "/dev/ttyUSB0": ROLE_MD01}
+    assert reg.find(ROLE_PICO) == ["/dev/ttyACM0"]
+    reg.ports()
+    reg.info("/dev/ttyUSB0")
+    assert len(calls) == 1
+
+
+def test_subscribers_hear_only_about_changes(monkeypatch):
+    listed = [fake_port("/dev/ttyACM0", vid=PICO_VID)]
+    monkeypatch.setattr(portRegistry.serial.tools.list_ports, "comports", lambda: list(listed))
+    reg = PortRegistry()
+    seen = []
+    reg.subscribe(lambda ports: seen.append(sorted(ports)))
+
+    reg.refresh()
+    reg.refresh()                       # nothing changed
+    listed.append(fake_port("/dev/ttyUSB0", vid=0x0403))
+    reg.refresh()                       # hotplug
+
+    assert seen == [["/dev/ttyACM0"], ["/dev/ttyACM0", "/dev/ttyUSB0"]]
+    assert reg.refreshes == 3
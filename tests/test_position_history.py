@@ -0,0 +1,68 @@
+"""PositionHistory ring buffer and its payload encodings."""
+
+import numpy as np
+import pytest
+
+from positionHistory import (
+    BINARY_HEADER,
+    BINARY_MAGIC,
+    COLUMNS,
+    PositionHistory,
+    to_binary,
+    to_json,
+)
+
+
+def filled(capacity: int, n: int) -> PositionHistory:
+    h = PositionHistory(capacity=capacity)
+    for i in range(n):
+        h.append(1000.0 + i, float(i), 30.0, float(i) + 1.0, 31.0)
+    return h
+
+
+def test_wraparound_keeps_newest_rows_in_time_order():
+    h = filled(capacity=5, n=12)
+    rows = h.query()
+
+    assert len(h) == 5
+    assert rows[:, 0].tolist() == [1007.0, 1008.0, 1009.0, 1010.0, 1011.0]
+
+
+def test_since_and_decimate_after_wraparound():
+    h = filled(capacity=5, n=12)
+
+    assert h.query(since=1008.0)[:, 0].tolist() == [1009.0, 1010.0, 1011.0]
+    assert h.query(decimate=2)[:, 0].tolist() == [1007.0, 1009.0, 1011.0]
+    assert len(h.query(since=2000.0)) == 0
+
+
+def test_pointing_error_wraps_across_north():
+    h = PositionHistory(capacity=4)
+    h.append(0.0, 359.0, 30.0, 1.0, 31.5)
+    row = h.query()[0]
+
+    assert row[COLUMNS.index("err_az")] == pytest.approx(2.0)
+    assert row[COLUMNS.index("err_el")] == pytest.approx(1.5)
+
+
+def test_query_returns_a_copy_and_clear_empties():
+    h = filled(capacity=5, n=3)
+    rows = h.query()
+    rows[:] = 0.0
+    assert h.query()[0, 0] == 1000.0
+
+    h.clear()
+    assert len(h) == 0 and h.query().shape == (0, len(COLUMNS))
+
+
+def test_payloads_use_relative_times():
+    rows = filled(capacity=5, n=3).query()
+
+    js = to_json(rows)
+    assert js["t_base"] == 1000.0 and js["t"] == [0.0, 1.0, 2.0]
+
+    blob = to_binary(rows)
+    magic, n, cols, t_base = BINARY_HEADER.unpack_from(blob)
+    assert (magic, n, cols, t_base) == (BINARY_MAGIC, 3, len(COLUMNS), 1000.0)
+    data = np.frombuffer(blob, dtype="<f4", offset=BINARY_HEADER.size).reshape(n, cols)
+    assert data[:, 0].tolist() == [0.0, 1.0, 2.0]
@@ -0,0 +1,45 @@
+"""RotatorDevice connect / reconnect against the MD-01 emulator."""
+
+import pytest
+
+from devices import MoonService, RotatorDevice
+from emulator import Md01Emulator
+
+
+@pytest.fixture
+def md01():
+    emu = Md01Emulator(az=10.0, el=45.0).start()
+    yield emu
+    emu.stop()
+
+
+def test_reconnect_closes_previous_actor_and_telemetry(md01):
+    dev = RotatorDevice("test", MoonService())
+    try:
+        dev.connect(md01.port)
+        old_ant, old_tm = dev.ant, dev.telemetry
+
+        dev.connect(md01.port)
+
+        assert dev.ant is not old_ant
+        assert not old_ant._thread.is_alive()
+        assert not old_ant.antenna.ser.is_open
+        assert old_tm is not dev.telemetry
+        assert not old_tm.running
+        assert dev.connected
+    finally:
+        dev._close_port()
+
+
+def test_link_lost_reopen_keeps_one_actor(md01):
+    dev = RotatorDevice("test", MoonService())
+    try:
+        dev.connect(md01.port)
+        old_ant = dev.ant
+
+        dev._reconnect()
+
+        assert not old_ant._thread.is_alive()
+        assert dev.connected
+    finally:
+        dev._close_port()
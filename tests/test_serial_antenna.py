@@ -0,0 +1,71 @@
+"""SerialAntenna frame reading, against a byte stream and the MD-01 emulator."""
+
+import time
+
+import pytest
+
+from emulator import Md01Emulator
+from serialComm import SerialAntenna
+
+
+class ChunkedPort:
+    """serial.Serial stand-in returning the given chunks, one per read()."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def read(self, n):
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+def read_frame(chunks, timeout=0.2):
+    ant = SerialAntenna.__new__(SerialAntenna)
+    ant.ser = ChunkedPort(chunks)
+    ant.resync_count = 0
+    return ant._read_frame(time.perf_counter() + timeout), ant.resync_count
+
+
+FRAME = Md01Emulator.encode_frame(10.0, 45.0)
+
+
+def test_frame_split_across_reads():
+    frame, dropped = read_frame([FRAME[:5], FRAME[5:9], FRAME[9:]])
+    assert frame == FRAME and dropped == 0
+
+
+def test_garbage_and_broken_frames_are_skipped():
+    broken = bytes([0x57]) + bytes(10) + b"\x00"     # start byte, wrong end byte
+    frame, dropped = read_frame([b"\x01\x02", broken, FRAME])
+    assert frame == FRAME
+    assert dropped >= 3
+
+
+def test_no_frame_times_out():
+    with pytest.raises(TimeoutError):
+        read_frame([b"\x01" * 12], timeout=0.05)
+
+
+@pytest.fixture
+def md01():
+    emu = Md01Emulator(az=10.0, el=45.0, latency=0.0).start()
+    ant = SerialAntenna(emu.port)
+    yield emu, ant
+    ant.close()
+    emu.stop()
+
+
+def test_position_is_read_as_soon_as_it_arrives(md01):
+    emu, ant = md01
+    az, el = ant.read_md01_position()
+
+    assert (az, el) == pytest.approx((10.0, 45.0), abs=0.05)
+    # 12 bytes at 9600 baud take 12.5 ms; no fixed sleep on top of the reply
+    assert ant.last_read_latency < emu.reply_delay + 0.1
+
+
+def test_set_position_reaches_the_controller(md01):
+    emu, ant = md01
+    ant.send_rot2_set(ant.ser, -20.0, 30.0)
+    time.sleep(0.1)
+    assert emu.sets == 1
+    assert emu._target == pytest.approx((-20.0, 30.0))
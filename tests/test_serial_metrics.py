@@ -0,0 +1,59 @@
+"""Latency histograms and TimedLock."""
+
+import time
+
+import pytest
+
+from serialMetrics import LatencyHistogram, LatencyMetrics, TimedLock
+
+
+def test_histogram_exact_stats_and_approximate_quantiles():
+    h = LatencyHistogram()
+    for ms in range(1, 101):
+        h.observe(ms / 1000.0)
+
+    d = h.as_dict()
+    assert d["count"] == 100 and d["errors"] == 0
+    assert (d["min_ms"], d["max_ms"], d["last_ms"]) == (1.0, 100.0, 100.0)
+    assert d["mean_ms"] == pytest.approx(50.5)
+    assert d["p50_ms"] == pytest.approx(50.0, rel=0.13)
+    assert d["p95_ms"] == pytest.approx(95.0, rel=0.13)
+
+
+def test_out_of_range_values_land_in_the_edge_buckets():
+    h = LatencyHistogram()
+    h.observe(0.0)
+    h.observe(1000.0)
+
+    assert h.counts[0] == 1 and h.counts[-1] == 1
+    assert h.quantile(0.0) <= 1e-6
+    assert (h.as_dict()["min_ms"], h.as_dict()["max_ms"]) == (0.0, 1e6)
+
+
+def test_timer_counts_exceptions_as_errors():
+    m = LatencyMetrics()
+    with m.timer("op"):
+        pass
+    with pytest.raises(ValueError):
+        with m.timer("op"):
+            raise ValueError("boom")
+
+    snap = m.snapshot()
+    assert snap["op"]["count"] == 2 and snap["op"]["errors"] == 1
+    m.reset()
+    assert m.snapshot() == {}
+
+
+def test_timed_lock_records_wait_and_hold():
+    m = LatencyMetrics()
+    lock = TimedLock("test", registry=m)
+    with lock:
+        time.sleep(0.01)
+        assert not lock.acquire(blocking=False)     # held: a failed wait
+
+    snap = m.snapshot()
+    assert snap["lock.test.hold"]["count"] == 1
+    assert snap["lock.test.hold"]["max_ms"] >= 10.0
+    assert snap["lock.test.wait"]["count"] == 2
+    assert snap["lock.test.wait"]["errors"] == 1
+    assert not lock.locked()
@@ -0,0 +1,94 @@
+"""SerialSwitch against the Pico emulator (current and legacy firmware)."""
+
+import time
+
+import pytest
+
+from emulator import PicoEmulator
+from serialSwitch import PRESETS, TICKS_PERIOD, SerialSwitch, ticks_diff
+
+
+@pytest.fixture
+def pico(request):
+    emu = PicoEmulator(relay_latency=0.0, **getattr(request, "param", {})).start()
+    sw = SerialSwitch(emu.port)
+    yield emu, sw
+    sw.close()
+    emu.stop()
+
+
+def test_batched_set_is_one_command(pico):
+    emu, sw = pico
+    n0 = emu.commands
+    res = sw.set_many({"S1": "2", "S2": "1", "S3": "2"})
+
+    assert res["switches"] == {"S1": "2", "S2": "1", "S3": "2"}
+    assert sw.batch_supported is True
+    assert emu.commands - n0 == 1
+
+
+def test_preset_uses_preset_command_once_batching_is_known(pico):
+    emu, sw = pico
+    sw.preset("TX")                     # batched SET proves the firmware
+    n0 = emu.commands
+    res = sw.preset("RX")
+
+    assert res["switches"] == PRESETS["RX"]
+    assert res["raw"].startswith("OK STATE")
+    assert emu.commands - n0 == 1
+
+
+@pytest.mark.parametrize("pico", [{"legacy": True}], indirect=True)
+def test_legacy_firmware_falls_back_to_single_sets(pico):
+    emu, sw = pico
+    res = sw.preset("RX")
+
+    assert sw.batch_supported is False
+    assert res["switches"] == PRESETS["RX"]
+    assert emu.switches == PRESETS["RX"]
+
+    # Known legacy firmware: no batched attempt any more, 3 SETs + STATUS
+    n0 = emu.commands
+    res = sw.set_many(PRESETS["TX"])
+    assert res["switches"] == PRESETS["TX"]
+    assert emu.commands - n0 == 4
+
+
+@pytest.mark.parametrize("pico", [{"legacy": True}], indirect=True)
+def test_debug_lines_are_not_taken_as_replies(pico):
+    emu, sw = pico
+    assert sw.set(1, "2") == "OK STATE S1=2 S2=1 S3=1"
+    assert sw.status() == "STATE S1=2 S2=1 S3=1"
+
+
+# Scheduled switching
+
+def test_ticks_diff_across_the_wrap():
+    assert ticks_diff(5, TICKS_PERIOD - 5) == 10
+    assert ticks_diff(TICKS_PERIOD - 5, 5) == -10
+    assert ticks_diff(1000, 400) == 600
+    assert ticks_diff(0, TICKS_PERIOD // 2) == -(TICKS_PERIOD // 2)
+
+
+def test_to_ticks_wraps_past_the_period():
+    sw = SerialSwitch.__new__(SerialSwitch)
+    sw._sync = (100.0, TICKS_PERIOD - 10, 0.001)
+
+    assert sw.to_ticks(100.0) == TICKS_PERIOD - 10
+    assert sw.to_ticks(100.000025) == 15
+    assert sw.to_ticks(99.99999) == TICKS_PERIOD - 20
+
+
+def test_armed_preset_fires_at_the_target(pico):
+    emu, sw = pico
+    sw.preset("TX")
+    sw.sync()
+    armed = sw.arm("RX", time.monotonic() + 0.05)
+    assert armed["lead_us"] > 0
+
+    time.sleep(0.15)
+    timing = sw.timing()
+    assert timing["state"] == "fired" and timing["preset"] == "RX"
+    assert timing["target_us"] == armed["target_us"]
+    assert all(0 <= off < 20_000 for off in timing["offsets_us"].values())
+    assert emu.switches == PRESETS["RX"]
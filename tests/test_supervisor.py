@@ -0,0 +1,81 @@
+"""ConnectionSupervisor backoff and metrics, with millisecond delays."""
+
+import threading
+import time
+
+from supervisor import ConnectionSupervisor
+
+
+class FlakyLink:
+    """reconnect_fn that fails `failures` times, then succeeds."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+        self.delays = []            # backoff that preceded each attempt
+        self.up = threading.Event()
+        self.supervisor = None
+
+    def __call__(self):
+        self.calls += 1
+        self.delays.append(self.supervisor.next_attempt_s)
+        if self.calls <= self.failures:
+            raise OSError(f"attempt {self.calls} failed")
+        self.up.set()
+
+
+def make_supervisor(link, changes):
+    sup = ConnectionSupervisor("test", link, on_change=changes.append,
+                               base_s=0.01, max_s=0.04, factor=2.0)
+    link.supervisor = sup
+    return sup
+
+
+def wait_until(cond, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return cond()
+
+
+def test_backoff_doubles_up_to_the_ceiling():
+    link, changes = FlakyLink(failures=4), []
+    sup = make_supervisor(link, changes)
+
+    sup.lost(OSError("gone"))
+    assert link.up.wait(2)
+    assert wait_until(lambda: sup.state == "up")
+
+    assert link.delays == [0.01, 0.02, 0.04, 0.04, 0.04]
+    assert changes[0]["state"] == "reconnecting" and changes[-1]["state"] == "up"
+    m = sup.as_dict()
+    assert (m["outages"], m["attempts"], m["reconnects"]) == (1, 5, 1)
+    assert m["last_error"] == "attempt 4 failed"
+    assert m["downtime_s"] is None and m["last_downtime_s"] is not None
+
+
+def test_lost_while_reconnecting_is_one_outage():
+    link = FlakyLink(failures=1000)
+    sup = make_supervisor(link, [])
+
+    sup.lost()
+    sup.lost()
+    assert sup.reconnecting
+    assert sup.outages == 1
+    sup.cancel()
+
+
+def test_cancel_stops_the_attempts():
+    link = FlakyLink(failures=1000)
+    sup = make_supervisor(link, [])
+
+    sup.lost()
+    assert wait_until(lambda: link.calls >= 2)
+    sup.cancel()
+    calls = link.calls
+    time.sleep(0.1)
+
+    assert link.calls == calls
+    assert sup.state == "up"
+    assert sup.next_attempt_s is None
+    assert sup.as_dict()["total_downtime_s"] >= 0.0
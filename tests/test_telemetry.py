@@ -0,0 +1,89 @@
+"""PositionTelemetry filtering, driven through publish() without a thread."""
+
+import pytest
+
+from telemetry import ERROR_FAST_DEG, MAX_REJECTS, TELEMETRY_BACKOFF, PositionTelemetry
+
+
+def make_telemetry(**kwargs) -> PositionTelemetry:
+    return PositionTelemetry(lambda: (0.0, 0.0), **kwargs)
+
+
+def test_azimuth_is_unwrapped_across_north():
+    tm = make_telemetry()
+    # Controller azimuth is the app azimuth flipped by 180 deg
+    assert tm.publish(0.0, 170.0, 30.0).az == pytest.approx(350.0)
+    sample = tm.publish(1.0, -175.0, 30.0)
+    assert sample.az == pytest.approx(365.0)
+    assert sample.az_norm == pytest.approx(5.0)
+
+
+def test_unwrap_starts_from_known_azimuth():
+    # A reconnect keeps the cable wrap: app 350 deg next to -10 deg is -10 deg
+    tm = make_telemetry(az_cont=-10.0)
+    assert tm.publish(0.0, 170.0, 30.0).az == pytest.approx(-10.0)
+    tm.resync(710.0)
+    assert tm.publish(1.0, 171.0, 30.0).az == pytest.approx(711.0)
+
+
+def test_single_glitch_is_rejected():
+    tm = make_telemetry()
+    tm.publish(0.0, 170.0, 30.0)
+    assert tm.publish(1.0, 0.0, 30.0).az == pytest.approx(350.0)     # 170 deg jump
+    assert tm.publish(2.0, 171.0, 30.0).az == pytest.approx(351.0)
+
+
+def test_persistent_jump_is_accepted():
+    tm = make_telemetry()
+    tm.publish(0.0, 170.0, 30.0)
+    azs = [tm.publish(1.0 + i, 0.0, 30.0).az for i in range(MAX_REJECTS)]
+    assert azs[:-1] == [pytest.approx(350.0)] * (MAX_REJECTS - 1)
+    assert azs[-1] == pytest.approx(180.0)
+
+
+def test_samples_reach_subscribers_and_waiters():
+    tm = make_telemetry()
+    seen = []
+    tm.subscribe(seen.append)
+    first = tm.publish(0.0, 0.0, 45.0)
+    second = tm.publish(1.0, 1.0, 45.0)
+
+    assert [s.seq for s in seen] == [1, 2]
+    assert tm.latest is second
+    assert tm.wait_next(after_seq=first.seq, timeout=0) is second
+    assert tm.wait_next(timeout=0.01) is None
+
+
+# Adaptive sampling period
+
+def test_period_backs_off_while_idle():
+    tm = make_telemetry(min_period_s=0.2, max_period_s=2.0)
+    periods = []
+    for i in range(10):
+        tm.publish(float(i), 0.0, 45.0)
+        periods.append(tm.period_s)
+
+    assert periods[0] == pytest.approx(0.2 * TELEMETRY_BACKOFF)
+    assert all(b >= a for a, b in zip(periods, periods[1:]))
+    assert periods[-1] == pytest.approx(2.0)
+
+
+def test_motion_error_and_kick_restore_fast_rate():
+    tm = make_telemetry(min_period_s=0.2, max_period_s=2.0)
+    for i in range(10):
+        tm.publish(float(i), 0.0, 45.0)
+
+    tm.publish(10.0, 1.0, 45.0)                  # moving
+    assert tm.period_s == pytest.approx(0.2)
+
+    tm.publish(11.0, 1.0, 45.0)
+    assert tm.period_s > 0.2
+    tm.report_error(ERROR_FAST_DEG * 2)          # tracker far off target
+    tm.publish(12.0, 1.0, 45.0)
+    assert tm.period_s == pytest.approx(0.2)
+
+    tm.report_error(0.0)
+    tm.publish(13.0, 1.0, 45.0)
+    assert tm.period_s > 0.2
+    tm.kick()
+    assert tm.period_s == pytest.approx(0.2)
@@ -0,0 +1,110 @@
+"""RotatorDevice._track_loop at the ends of a precomputed trajectory."""
+
+import threading
+import time
+
+import numpy as np
+
+import clock
+from devices import RotatorDevice
+from tracking import PassTrajectory, TrackingController
+
+
+def make_traj(t0: float, duration_s: float, step_s: float = 0.1) -> PassTrajectory:
+    t = t0 + step_s * np.arange(int(duration_s / step_s) + 1)
+    return PassTrajectory(t, np.full(len(t), 180.0), np.full(len(t), 30.0))
+
+
+class FakeMoon:
+    """MoonService stand-in: hands out the given trajectories, then None (set)."""
+
+    def __init__(self, trajs):
+        self.trajs = list(trajs)
+        self.builds = 0
+
+    def trajectory(self, t_start, cur_az_cont, min_el=None):
+        self.builds += 1
+        return self.trajs.pop(0) if self.trajs else None
+
+    def position(self):
+        return 180.0, -10.0
+
+
+class FakeTelemetry:
+    """No samples; sets `stop` after `polls` waits."""
+
+    def __init__(self, stop: threading.Event, polls: int, period_s: float = 0.1):
+        self.stop = stop
+        self.polls = polls
+        self.period_s = period_s
+
+    def wait_next(self, timeout=None):
+        time.sleep(self.period_s)
+        self.polls -= 1
+        if self.polls <= 0:
+            self.stop.set()
+        return None
+
+    def report_error(self, err):
+        pass
+
+
+def make_device(moon: FakeMoon, stop: threading.Event) -> RotatorDevice:
+    dev = RotatorDevice("test", moon)
+    dev.tracking_stop = stop
+    dev.ant = object()
+    dev.parks = 0
+
+    def go_to_parking():
+        dev.parks += 1
+
+    def wait_for_moon_above(min_el=15, poll_s=10):
+        stop.set()
+        return False
+
+    dev.go_to_parking = go_to_parking
+    dev.wait_for_moon_above = wait_for_moon_above
+    dev._command = lambda az, el: az
+    dev.wait_until_position = lambda az, el, timeout=0: True
+    return dev
+
+
+def run_loop(dev: RotatorDevice, stop: threading.Event) -> None:
+    ctl = TrackingController(3.0, 0.1, lead=False)
+    dev._track_loop(ctl, False, stop)
+
+
+def test_pass_ending_before_initial_slew_parks_instead_of_crashing():
+    stop = threading.Event()
+    moon = FakeMoon([make_traj(clock.time() - 10.0, 1.0)])    # already over
+    dev = make_device(moon, stop)
+
+    run_loop(dev, stop)
+
+    assert dev.parks == 1
+    assert moon.builds == 2
+
+
+def test_used_up_trajectory_is_extended_while_moon_is_up():
+    stop = threading.Event()
+    now = clock.time()
+    moon = FakeMoon([make_traj(now, 0.2), make_traj(now + 0.2, 60.0)])
+    dev = make_device(moon, stop)
+    dev.telemetry = FakeTelemetry(stop, polls=5)
+
+    run_loop(dev, stop)
+
+    assert moon.builds == 2
+    assert dev.parks == 0
+
+
+def test_trajectory_ending_with_moon_below_parks():
+    stop = threading.Event()
+    moon = FakeMoon([make_traj(clock.time(), 0.2)])
+    dev = make_device(moon, stop)
+    dev.telemetry = FakeTelemetry(stop, polls=10)
+
+    run_loop(dev, stop)
+
+    assert dev.parks == 1
+    assert moon.builds == 3                # extend (None), then wait_for_pass (None)
@@ -0,0 +1,530 @@
+"""
+Tracking helpers shared by the web app and offline tools.
+
+- Azimuth conventions (app/sky vs. controller, continuous vs. wrapped)
+- Cable-safe azimuth selection (per command and pass-wide wrap planning)
+- Whole-pass Moon trajectory for the tracker loop
+- Feed-forward lead compensation and tracking statistics
+- Per-sample tracking decision (shared by the app and benchTracking.py)
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+import CalcMoonPos
+
+# -----------------------------------------------------------------------------
+# Constants: mechanics / controller encoding
+# -----------------------------------------------------------------------------
+
+# Mechanical azimuth limits
+AZ_LIMIT = 540              # total safe mechanical range ±540°
+CABLE_MARGIN = 30           # safety margin before wrap
+
+# Controller azimuth encoding parameters
+AZ_OFFSET_DEG = 0           # offset if your mount is shifted
+AZ_FLIP_180 = True          # quick flip by 180° if reference is inverted
+
+# Pass trajectory sampling
+TRAJ_STEP_S = 2.0           # s   — spacing of precomputed trajectory samples
+TRAJ_MAX_S = 12 * 3600      # s   — precompute at most this (the tracker extends it)
+
+# Feed-forward lead compensation (initial guesses, refined from telemetry)
+LEAD_LATENCY_S = 0.5        # s   — command sent -> rotator starts moving
+LEAD_SLEW_DPS = 2.0         # deg/s — rotator slew rate
+LEAD_ALPHA = 0.3            # weight of a new measurement in the running estimates
+MOVE_EPS_DEG = 0.05         # deg — position change that counts as "moving"
+LEAD_MAX_S = 60.0           # s   — never lead the Moon by more than this
+
+
+# -----------------------------------------------------------------------------
+# Angle / coordinate helpers
+# -----------------------------------------------------------------------------
+
+def norm360(x: float) -> float:
+    """Normalize angle to [0, 360)."""
+    return x % 360
+
+
+def signed180(x: float) -> float:
+    """Wrap any angle to [-180, +180)."""
+    return ((x + 180) % 360) - 180
+
+
+def app_to_ctrl_continuous(app_deg: float) -> float:
+    """
+    Convert an angle in app coordinates to controller 'continuous' azimuth
+    (before wrapping/encoding).
+    """
+    val = app_deg - AZ_OFFSET_DEG
+    if AZ_FLIP_180:
+        val -= 180
+    return val
+
+def ctrl_to_app_continuous(ctrl_deg: float) -> float:
+    """
+    Convert controller azimuth to app/sky azimuth (inverse of app_to_ctrl_continuous).
+    """
+    val = ctrl_deg
+    if AZ_FLIP_180:
+        val += 180
+    val += AZ_OFFSET_DEG
+    return val
+
+
+def ctrl_to_app_norm(ctrl_deg: float) -> float:
+    """Controller azimuth -> app/sky azimuth, normalized to [0, 360)."""
+    return norm360(ctrl_to_app_continuous(ctrl_deg))
+
+
+def encode_ctrl_az_from_continuous(app_cont_deg: float) -> float:
+    """
+    Take a continuous desired azimuth in app-space (can be negative or >360),
+    map to controller space, and encode as a single signed command in
+    [-180, +180].
+    """
+    ctrl_cont = app_to_ctrl_continuous(app_cont_deg)
+    cmd = signed180(ctrl_cont)
+
+    # Avoid -0.0 which some firmwares display oddly.
+    if abs(cmd) < 1e-6:
+        cmd = 0.0
+
+    return round(cmd, 1)
+
+
+def ang_err(target_deg: float, current_deg: float) -> float:
+    """Signed minimal angle error in degrees, in [-180, +180]."""
+    return ((target_deg - current_deg + 180) % 360) - 180
+
+
+def unwrap_azimuth(current: float, last: float) -> float:
+    """
+    Unwrap azimuth to produce a continuous angle, avoiding 0/360 jumps.
+    """
+    delta = current - last
+    if delta > 180:
+        delta -= 360
+    elif delta < -180:
+        delta += 360
+    return last + delta
+
+def unwrap_ctrl_az(current_az_deg: float, last_cont: float) -> float:
+    """
+    Unwrap controller-read azimuth into a continuous azimuth.
+    Uses normalized current angle, but produces a continuous result.
+    """
+    cur = norm360(current_az_deg)
+    last_norm = norm360(last_cont)
+    delta = cur - last_norm
+    if delta > 180:
+        delta -= 360
+    elif delta < -180:
+        delta += 360
+    return last_cont + delta
+
+def safe_azimuth(target_az: float, current_az: float) -> float:
+    """
+    Compute a cable-safe azimuth command.
+
+    - Keeps rotation within ±AZ_LIMIT range
+    - Chooses the shortest rotation
+    """
+    delta = target_az - (current_az % 360)
+    if delta > 180:
+        delta -= 360
+    elif delta < -180:
+        delta += 360
+
+    new_az = current_az + delta
+
+    # Wrap protection
+    if new_az > AZ_LIMIT - CABLE_MARGIN:
+        new_az -= 360
+    elif new_az < -AZ_LIMIT + CABLE_MARGIN:
+        new_az += 360
+
+    return new_az
+
+
+def plan_cable_wraps(az_deg: np.ndarray, cur_az_cont: float,
+                     limit: float = AZ_LIMIT - CABLE_MARGIN) -> Tuple[np.ndarray, int]:
+    """
+    Choose the cable wrap for every sample of a pass.
+
+    az_deg      : Moon azimuth samples (deg, any wrapping)
+    cur_az_cont : current continuous antenna azimuth
+    limit       : continuous azimuth must stay within ±limit
+
+    Every sample can be commanded as u + 360*k (u: the unwrapped track) for
+    the few k that keep it inside ±limit. A dynamic program over runs of
+    samples with the same feasible k picks the sequence with the fewest
+    unwinds (changes of k) and, among those, the shortest initial slew from
+    cur_az_cont.
+
+    returns: (continuous azimuth per sample, number of unwinds)
+    """
+    u = np.array(az_deg, dtype=float)
+    d = np.diff(u)
+    for i in np.flatnonzero(np.abs(d) > 180.0):
+        u[i + 1:] -= 360.0 * np.sign(d[i])                  # unwrap (few jumps)
+
+    # Wraps k that keep each sample inside ±limit: k_lo <= k <= k_hi
+    k_lo = np.ceil((-limit - u) / 360.0)
+    k_hi = np.floor((limit - u) / 360.0)
+    ks = np.arange(int(k_lo.min()), int(k_hi.max()) + 1)
+
+    # Compress to runs of samples with the same feasible wraps
+    change = np.flatnonzero((k_lo[1:] != k_lo[:-1]) | (k_hi[1:] != k_hi[:-1])) + 1
+    starts = np.concatenate(([0], change))
+    runs = (ks[:, None] >= k_lo[starts]) & (ks[:, None] <= k_hi[starts])    # (K, R)
+
+    # cost[k] = (unwinds, initial slew) of the best plan ending in wrap k
+    inf = (float("inf"), float("inf"))
+    cost = [
+        (0, abs(u[0] + 360.0 * ks[j] - cur_az_cont)) if runs[j, 0] else inf
+        for j in range(len(ks))
+    ]
+    back = []
+    for r in range(1, runs.shape[1]):
+        best_j = min(range(len(ks)), key=lambda j: cost[j])
+        new, prev = [], []
+        for j in range(len(ks)):
+            if not runs[j, r]:
+                new.append(inf)
+                prev.append(j)
+            elif cost[j] <= (cost[best_j][0] + 1, cost[best_j][1]):
+                new.append(cost[j])                           # stay on this wrap
+                prev.append(j)
+            else:
+                new.append((cost[best_j][0] + 1, cost[best_j][1]))   # unwind
+                prev.append(best_j)
+        back.append(prev)
+        cost = new
+
+    j = min(range(len(ks)), key=lambda i: cost[i])
+    if cost[j] == inf:
+        # No wrap reaches some samples: fall back to the per-sample rule
+        out = np.empty(len(u))
+        cur = float(cur_az_cont)
+        for i, a in enumerate(u):
+            cur = safe_azimuth(float(a % 360.0), cur)
+            out[i] = cur
+        return out, int(np.count_nonzero(np.abs(np.diff(out)) > 180.0))
+
+    wrap = np.empty(runs.shape[1], dtype=int)
+    wrap[-1] = j
+    for r in range(runs.shape[1] - 1, 0, -1):
+        j = back[r - 1][j]
+        wrap[r - 1] = j
+
+    k_per_sample = np.repeat(ks[wrap], np.diff(np.append(starts, len(u))))
+    return u + 360.0 * k_per_sample, int(np.count_nonzero(np.diff(wrap)))
+
+
+# -----------------------------------------------------------------------------
+# Whole-pass trajectory
+# -----------------------------------------------------------------------------
+
+class PassTrajectory:
+    """
+    Remaining Moon pass, precomputed once when tracking starts.
+
+    Samples are TRAJ_STEP_S apart and already hold the cable-safe continuous
+    azimuth, with the wraps planned for the whole pass (plan_cable_wraps),
+    so the control loop only indexes into the arrays.
+
+    Attributes
+    ----------
+    t : np.ndarray
+        Unix timestamps of the samples.
+    az_cont : np.ndarray
+        Continuous app azimuth to command (deg).
+    el : np.ndarray
+        Moon elevation (deg).
+    """
+
+    def __init__(self, t: np.ndarray, az_cont: np.ndarray, el: np.ndarray,
+                 unwinds: int = 0) -> None:
+        self.t = t
+        self.az_cont = az_cont
+        self.el = el
+        self.unwinds = unwinds
+        self.t0 = float(t[0])
+        self.t_end = float(t[-1])
+        self.step = float(t[1] - t[0]) if len(t) > 1 else TRAJ_STEP_S
+
+    @classmethod
+    def build(
+        cls,
+        t_start: float,
+        cur_az_cont: float,
+        min_el: Optional[float] = None,
+        step_s: float = TRAJ_STEP_S,
+        max_s: float = TRAJ_MAX_S,
+    ) -> Optional["PassTrajectory"]:
+        """
+        Precompute the pass from t_start.
+
+        t_start     : Unix timestamp of the first sample
+        cur_az_cont : current continuous antenna azimuth (app coordinates)
+        min_el      : the pass ends when the Moon drops below this (None: no cut)
+
+        Returns None if the Moon is already below min_el at t_start.
+        """
+        t = t_start + step_s * np.arange(int(max_s / step_s) + 1)
+        az, el, _ = CalcMoonPos.get_moon_track(t)
+        return cls.from_track(t, az, el, cur_az_cont, min_el=min_el)
+
+    @classmethod
+    def from_track(
+        cls,
+        t: np.ndarray,
+        az: np.ndarray,
+        el: np.ndarray,
+        cur_az_cont: float,
+        min_el: Optional[float] = None,
+    ) -> Optional["PassTrajectory"]:
+        """
+        Pass from an already sampled Moon track (t, az, el), e.g. one shared
+        by several antennas; only the cable wraps are planned per antenna.
+
+        Returns None if the Moon is already below min_el at t[0].
+        """
+        if min_el is not None:
+            below = np.flatnonzero(el < min_el)
+            if len(below) and below[0] == 0:
+                return None
+            if len(below):
+                t, az, el = t[:below[0]], az[:below[0]], el[:below[0]]
+
+        # Continuous, cable-safe azimuth with the fewest unwinds over the pass
+        az_cont, unwinds = plan_cable_wraps(az, cur_az_cont)
+        return cls(t, az_cont, el, unwinds)
+
+    def at(self, now: float) -> Optional[Tuple[float, float]]:
+        """
+        Interpolated (az_cont, el) at `now`, or None after the last sample
+        (the pass itself can go on, see TRAJ_MAX_S).
+        """
+        if now > self.t_end:
+            return None
+        x = max(0.0, (now - self.t0) / self.step)
+        i = min(int(x), len(self.t) - 2) if len(self.t) > 1 else 0
+        if len(self.t) == 1:
+            return float(self.az_cont[0]), float(self.el[0])
+        f = x - i
+        # An unwind is a jump at sample i + 1, never interpolated through
+        az = self.az_cont[i] + f * signed180(self.az_cont[i + 1] - self.az_cont[i])
+        el = self.el[i] + f * (self.el[i + 1] - self.el[i])
+        return float(az), float(el)
+
+
+# -----------------------------------------------------------------------------
+# Feed-forward tracking
+# -----------------------------------------------------------------------------
+
+class TrackingStats:
+    """
+    Running pointing-error statistics (constant memory).
+
+    The azimuth error is scaled by cos(el) so both axes are true sky angles.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.samples = 0
+        self.commands = 0
+        self._sum_sq_az = 0.0
+        self._sum_sq_el = 0.0
+        self.max_err = 0.0
+
+    def add_sample(self, err_az: float, err_el: float, el: float) -> None:
+        x_az = err_az * math.cos(math.radians(el))
+        self.samples += 1
+        self._sum_sq_az += x_az * x_az
+        self._sum_sq_el += err_el * err_el
+        self.max_err = max(self.max_err, math.hypot(x_az, err_el))
+
+    def add_command(self) -> None:
+        self.commands += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        n = max(self.samples, 1)
+        rms_az = math.sqrt(self._sum_sq_az / n)
+        rms_el = math.sqrt(self._sum_sq_el / n)
+        return {
+            "samples": self.samples,
+            "commands": self.commands,
+            "rms_az_deg": round(rms_az, 4),
+            "rms_el_deg": round(rms_el, 4),
+            "rms_deg": round(math.hypot(rms_az, rms_el), 4),
+            "max_deg": round(self.max_err, 4),
+        }
+
+
+class LeadCompensator:
+    """
+    Feed-forward lead for the tracker.
+
+    Instead of the Moon's current position, the tracker commands the
+    position it will have at now + lead, with
+
+        lead = latency + distance / slew_rate + hold / 2
+
+    latency and slew_rate are learned from telemetry after every command
+    (time until the rotator starts moving, speed while it moves). hold is
+    the time the antenna sits still between corrections: the longer of
+    min_interval_s and the time the Moon needs to move dead_band_deg. The
+    hold / 2 term centres the error around zero during that time instead
+    of letting the antenna always trail the Moon.
+
+    With enabled=False the current Moon position is commanded (plain mode).
+    """
+
+    def __init__(self, min_interval_s: float, dead_band_deg: float,
+                 enabled: bool = True) -> None:
+        self.min_interval_s = float(min_interval_s)
+        self.dead_band_deg = float(dead_band_deg)
+        self.enabled = enabled
+        self.latency_s = LEAD_LATENCY_S
+        self.slew_dps = LEAD_SLEW_DPS
+        self.lead_s = 0.0
+
+        # Command being observed: (t_cmd, az, el at command time) until arrival
+        self._cmd: Optional[Tuple[float, float, float]] = None
+        self._moving_since: Optional[float] = None
+        self._pending_rate: Optional[float] = None
+        self._last: Optional[Tuple[float, float, float]] = None
+
+    def target(self, traj: "PassTrajectory", now: float,
+               cur_az: float, cur_el: float) -> Optional[Tuple[float, float]]:
+        """Position to command at `now` (None once the pass is over)."""
+        here = traj.at(now)
+        if here is None or not self.enabled:
+            self.lead_s = 0.0
+            return here
+
+        dist = max(abs(here[0] - cur_az), abs(here[1] - cur_el))
+        nxt = traj.at(now + 1.0) or here
+        moon_dps = max(abs(nxt[0] - here[0]), abs(nxt[1] - here[1]), 1e-6)
+        hold = max(self.min_interval_s, self.dead_band_deg / moon_dps)
+
+        lead = self.latency_s + dist / self.slew_dps + hold / 2
+        self.lead_s = min(lead, LEAD_MAX_S)
+        ahead = traj.at(now + self.lead_s)
+        return ahead if ahead is not None else here
+
+    def on_command(self, t: float, cur_az: float, cur_el: float) -> None:
+        """A SET was sent at t while the antenna was at (cur_az, cur_el)."""
+        self._cmd = (t, cur_az, cur_el)
+        self._moving_since = None
+        self._pending_rate = None
+
+    def on_sample(self, t: float, az: float, el: float) -> None:
+        """Feed one telemetry sample (continuous az)."""
+        last, self._last = self._last, (t, az, el)
+        if self._cmd is None or last is None:
+            return
+
+        t_cmd, az0, el0 = self._cmd
+        if t <= t_cmd:
+            return
+
+        if self._moving_since is None:
+            if max(abs(az - az0), abs(el - el0)) < MOVE_EPS_DEG:
+                return
+            # Motion started somewhere between the previous sample and this one
+            t_start = max(t_cmd, (last[0] + t) / 2)
+            self._moving_since = t_start
+            self.latency_s = self._blend(self.latency_s, t_start - t_cmd, 0.0, 5.0)
+            return
+
+        dt = t - last[0]
+        step = max(abs(az - last[1]), abs(el - last[2]))
+        if dt <= 0:
+            return
+        if step < MOVE_EPS_DEG:
+            # Arrived: stop observing this command
+            self._cmd = None
+            return
+        # A speed only counts once the rotator is seen moving after it too:
+        # the interval in which it stopped would understate the slew rate.
+        if self._pending_rate is not None:
+            self.slew_dps = self._blend(self.slew_dps, self._pending_rate, 0.1, 20.0)
+        self._pending_rate = step / dt
+
+    @staticmethod
+    def _blend(old: float, new: float, lo: float, hi: float) -> float:
+        new = min(max(new, lo), hi)
+        return (1 - LEAD_ALPHA) * old + LEAD_ALPHA * new
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "lead": self.enabled,
+            "lead_s": round(float(self.lead_s), 2),
+            "latency_s": round(float(self.latency_s), 3),
+            "slew_dps": round(float(self.slew_dps), 3),
+        }
+
+
+class TrackingController:
+    """
+    One tracking decision per position sample.
+
+    Scores the sample against the Moon, feeds the lead estimator and decides
+    whether a correction is due (error above dead_band_deg and at least
+    send_interval_s since the last one). The caller sends the command and
+    reports it back with sent(); the app tracker and benchTracking.py both
+    drive this class, so the benchmark measures the real control logic.
+    """
+
+    def __init__(self, send_interval_s: float, dead_band_deg: float,
+                 lead: bool = True) -> None:
+        self.send_interval_s = float(send_interval_s)
+        self.dead_band_deg = float(dead_band_deg)
+        self.lead = LeadCompensator(send_interval_s, dead_band_deg, enabled=lead)
+        self.stats = TrackingStats()
+        self.moon: Optional[Tuple[float, float]] = None   # Moon (az_cont, el) at last step
+        self.last_send = float("-inf")
+
+    def step(self, traj: PassTrajectory, now: float, t: float, az: float,
+             el: float) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Process one sample (t, continuous az, el) at time `now`.
+
+        Returns (az_cont, el, err_az, err_el) to command, or None.
+        """
+        moon = traj.at(now)
+        self.moon = moon
+        if moon is None:
+            return None
+
+        self.lead.on_sample(t, az, el)
+        self.stats.add_sample(ang_err(norm360(moon[0]), norm360(az)), moon[1] - el, el)
+
+        desired_az, desired_el = self.lead.target(traj, now, az, el)
+        err_az = ang_err(norm360(desired_az), norm360(az))
+        err_el = desired_el - el
+
+        if (
+            (abs(err_az) > self.dead_band_deg or abs(err_el) > self.dead_band_deg)
+            and now - self.last_send >= self.send_interval_s
+        ):
+            return desired_az, desired_el, err_az, err_el
+        return None
+
+    def sent(self, now: float, az: float, el: float) -> None:
+        """The command returned by step() was sent at `now` from (az, el)."""
+        self.lead.on_command(now, az, el)
+        self.stats.add_command()
+        self.last_send = now
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**self.stats.as_dict(), **self.lead.as_dict()}